@@ -1,9 +1,16 @@
-from barcode import Code128
-from barcode.writer import SVGWriter
+"""Writes a Code128 barcode SVG, see tech_cache.commons.label_manager for batches
 
-def generate_barcode(sku, output_path):
-    with open(f'{output_path}.svg', "wb") as f:
-        Code128(sku, writer=SVGWriter()).write(f)
+Usage:
+    python barcode_gen.py ARD-UNO arduino_uno_barcode
+"""
+import os
+import sys
 
-# Example usage
-generate_barcode('ARD-UNO', 'arduino_uno_barcode')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from tech_cache.utils.generators import generate_barcode
+
+if __name__ == "__main__":
+    sku = sys.argv[1] if len(sys.argv) > 1 else 'ARD-UNO'
+    output_path = sys.argv[2] if len(sys.argv) > 2 else 'arduino_uno_barcode'
+    generate_barcode(sku, output_path)
@@ -0,0 +1,113 @@
+"""The same workload on SQLite and on PostgreSQL
+
+Writes a csv of ``--rows`` items and runs it against every given
+database: import, re-import as an upsert of every sku, streaming all
+rows, keyset pages, single quantity changes, search and category
+reports. PostgreSQL runs only with ``--postgres-url`` or the
+TECH_CACHE_POSTGRES_URL environment variable, its tables are dropped
+first, so point it at a scratch database.
+
+Usage:
+    python benchmarks/bench_backends.py --rows 200000 \\
+        --postgres-url postgresql+psycopg://tech_cache@localhost/bench
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sqlalchemy import create_engine
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.export_manager import ExportManager
+from tech_cache.commons.reports import ReportEngine
+from tech_cache.commons.search_engine import SearchEngine
+from tech_cache.models.item import Base
+
+
+def write_csv(file_name, rows, quantity_offset=0):
+    with open(file_name, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["SKU", "Name", "Category", "Quantity", "Specification"])
+        for i in range(rows):
+            writer.writerow([f"PART-{i:07d}", f"Part {i} resistor", f"Category {i % 50}",
+                             (i + quantity_offset) % 100, f"{i % 97} ohm 0603"])
+
+
+def reset(url):
+    """Drops what an earlier run left in a server database"""
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE IF EXISTS schema_version")
+    engine.dispose()
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"  {label:<22}{time.perf_counter() - start:9.4f}s")
+    return result
+
+
+def run(url, rows, imported, reimported):
+    database = DatabaseManager(url, unique_sku=True, snapshot_interval=None)
+    exporter = ExportManager(database)
+
+    timed("import csv", lambda: exporter.import_as_csv(imported, chunk_size=10000))
+    timed("upsert csv", lambda: exporter.import_as_csv(reimported, chunk_size=10000, upsert=True))
+    timed("stream all rows", lambda: sum(1 for _ in database.iter_item_rows(("id", "sku", "quantity"))))
+    timed("read all rows", database.get_rows)
+
+    def pages():
+        key = None
+        for _ in range(100):
+            page = database.get_rows(after_key=key, limit=100, order_by="name")
+            if not page:
+                break
+            key = database.sort_key(page[-1], "name")
+    timed("100 keyset pages", pages)
+
+    timed("1000 adjustments", lambda: [database.adjust_quantity(item_id, 1, reason="bench")
+                                       for item_id in range(1, rows + 1, max(rows // 1000, 1))])
+
+    search = timed("search index", lambda: SearchEngine(database))
+    timed("100 searches", lambda: [search.search(f"Part {i}", mode="fts") for i in range(100)])
+    timed("fuzzy search", lambda: search.search("resistr", mode="fuzzy"))
+
+    reports = ReportEngine(database)
+    timed("category report", reports.report)
+    database.engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--sqlite-url")
+    parser.add_argument("--postgres-url", default=os.environ.get("TECH_CACHE_POSTGRES_URL"))
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    imported = os.path.join(directory, "items.csv")
+    reimported = os.path.join(directory, "items_again.csv")
+    write_csv(imported, args.rows)
+    write_csv(reimported, args.rows, quantity_offset=7)
+
+    print("sqlite")
+    run(args.sqlite_url or f"sqlite:///{os.path.join(directory, 'bench.db')}",
+        args.rows, imported, reimported)
+
+    print("postgresql")
+    if args.postgres_url is None:
+        print("  skipped, no --postgres-url")
+        return
+    reset(args.postgres_url)
+    run(args.postgres_url, args.rows, imported, reimported)
+
+
+if __name__ == "__main__":
+    main()
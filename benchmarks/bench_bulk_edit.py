@@ -0,0 +1,57 @@
+"""Bulk edits against one transaction per item
+
+Fills a database with ``--rows`` items and moves ``--selected`` of them
+to another category, once committing every item and once with
+bulk_update, then deletes them with bulk_delete.
+
+Usage:
+    python benchmarks/bench_bulk_edit.py --rows 200000 --selected 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sqlalchemy import update
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.models.item import Item
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--selected", type=int, default=5000)
+    args = parser.parse_args()
+
+    database = DatabaseManager(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bulk.db')}",
+                               snapshot_interval=None)
+    for start in range(0, args.rows, 50000):
+        database.bulk_add_items([{"sku": f"PART-{i:07d}", "name": f"Part {i}",
+                                  "category": f"Category {i % 50}", "quantity": i % 100,
+                                  "specification": ""}
+                                 for i in range(start, min(start + 50000, args.rows))])
+    random.seed(1)
+    ids = random.sample(range(1, args.rows + 1), args.selected)
+
+    start = time.perf_counter()
+    for item_id in ids:
+        with database.engine.begin() as connection:
+            connection.execute(update(Item).where(Item.id == item_id).values(category="Per item"))
+    print(f"commit per item {time.perf_counter() - start:8.3f}s")
+
+    start = time.perf_counter()
+    database.bulk_update(ids, {"category": "Bulk"})
+    print(f"bulk_update     {time.perf_counter() - start:8.3f}s")
+
+    start = time.perf_counter()
+    database.bulk_delete(ids)
+    print(f"bulk_delete     {time.perf_counter() - start:8.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Following another workbench's changes, full reload against the change feed
+
+Fills a shared database with ``--rows`` items. A second DatabaseManager,
+standing in for another workbench, changes ``--changes`` items, which
+the first one picks up once by reading every row again and once by
+polling the change log and reading only the changed rows. Also times a
+poll with nothing new, and the cost of the log triggers on bulk writes.
+
+Usage:
+    python benchmarks/bench_change_feed.py --rows 200000 --changes 100
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tech_cache.commons.backends import SQLiteBackend
+from tech_cache.commons.change_feed import ChangeFeed
+from tech_cache.commons.database_manager import DatabaseManager
+
+
+def fill(database, rows):
+    for start in range(0, rows, 50000):
+        database.bulk_add_items([{"sku": f"PART-{i:07d}", "name": f"Part {i}",
+                                  "category": f"Category {i % 50}", "quantity": i % 100,
+                                  "specification": ""}
+                                 for i in range(start, min(start + 50000, rows))])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args()
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'shared.db')}"
+    station = DatabaseManager(url, snapshot_interval=None)
+    fill(station, args.rows)
+    other = DatabaseManager(url, snapshot_interval=None)
+    feed = ChangeFeed(station)
+    changed = []
+    station.subscribe(lambda change: changed.extend(change.ids))
+
+    random.seed(1)
+    ids = random.sample(range(1, args.rows + 1), args.changes)
+    for item_id in ids[:len(ids) // 2]:
+        other.update_item(item_id, {"name": f"Renamed {item_id}"})
+    other.apply_movements([(item_id, 1) for item_id in ids[len(ids) // 2:]], reason="bench")
+
+    start = time.perf_counter()
+    rows = station.get_rows()
+    print(f"full reload       {time.perf_counter() - start:8.4f}s {len(rows)} rows")
+
+    start = time.perf_counter()
+    feed.poll()
+    rows = station.get_rows(changed)
+    print(f"change feed       {time.perf_counter() - start:8.4f}s {len(rows)} rows")
+
+    polls = 1000
+    start = time.perf_counter()
+    for _ in range(polls):
+        feed.poll()
+    print(f"idle poll         {(time.perf_counter() - start) / polls * 1e6:8.1f}us")
+
+    # the same bulk edit with and without the log triggers
+    selected = random.sample(range(1, args.rows + 1), min(5000, args.rows))
+    label = f"bulk_update {len(selected)}"
+    start = time.perf_counter()
+    other.bulk_update(selected, {"category": "Logged"})
+    print(f"{label:<18}{time.perf_counter() - start:8.4f}s logged")
+    with other.engine.begin() as connection:
+        for trigger in SQLiteBackend().change_log_triggers():
+            name = trigger.split("EXISTS ")[1].split()[0]
+            connection.exec_driver_sql(f"DROP TRIGGER {name}")
+    start = time.perf_counter()
+    other.bulk_update(selected, {"category": "Unlogged"})
+    print(f"{label:<18}{time.perf_counter() - start:8.4f}s without log")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Insert and read throughput of each DatabaseManager engine profile
+
+Every profile gets a fresh database file and runs the same workload:
+single item adds with a commit each, bulk inserts, point reads by id
+and page reads from several threads at once.
+
+Usage:
+    python benchmarks/bench_engine_profiles.py --rows 100000 --threads 4
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.engine_profile import PROFILES
+from tech_cache.models.item import Item
+
+
+def rate(count, seconds):
+    return f"{count / seconds:12,.0f} /s"
+
+
+def run_profile(profile, directory, args):
+    db_url = f"sqlite:///{os.path.join(directory, profile.name + '.db')}"
+    database = DatabaseManager(db_url, profile=profile)
+    results = {}
+
+    start = time.perf_counter()
+    for i in range(args.single):
+        database.add_item(Item(name=f"Single {i}", sku=f"ONE-{i}", category="Single", quantity=i))
+    results["single adds"] = rate(args.single, time.perf_counter() - start)
+
+    rows = [{"sku": f"SKU-{i}",
+             "name": f"Part {i}",
+             "category": random.choice(["Board", "Cable", "Sensor", "Screw"]),
+             "quantity": random.randrange(1000),
+             "specification": ""} for i in range(args.rows)]
+    start = time.perf_counter()
+    for first in range(0, len(rows), 1000):
+        database.bulk_add_items(rows[first:first + 1000])
+    results["bulk insert rows"] = rate(args.rows, time.perf_counter() - start)
+
+    total = database.count_items()
+    ids = [random.randint(1, total) for _ in range(args.reads)]
+    start = time.perf_counter()
+    for item_id in ids:
+        database.get_item(item_id)
+    results["point reads"] = rate(args.reads, time.perf_counter() - start)
+
+    def read_pages(seed):
+        generator = random.Random(seed)
+        for _ in range(args.pages):
+            database.get_items_page((generator.randint(1, total),), 100)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        list(pool.map(read_pages, range(args.threads)))
+    results[f"page reads x{args.threads} threads"] = rate(args.pages * args.threads,
+                                                          time.perf_counter() - start)
+    database.engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--single", type=int, default=500, help="single item adds")
+    parser.add_argument("--reads", type=int, default=5000, help="point reads")
+    parser.add_argument("--pages", type=int, default=200, help="pages per reader thread")
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for profile in PROFILES.values():
+            print(f"Profile {profile.name}")
+            for label, value in run_profile(profile, directory, args).items():
+                print(f"  {label:<24}{value}")
+
+
+if __name__ == "__main__":
+    main()
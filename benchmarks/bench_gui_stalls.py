@@ -0,0 +1,105 @@
+"""Event loop stalls while a csv import runs
+
+Imports a ``--rows`` row csv file into an empty database shown in a
+table view, once called on the GUI thread and once through the
+DatabaseWorker. A 5 ms timer records how late the event loop gets to
+it, the longest gap is how long the window froze.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_gui_stalls.py --rows 100000
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PyQt6 import QtCore, QtWidgets
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.export_manager import ExportManager
+from tech_cache.config.app_config import AppConfig
+from tech_cache.models.inventory_table_model import InventoryTableModel
+from tech_cache.utils.database_worker import DatabaseWorker
+
+TICK_MS = 5
+
+
+def write_csv(file_name, rows):
+    with open(file_name, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["SKU", "Name", "Category", "Quantity", "specification"])
+        for i in range(rows):
+            writer.writerow([f"PART-{i:07d}", f"Part {i}", f"Category {i % 50}", i % 100, "spec"])
+
+
+def run(app, directory, file_name, threaded):
+    database = DatabaseManager(f"sqlite:///{os.path.join(directory, f'stalls_{threaded}.db')}",
+                               snapshot_interval=None)
+    view = QtWidgets.QTableView()
+    view.setModel(InventoryTableModel(database, AppConfig(), items=[]))
+    view.resize(800, 600)
+    view.show()
+
+    gaps = []
+    last = [time.perf_counter()]
+    done = [False]
+
+    def tick():
+        now = time.perf_counter()
+        gaps.append(now - last[0])
+        last[0] = now
+
+    def finished(_=None):
+        done[0] = True
+        app.quit()
+
+    timer = QtCore.QTimer()
+    timer.timeout.connect(tick)
+    timer.start(TICK_MS)
+
+    worker = DatabaseWorker(database) if threaded else None
+    manager = ExportManager(database)
+
+    def start():
+        last[0] = time.perf_counter()
+        if threaded:
+            worker.submit(manager.import_as_csv, file_name, on_done=finished, on_error=finished)
+        else:
+            manager.import_as_csv(file_name)
+            finished()
+
+    started = time.perf_counter()
+    QtCore.QTimer.singleShot(0, start)
+    app.exec()
+    elapsed = time.perf_counter() - started
+    timer.stop()
+    if worker is not None:
+        worker.shutdown()
+
+    gaps.sort()
+    stalls = sum(1 for gap in gaps if gap > 0.05)
+    label = "worker thread" if threaded else "GUI thread"
+    print(f"{label:14} {elapsed:6.2f}s, longest stall {gaps[-1] * 1e3:8.1f} ms, "
+          f"p99 {gaps[int(len(gaps) * 0.99)] * 1e3:6.1f} ms, {stalls} stalls over 50 ms, "
+          f"{view.model().rowCount()} rows shown")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)
+    directory = tempfile.mkdtemp()
+    file_name = os.path.join(directory, "items.csv")
+    write_csv(file_name, args.rows)
+    for threaded in (False, True):
+        run(app, directory, file_name, threaded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Query plans and timings of the item table before and after indexing
+
+Builds a database without the item indexes, the way databases created
+before schema version 1 look, times the queries the app runs, migrates
+it and times them again.
+
+Usage:
+    python benchmarks/bench_indexes.py --rows 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sqlalchemy import create_engine, text
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.models.item import Base, Item
+
+CATEGORIES = ["Board", "Cable", "Sensor", "Motor", "Screw", "Nut", "Bolt", "Resistor"]
+
+QUERIES = {
+    "lookup by sku": ("SELECT * FROM items WHERE sku = :sku", lambda n: {"sku": f"SKU-{random.randrange(n)}"}),
+    "first page by name": ("SELECT * FROM items ORDER BY name, id LIMIT 500", lambda n: {}),
+    "keyset page by name": ("SELECT * FROM items WHERE (name, id) > (:name, :id) "
+                            "ORDER BY name, id LIMIT 500",
+                            lambda n: {"name": f"Part {random.randrange(n)}", "id": 0}),
+    "first page by quantity": ("SELECT * FROM items ORDER BY quantity, id LIMIT 500", lambda n: {}),
+    "count of category": ("SELECT COUNT(*) FROM items WHERE category = :category",
+                          lambda n: {"category": random.choice(CATEGORIES)}),
+}
+
+
+def build_unindexed(db_url, rows):
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        for index in Item.__table__.indexes:
+            index.drop(connection, checkfirst=True)
+        connection.exec_driver_sql("PRAGMA user_version = 0")
+        batch = []
+        for i in range(rows):
+            batch.append({"sku": f"SKU-{i}",
+                          "name": f"Part {random.randrange(rows)}",
+                          "category": random.choice(CATEGORIES),
+                          "quantity": random.randrange(1000),
+                          "specification": ""})
+            if len(batch) == 10000:
+                connection.execute(Item.__table__.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(Item.__table__.insert(), batch)
+    engine.dispose()
+
+
+def run_queries(engine, rows, repeat):
+    with engine.connect() as connection:
+        for label, (sql, params) in QUERIES.items():
+            plan = connection.execute(text("EXPLAIN QUERY PLAN " + sql), params(rows)).all()
+            start = time.perf_counter()
+            for _ in range(repeat):
+                connection.execute(text(sql), params(rows)).all()
+            elapsed = (time.perf_counter() - start) / repeat * 1000
+            print(f"  {label:<24} {elapsed:9.3f} ms   {' / '.join(row[-1] for row in plan)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        build_unindexed(db_url, args.rows)
+
+        engine = create_engine(db_url)
+        print(f"Before migration ({args.rows} rows)")
+        run_queries(engine, args.rows, args.repeat)
+        engine.dispose()
+
+        database = DatabaseManager(db_url)
+        database.engine.echo = False
+        print("After migration")
+        run_queries(database.engine, args.rows, args.repeat)
+        database.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
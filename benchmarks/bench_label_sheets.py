@@ -0,0 +1,58 @@
+"""Label sheet throughput and memory
+
+Fills a database with ``--rows`` items and writes them as A4 sheets of
+65 labels, as PDF and as PNG pages, first with an empty tile cache, then
+reusing the cached tiles. Items are streamed from the database, so peak
+memory should stay flat however many pages are written.
+
+Usage:
+    python benchmarks/bench_label_sheets.py --rows 10000 --code qr
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.label_manager import LabelManager
+from tech_cache.commons.label_sheet import LabelSheetCompositor
+
+
+def peak_mb():
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--code", choices=LabelSheetCompositor.CODES, default="barcode")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = DatabaseManager(f"sqlite:///{os.path.join(directory, 'sheets.db')}")
+    database.bulk_add_items([{"sku": f"BIN-{i:06d}", "name": f"Shelf {i // 100} bin {i % 100}",
+                              "category": "Bins", "quantity": 0, "specification": ""}
+                             for i in range(args.rows)])
+    compositor = LabelSheetCompositor(LabelManager(database, os.path.join(directory, "cache"),
+                                                   processes=1),
+                                      code=args.code)
+    print(f"{args.rows} labels, peak memory before {peak_mb():.0f} MB")
+
+    for run in ("cold", "cached"):
+        for image_format in ("pdf", "png"):
+            output = os.path.join(directory, f"{run}-sheet" + (".pdf" if image_format == "pdf" else ""))
+            start = time.perf_counter()
+            report = compositor.write(database.iter_item_rows(["sku", "name"]), output, image_format)
+            elapsed = time.perf_counter() - start
+            print(f"{run:<7}{image_format:<4}{report.pages:5} pages in {elapsed:6.2f}s, "
+                  f"{report.pages / elapsed:6.1f} pages/s, {report.cached:6} cached tiles, "
+                  f"peak memory {peak_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Label generation throughput, cold and cached
+
+Fills a database with ``--rows`` items and renders barcode and QR labels
+of all of them through LabelManager, first into an empty cache, then
+again with everything cached. The per label cost of the old one file at
+a time generators (python-barcode's SVGWriter, qrcode's default image)
+is measured on a sample for comparison.
+
+Usage:
+    python benchmarks/bench_labels.py --rows 50000 --processes 4
+"""
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.label_manager import LabelManager
+
+
+def legacy_label(sku):
+    from barcode import Code128
+    from barcode.writer import SVGWriter
+    import qrcode
+
+    Code128(sku, writer=SVGWriter()).write(io.BytesIO())
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L,
+                       box_size=10, border=4)
+    qr.add_data(sku)
+    qr.make(fit=True)
+    qr.make_image(fill_color="black", back_color="white").save(io.BytesIO())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--sample", type=int, default=200, help="labels rendered the old way")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = DatabaseManager(f"sqlite:///{os.path.join(directory, 'labels.db')}")
+    database.bulk_add_items([{"sku": f"BIN-{i:06d}", "name": f"Bin {i}", "category": "Bins",
+                              "quantity": 0, "specification": ""} for i in range(args.rows)])
+    labels = LabelManager(database, os.path.join(directory, "cache"), processes=args.processes)
+    skus = labels.skus()
+    kinds = ("barcode", "qr")
+
+    start = time.perf_counter()
+    report = labels.generate(skus, kinds)
+    cold = time.perf_counter() - start
+    print(f"cold:   {report.rendered} labels in {cold:6.2f}s, {report.rendered / cold:8,.0f} labels/s, "
+          f"{args.processes} processes")
+
+    start = time.perf_counter()
+    report = labels.generate(skus, kinds)
+    warm = time.perf_counter() - start
+    print(f"cached: {report.cached} labels in {warm:6.2f}s")
+
+    start = time.perf_counter()
+    for sku in skus[:args.sample]:
+        legacy_label(sku)
+    legacy = (time.perf_counter() - start) / args.sample
+    print(f"legacy: {1 / legacy * 2:,.0f} labels/s on one process, "
+          f"{legacy * len(skus):.0f}s for all {len(skus)} items")
+
+
+if __name__ == "__main__":
+    main()
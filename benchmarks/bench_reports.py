@@ -0,0 +1,77 @@
+"""Cost of category reports and of keeping their totals
+
+Fills a database with ``--rows`` items spread over the last year, times
+reports over all items and over recently updated ones, cold and cached,
+and stock movements, which now also update the category totals.
+
+Usage:
+    python benchmarks/bench_reports.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from sqlalchemy import bindparam, update
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.reports import ReportEngine, local_midnight
+from tech_cache.models.item import Item
+
+
+def timed(function, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--movements", type=int, default=2000)
+    args = parser.parse_args()
+
+    database = DatabaseManager(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'reports.db')}",
+                               snapshot_interval=None)
+    random.seed(1)
+    start = time.perf_counter()
+    for chunk in range(0, args.rows, 50000):
+        database.bulk_add_items([{"sku": f"PART-{i:07d}", "name": f"Part {i}",
+                                  "category": f"Category {i % 50}",
+                                  "quantity": random.randint(0, 100), "specification": "",
+                                  "unit_price": round(random.uniform(0.1, 50), 2)}
+                                 for i in range(chunk, min(chunk + 50000, args.rows))])
+    print(f"import          {time.perf_counter() - start:8.2f}s")
+
+    # spread the updates over a year, the ledger keeps its import time
+    now = database.now()
+    with database.engine.begin() as connection:
+        connection.execute(update(Item.__table__).where(Item.id == bindparam("item_id"))
+                           .values(updated_at=bindparam("updated")),
+                           [{"item_id": item_id, "updated": now - timedelta(minutes=random.randint(0, 525600))}
+                            for item_id in range(1, args.rows + 1)])
+
+    reports = ReportEngine(database)
+    for label, since in (("all items", None), ("today", local_midnight(0)),
+                         ("7 days", local_midnight(6)), ("30 days", local_midnight(29))):
+        reports.invalidate()
+        cold, report = timed(lambda: reports.report(since))
+        cached, _ = timed(lambda: reports.report(since), 1000)
+        print(f"{label:15} {cold * 1e3:8.2f} ms, cached {cached * 1e6:6.1f} us, "
+              f"{report.total.items} items")
+
+    ids = list(range(1, args.rows + 1))
+    elapsed, _ = timed(lambda: [database.adjust_quantity(random.choice(ids), random.choice((-1, 1)),
+                                                         allow_negative=True)
+                                for _ in range(args.movements)])
+    print(f"movements       {args.movements / elapsed:8.0f} /s")
+
+
+if __name__ == "__main__":
+    main()
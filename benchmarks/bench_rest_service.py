@@ -0,0 +1,178 @@
+"""Load test of the REST/JSON service
+
+Starts the service in a separate process on a freshly filled database,
+or uses a running service given with --url, then keeps ``--connections``
+keep-alive connections busy with a mix of point reads, list pages,
+conditional list reads and stock adjustments. Prints requests per
+second and latency percentiles for each request kind.
+
+Usage:
+    python benchmarks/bench_rest_service.py --rows 20000 --connections 32 --seconds 10
+    python benchmarks/bench_rest_service.py --processes 4
+    python benchmarks/bench_rest_service.py --url http://127.0.0.1:8080 --rows 0
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import socket
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+from tech_cache.commons.database_manager import DatabaseManager
+
+# kind, weight
+MIX = [("get", 50), ("sku", 15), ("page", 15), ("page 304", 15), ("adjust", 5)]
+
+
+class Client:
+    """Minimal HTTP/1.1 keep-alive client"""
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, target, body=None, headers=None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}",
+                 f"Content-Length: {len(payload)}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        response_headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+        body = await self.reader.readexactly(int(response_headers.get("content-length", 0)))
+        return int(status_line.split()[1]), response_headers, body
+
+
+async def worker(client, item_count, deadline, latencies, errors):
+    await client.connect()
+    kinds = [kind for kind, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    etags = {}
+    while time.perf_counter() < deadline:
+        kind = random.choices(kinds, weights)[0]
+        item_id = random.randint(1, item_count)
+        headers = None
+        if kind == "get":
+            target, method, body = f"/items/{item_id}", "GET", None
+        elif kind == "sku":
+            target, method, body = f"/items/sku/SKU-{item_id - 1}", "GET", None
+        elif kind == "adjust":
+            target, method, body = f"/items/id:{item_id}/adjust", "POST", {"delta": 1}
+        else:
+            target, method, body = f"/items?limit=50&sort=name&category=Cat{item_id % 20}", "GET", None
+            if kind == "page 304" and target in etags:
+                headers = {"If-None-Match": etags[target]}
+
+        start = time.perf_counter()
+        status, response_headers, _ = await client.request(method, target, body, headers)
+        latencies[kind].append(time.perf_counter() - start)
+        if status >= 400:
+            errors[status] += 1
+        if "etag" in response_headers:
+            etags[target] = response_headers["etag"]
+
+
+def fill(database, rows):
+    batch = 5000
+    for start in range(0, rows, batch):
+        database.bulk_add_items([{"sku": f"SKU-{i}",
+                                  "name": f"Part {random.randint(0, rows)}",
+                                  "category": f"Cat{(i + 1) % 20}",
+                                  "quantity": random.randint(0, 100),
+                                  "specification": ""}
+                                 for i in range(start, min(start + batch, rows))])
+
+
+def start_service(db_url, processes):
+    """Runs the service in its own process, so it doesn't share the GIL with the clients"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, "-m", "tech_cache.rest_service",
+                                "--db", db_url, "--port", str(port),
+                                "--processes", str(processes)],
+                               cwd=SRC, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Service did not start")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000
+
+
+async def run(host, port, args):
+    deadline = time.perf_counter() + args.seconds
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(Client(host, port), args.rows, deadline, latencies, errors)
+                           for _ in range(args.connections)))
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s, {total / elapsed:,.0f} req/s, "
+          f"{args.connections} connections")
+    print(f"{'kind':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind, values in latencies.items():
+        print(f"{kind:<10}{len(values):>8}{percentile(values, 0.5):>10.2f}"
+              f"{percentile(values, 0.95):>10.2f}{percentile(values, 0.99):>10.2f}")
+    if errors:
+        print("errors:", dict(errors))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="running service, otherwise one is started")
+    parser.add_argument("--rows", type=int, default=20000,
+                        help="items to create, or items present behind --url")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--processes", type=int, default=1, help="service processes to start")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    process = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port
+    else:
+        directory = tempfile.mkdtemp()
+        db_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        fill(DatabaseManager(db_url), args.rows)
+        host = "127.0.0.1"
+        process, port = start_service(db_url, args.processes)
+
+    try:
+        asyncio.run(run(host, port, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
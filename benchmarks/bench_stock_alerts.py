@@ -0,0 +1,63 @@
+"""Cost of keeping the low stock set up to date
+
+Fills a database with ``--rows`` items, a tenth of them with a reorder
+threshold, times loading the low stock set once and then stock
+movements with and without the monitor listening. The monitor's share
+should not grow with the table.
+
+Usage:
+    python benchmarks/bench_stock_alerts.py --rows 500000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.stock_alerts import StockAlertMonitor
+
+
+def movements_per_second(database, ids, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        database.adjust_quantity(random.choice(ids), random.choice((-1, 1)), allow_negative=True)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--movements", type=int, default=2000)
+    args = parser.parse_args()
+
+    database = DatabaseManager(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'alerts.db')}",
+                               snapshot_interval=None)
+    random.seed(1)
+    for start in range(0, args.rows, 50000):
+        database.bulk_add_items([{"sku": f"PART-{i:07d}", "name": f"Part {i}",
+                                  "category": f"Category {i % 50}",
+                                  "quantity": random.randint(0, 100), "specification": "",
+                                  "reorder_threshold": 10 if i % 10 == 0 else None}
+                                 for i in range(start, min(start + 50000, args.rows))])
+    database.set_category_threshold("Category 7", 20)
+    ids = [item_id for (item_id,) in database.iter_item_rows(["id"])]
+
+    print(f"without monitor {movements_per_second(database, ids, args.movements):8.0f} movements/s")
+    monitor = StockAlertMonitor(database)
+    start = time.perf_counter()
+    monitor.load()
+    print(f"initial load    {time.perf_counter() - start:8.2f}s, {len(monitor.low_stock())} low items")
+    print(f"with monitor    {movements_per_second(database, ids, args.movements):8.0f} movements/s")
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        monitor.low_stock()
+    print(f"low_stock()     {(time.perf_counter() - start) / 10000 * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
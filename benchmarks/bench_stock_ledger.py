@@ -0,0 +1,74 @@
+"""Stock ledger write throughput and point in time lookups
+
+Simulates a pick station, single scans each committed on their own with
+adjust_quantity and batches of scans through apply_movements, then builds
+a long history and times quantity_at with and without snapshots.
+
+Usage:
+    python benchmarks/bench_stock_ledger.py --items 10000 --movements 200000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tech_cache.commons.database_manager import DatabaseManager
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--scans", type=int, default=2000, help="single adjust_quantity calls")
+    parser.add_argument("--movements", type=int, default=200000, help="history size")
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    database = DatabaseManager(f"sqlite:///{os.path.join(directory, 'ledger.db')}", snapshot_interval=None)
+    database.bulk_add_items([{"sku": f"PICK-{i:06d}", "name": f"Part {i}", "category": "Parts",
+                              "quantity": 1000000, "specification": ""}
+                             for i in range(args.items)])
+    random.seed(1)
+    ids = [item_id for (item_id,) in database.iter_item_rows(["id"])]
+
+    start = time.perf_counter()
+    for _ in range(args.scans):
+        database.adjust_quantity(random.choice(ids), -1, reason="pick")
+    elapsed = time.perf_counter() - start
+    print(f"adjust_quantity  {args.scans / elapsed:8.0f} scans/s")
+
+    start = time.perf_counter()
+    for _ in range(args.movements // args.batch):
+        database.apply_movements([(random.choice(ids), random.randint(-3, 3) or 1)
+                                  for _ in range(args.batch)], reason="pick")
+    elapsed = time.perf_counter() - start
+    print(f"apply_movements  {args.movements / elapsed:8.0f} movements/s in batches of {args.batch}")
+
+    middle = database.now()
+    probes = random.sample(ids, 200)
+
+    def lookup_time():
+        times = []
+        for item_id in probes:
+            start = time.perf_counter()
+            database.quantity_at(item_id, middle)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times) * 1e6
+
+    print(f"quantity_at      {lookup_time():8.0f} µs without snapshots, "
+          f"{args.movements / args.items:.0f} movements per item")
+    start = time.perf_counter()
+    count = database.take_snapshot(full=True)
+    print(f"take_snapshot    {time.perf_counter() - start:8.2f}s for {count} items")
+    database.apply_movements([(item_id, -1) for item_id in ids], reason="pick")
+    middle = database.now()
+    print(f"quantity_at      {lookup_time():8.0f} µs after a snapshot")
+
+
+if __name__ == "__main__":
+    main()
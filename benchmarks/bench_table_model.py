@@ -0,0 +1,80 @@
+"""Cost of the table model's data() path and of holding its rows
+
+Fills a database with ``--rows`` items and loads them once as ORM items
+and once as the model's ItemRow tuples, comparing time and memory per
+100k rows. Then calls data() for the cells of a screenful of rows, with
+the display role only and mixed with roles Qt asks for on every repaint.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_table_model.py
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from PyQt6 import QtCore, QtWidgets
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.config.app_config import AppConfig
+from tech_cache.models.inventory_table_model import InventoryTableModel
+
+
+def measure_load(load):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = load()
+    elapsed = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, elapsed, memory
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv)
+    database = DatabaseManager(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'model.db')}",
+                               snapshot_interval=None)
+    for start in range(0, args.rows, 50000):
+        database.bulk_add_items([{"sku": f"PART-{i:07d}", "name": f"Part {i}",
+                                  "category": f"Category {i % 50}", "quantity": i % 100,
+                                  "specification": "Some specification text"}
+                                 for i in range(start, min(start + 50000, args.rows))])
+
+    per_100k = 100000 / args.rows
+    items, elapsed, memory = measure_load(database.get_all_items)
+    print(f"ORM items     load {elapsed * per_100k:6.2f}s, {memory * per_100k / 1e6:6.1f} MB per 100k rows")
+    del items
+    rows, elapsed, memory = measure_load(database.get_rows)
+    print(f"ItemRow       load {elapsed * per_100k:6.2f}s, {memory * per_100k / 1e6:6.1f} MB per 100k rows")
+
+    model = InventoryTableModel(database, AppConfig(), items=rows)
+    indexes = [model.index(row, column)
+               for row in range(min(1000, args.rows)) for column in range(model.columnCount())]
+    # Qt passes roles as ints
+    roles = QtCore.Qt.ItemDataRole
+    for label, asked in (("display role", (roles.DisplayRole.value,)),
+                         ("mixed roles", (roles.DisplayRole.value, roles.FontRole.value,
+                                          roles.TextAlignmentRole.value, roles.DecorationRole.value))):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for index in indexes:
+                for role in asked:
+                    model.data(index, role)
+        calls = args.repeat * len(indexes) * len(asked)
+        print(f"data() {label:13} {calls / (time.perf_counter() - start):12,.0f} calls/s")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Single item edits, ORM read-modify-write against update_item
+
+Fills a database with ``--rows`` items and edits the name and quantity
+of ``--edits`` of them, once loading each item into a session, setting
+its attributes and committing, once with update_item which writes only
+the changed columns in one guarded UPDATE.
+
+Usage:
+    python benchmarks/bench_update_item.py --rows 200000 --edits 2000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.models.item import Item
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--edits", type=int, default=2000)
+    args = parser.parse_args()
+
+    database = DatabaseManager(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'edit.db')}",
+                               snapshot_interval=None)
+    for start in range(0, args.rows, 50000):
+        database.bulk_add_items([{"sku": f"PART-{i:07d}", "name": f"Part {i}",
+                                  "category": f"Category {i % 50}", "quantity": i % 100,
+                                  "specification": ""}
+                                 for i in range(start, min(start + 50000, args.rows))])
+    random.seed(1)
+    ids = random.sample(range(1, args.rows + 1), args.edits)
+
+    start = time.perf_counter()
+    for item_id in ids:
+        with database.Session() as session:
+            item = session.get(Item, item_id)
+            item.name = f"ORM {item_id}"
+            item.quantity += 1
+            session.commit()
+    print(f"ORM load and commit {time.perf_counter() - start:8.3f}s")
+
+    rows = {row.id: row for row in database.get_rows(ids)}
+    start = time.perf_counter()
+    for item_id in ids:
+        row = rows[item_id]
+        database.update_item(item_id,
+                             {"name": f"Edited {item_id}", "quantity": row.quantity + 1},
+                             expected_updated_at=row.updated_at)
+    print(f"update_item         {time.perf_counter() - start:8.3f}s (with ledger rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,16 @@
-import qrcode
+"""Writes a QR code PNG, see tech_cache.commons.label_manager for batches
 
-# Data to be encoded
-data = "https://example.com/item-info/12345"
+Usage:
+    python qr_code_gen.py https://example.com/item-info/12345 item_qr_code
+"""
+import os
+import sys
 
-# Generate QR code
-qr = qrcode.QRCode(
-    version=1,
-    error_correction=qrcode.constants.ERROR_CORRECT_L,
-    box_size=10,
-    border=4,
-)
-qr.add_data(data)
-qr.make(fit=True)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
 
-# Create an image from the QR Code instance
-img = qr.make_image(fill_color="black", back_color="white")
-
-# Save it somewhere, e.g. a file
-img.save("item_qr_code.png")
+from tech_cache.utils.generators import generate_qr_code
 
+if __name__ == "__main__":
+    data = sys.argv[1] if len(sys.argv) > 1 else "https://example.com/item-info/12345"
+    output_path = sys.argv[2] if len(sys.argv) > 2 else 'item_qr_code'
+    generate_qr_code(data, output_path)
@@ -0,0 +1,347 @@
+"""Headless command line interface for Tech Cache
+
+Runs imports, exports, queries, stock adjustments, stock history, low
+stock and category reports and label generation straight on DatabaseManager/ExportManager, without
+PyQt6, and serves the REST/JSON service. Heavy modules are imported by the command that needs
+them.
+
+Usage:
+    py -m tech_cache.cli import mock_data.csv
+    py -m tech_cache.cli adjust ARDUINO_UNO -1
+    py -m tech_cache.cli history ARDUINO_UNO --at 2024-03-01
+    py -m tech_cache.cli threshold --category Board 5
+    py -m tech_cache.cli low-stock
+    py -m tech_cache.cli report --since 2024-03-01
+    py -m tech_cache.cli query "arduino" --limit 10
+    py -m tech_cache.cli serve --port 8080
+"""
+import argparse
+import csv
+import os
+import sys
+from datetime import datetime
+from tech_cache.config.app_config import AppConfig
+
+QUERY_COLUMNS = ["id", "sku", "name", "category", "quantity", "specification"]
+
+
+def open_database(args):
+    from tech_cache.commons.database_manager import DatabaseManager
+    return DatabaseManager(args.db)
+
+
+def parse_key(value: str):
+    """Item id of ``id:<number>``, anything else a sku"""
+    from tech_cache.commons.database_manager import DatabaseManager
+    return DatabaseManager.item_key(value)
+
+
+def parse_time(value: str) -> datetime:
+    """argparse type of UTC date or time options"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date or time {value!r}, use YYYY-MM-DD[ HH:MM[:SS]]")
+
+
+def command_import(args):
+    from tech_cache.commons.export_manager import ExportManager
+
+    def progress(report):
+        if args.verbose:
+            print(f"{report.rows_read} rows read", file=sys.stderr)
+
+    report = ExportManager(open_database(args)).import_as_csv(args.file,
+                                                              chunk_size=args.chunk_size,
+                                                              upsert=args.upsert,
+                                                              progress=progress)
+    print(f"inserted {report.inserted}, updated {report.updated}, errors {len(report.errors)}")
+    for error in report.errors:
+        print(f"line {error.line}: {error.message}", file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+def command_export(args):
+    from tech_cache.commons.export_manager import ExportManager
+    from tech_cache.models.item import Item
+
+    where = Item.category == args.category if args.category else None
+    columns = args.columns.split(",") if args.columns else None
+    rows = ExportManager(open_database(args)).export_csv(args.file,
+                                                        columns=columns,
+                                                        where=where,
+                                                        compression=args.compression)
+    print(f"exported {rows} rows")
+    return 0
+
+
+def command_query(args):
+    database = open_database(args)
+    if args.sku:
+        item = database.get_item_by_sku(args.sku)
+        items = [item] if item else []
+    elif args.text:
+        from tech_cache.commons.search_engine import SearchEngine
+        ids = SearchEngine(database).search(args.text, args.mode, args.limit)
+        found = {item.id: item for item in database.get_items(ids)}
+        items = [found[item_id] for item_id in ids if item_id in found]
+    else:
+        items = database.get_items_page(None, args.limit, args.sort, args.desc)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(QUERY_COLUMNS)
+    for item in items:
+        writer.writerow([getattr(item, column) for column in QUERY_COLUMNS])
+    return 0 if items else 1
+
+
+def command_adjust(args):
+    from tech_cache.commons.database_manager import ItemNotFoundError, StockMovementError
+
+    database = open_database(args)
+    try:
+        if args.batch:
+            with open(args.batch, newline='', encoding='utf-8') as file:
+                movements = [(parse_key(row[0]), int(row[1])) for row in csv.reader(file) if row]
+            count = database.apply_movements(movements,
+                                             allow_negative=args.allow_negative,
+                                             reason=args.reason)
+            print(f"applied {count} movements")
+        else:
+            quantity = database.adjust_quantity(parse_key(args.item),
+                                                args.delta,
+                                                expected_quantity=args.expected,
+                                                allow_negative=args.allow_negative,
+                                                reason=args.reason)
+            print(quantity)
+    except (ItemNotFoundError, StockMovementError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+def command_history(args):
+    from tech_cache.commons.database_manager import ItemNotFoundError
+
+    database = open_database(args)
+    try:
+        if args.at:
+            quantity = database.quantity_at(parse_key(args.item), args.at)
+            print("unknown" if quantity is None else quantity)
+            return 0 if quantity is not None else 1
+        movements = database.get_movements(parse_key(args.item), since=args.since)
+    except ItemNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["created_at", "delta", "reason"])
+    for movement in movements:
+        writer.writerow([movement["created_at"].isoformat(sep=" "), movement["delta"], movement["reason"] or ""])
+    return 0
+
+
+def command_snapshot(args):
+    count = open_database(args).take_snapshot(full=args.full)
+    print(f"{count} items snapshotted")
+    return 0
+
+
+def command_low_stock(args):
+    rows = open_database(args).get_stock_levels(low_only=True)
+    columns = ["sku", "name", "category", "quantity", "threshold"]
+    writer = csv.writer(sys.stdout)
+    writer.writerow(columns)
+    for row in sorted(rows, key=lambda row: (row["quantity"] - row["threshold"], row["sku"])):
+        writer.writerow([row[column] for column in columns])
+    return 0
+
+
+def command_report(args):
+    from tech_cache.commons.reports import ReportEngine
+
+    report = ReportEngine(open_database(args)).report(args.since, args.until, with_turnover=not args.no_turnover)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["category", "items", "quantity", "value", "units_out", "units_in", "turnover"])
+    for category in report.categories + [report.total]:
+        turnover = category.turnover
+        writer.writerow([category.category, category.items, category.quantity, f"{category.value:.2f}",
+                         category.units_out, category.units_in,
+                         f"{turnover:.4f}" if turnover is not None else ""])
+    return 0
+
+
+def command_threshold(args):
+    from tech_cache.commons.database_manager import ItemNotFoundError
+
+    threshold = None if args.threshold.lower() == "none" else int(args.threshold)
+    database = open_database(args)
+    if args.category:
+        count = database.set_category_threshold(args.category, threshold)
+        print(f"{count} items use the threshold of {args.category}")
+        return 0
+    try:
+        database.set_reorder_threshold(parse_key(args.item), threshold)
+    except ItemNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+
+def command_labels(args):
+    from tech_cache.commons.label_manager import LabelManager
+    from tech_cache.models.item import Item
+
+    database = open_database(args)
+    labels = LabelManager(database, cache_dir=args.cache, processes=args.processes)
+    if args.sku:
+        skus = args.sku
+    elif args.search:
+        from tech_cache.commons.search_engine import SearchEngine
+        skus = labels.skus_for_ids(SearchEngine(database).search(args.search))
+    else:
+        skus = labels.skus(Item.category == args.category if args.category else None)
+
+    kinds = ("barcode", "qr") if args.qr else ("barcode",)
+    report = labels.generate(skus, kinds, force=args.force)
+    exported = labels.export(skus, args.output, kinds)
+    print(f"{exported} labels in {args.output}, rendered {report.rendered}, "
+          f"cached {report.cached}, errors {len(report.errors)}")
+    for sku, message in report.errors:
+        print(f"{sku}: {message}", file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+def command_sheets(args):
+    from tech_cache.commons.label_manager import LabelManager
+    from tech_cache.commons.label_sheet import LabelSheetCompositor
+    from tech_cache.models.item import Item
+
+    database = open_database(args)
+    compositor = LabelSheetCompositor(LabelManager(database, cache_dir=args.cache), code=args.code)
+    where = Item.category == args.category if args.category else None
+    report = compositor.write(database.iter_item_rows(["sku", "name"], where=where),
+                              args.output,
+                              args.format)
+    print(f"{report.pages} pages, {report.labels} labels, {report.cached} from cache, "
+          f"errors {len(report.errors)}")
+    for sku, message in report.errors:
+        print(f"{sku}: {message}", file=sys.stderr)
+    return 1 if report.errors else 0
+
+
+def command_serve(args):
+    from tech_cache.rest_service import run
+    run(args.db, args.host, args.port, args.processes)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="tech_cache.cli", description="Tech Cache without the GUI")
+    parser.add_argument("--db",
+                        default=os.environ.get("TECH_CACHE_DB_URL", AppConfig.db_url),
+                        help="database url, defaults to $TECH_CACHE_DB_URL or %(default)s")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("import", help="import items from csv")
+    command.add_argument("file")
+    command.add_argument("--upsert", action="store_true", help="update items with a known sku")
+    command.add_argument("--chunk-size", type=int, default=1000)
+    command.add_argument("-v", "--verbose", action="store_true")
+    command.set_defaults(handler=command_import)
+
+    command = commands.add_parser("export", help="export items to csv")
+    command.add_argument("file")
+    command.add_argument("--columns", help="comma separated item columns")
+    command.add_argument("--category")
+    command.add_argument("--compression", choices=["gzip", "zstd"])
+    command.set_defaults(handler=command_export)
+
+    command = commands.add_parser("query", help="print items as csv")
+    command.add_argument("text", nargs="?", help="search text")
+    command.add_argument("--sku", help="exact sku lookup")
+    command.add_argument("--mode", choices=["fts", "fuzzy", "auto"], default="auto")
+    command.add_argument("--sort", choices=QUERY_COLUMNS, default="id", help="item column to sort a listing by")
+    command.add_argument("--desc", action="store_true")
+    command.add_argument("--limit", type=int, default=50)
+    command.set_defaults(handler=command_query)
+
+    command = commands.add_parser("adjust", help="change stock quantity")
+    command.add_argument("item", nargs="?", help='sku, or "id:<id>" for an item id')
+    command.add_argument("delta", nargs="?", type=int)
+    command.add_argument("--expected", type=int, help="only apply if quantity is still this")
+    command.add_argument("--batch", help="csv file of sku,delta rows applied in one transaction")
+    command.add_argument("--allow-negative", action="store_true")
+    command.add_argument("--reason", help="stored with the movements in the stock ledger")
+    command.set_defaults(handler=command_adjust)
+
+    command = commands.add_parser("history", help="stock movements of an item")
+    command.add_argument("item", help='sku, or "id:<id>" for an item id')
+    command.add_argument("--since", type=parse_time, help="only movements from this UTC date or time on")
+    command.add_argument("--at", type=parse_time, help="print the quantity at this UTC date or time instead")
+    command.set_defaults(handler=command_history)
+
+    command = commands.add_parser("snapshot", help="snapshot stock quantities, e.g. from cron")
+    command.add_argument("--full", action="store_true", help="snapshot every item, not only moved ones")
+    command.set_defaults(handler=command_snapshot)
+
+    command = commands.add_parser("low-stock", help="print items at or below their reorder threshold")
+    command.set_defaults(handler=command_low_stock)
+
+    command = commands.add_parser("report", help="print item count, quantity, value and turnover per category")
+    command.add_argument("--since", type=parse_time, help="only items updated from this UTC date or time on")
+    command.add_argument("--until", type=parse_time, help="only items updated before this UTC date or time")
+    command.add_argument("--no-turnover", action="store_true", help="leave out stock ledger totals")
+    command.set_defaults(handler=command_report)
+
+    command = commands.add_parser("threshold", help="set the reorder threshold of an item or category")
+    command.add_argument("item", nargs="?", help='sku, or "id:<id>" for an item id')
+    command.add_argument("threshold", help='reorder at or below this quantity, "none" removes it')
+    command.add_argument("--category", help="set the threshold of a category instead")
+    command.set_defaults(handler=command_threshold)
+
+    command = commands.add_parser("labels", help="generate barcode labels")
+    command.add_argument("output", help="output directory")
+    command.add_argument("--sku", nargs="+")
+    command.add_argument("--category")
+    command.add_argument("--search", help="items found by a search")
+    command.add_argument("--qr", action="store_true", help="also generate QR codes")
+    command.add_argument("--cache", default="label_cache", help="rendered label cache directory")
+    command.add_argument("--processes", type=int, help="render processes, defaults to CPU count")
+    command.add_argument("--force", action="store_true", help="re-render cached labels")
+    command.set_defaults(handler=command_labels)
+
+    command = commands.add_parser("sheets", help="print sheets of 65 labels per A4 page")
+    command.add_argument("output", help="pdf file, or prefix of png pages")
+    command.add_argument("--format", choices=["pdf", "png"], default="pdf")
+    command.add_argument("--code", choices=["barcode", "qr"], default="barcode")
+    command.add_argument("--category")
+    command.add_argument("--cache", default="label_cache", help="rendered label cache directory")
+    command.set_defaults(handler=command_sheets)
+
+    command = commands.add_parser("serve", help="serve the database as REST/JSON")
+    command.add_argument("--host", default="127.0.0.1")
+    command.add_argument("--port", type=int, default=8080)
+    command.add_argument("--processes", type=int, default=1, help="server processes sharing the port")
+    command.set_defaults(handler=command_serve)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "adjust" and not args.batch and (args.item is None or args.delta is None):
+        parser.error("adjust needs an item and a delta, or --batch")
+    if args.command == "threshold":
+        if args.category and args.item is not None:
+            parser.error("threshold takes an item or --category, not both")
+        if not args.category and args.item is None:
+            parser.error("threshold needs an item or --category")
+        if args.threshold.lower() != "none" and not args.threshold.isdigit():
+            parser.error('threshold must be a whole number or "none"')
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
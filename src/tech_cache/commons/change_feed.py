@@ -0,0 +1,90 @@
+import logging
+import threading
+import time
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.utils.logger_conf import LoggerConfig
+
+
+class ChangeFeed:
+    """Publishes item changes other processes made to a shared database
+
+    Polls the trigger written change log for entries after the last
+    version seen and publishes them through the database's change
+    notifier, so the table model, search, sku index, alerts and reports
+    update only the changed items. A poll with nothing new is one lookup
+    on the log's primary key.
+
+    Changes made through this process' DatabaseManager come back as
+    well, they were already published. They are marked replayed, and
+    listeners apply a change twice without harm.
+
+    Args:
+        interval: seconds between polls
+        keep: change log entries kept when pruning, clients which fall
+            further behind reload everything
+    """
+    # log entries read per query
+    BATCH_SIZE = 10000
+    # seconds between prunings of the log
+    PRUNE_INTERVAL = 3600
+
+    def __init__(self, db_manager: DatabaseManager, interval: float = 1.0, keep: int = 100000):
+        self.db_manager = db_manager
+        self.interval = interval
+        self.keep = keep
+        self.error_logger = logging.getLogger(LoggerConfig.ERROR_LOGGER)
+        # read before anything else, changes while the caller loads
+        # its data are published on the first poll
+        self.version = db_manager.change_version()
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread: threading.Thread | None = None
+        self.pruned_at = 0.0
+
+    def poll(self) -> int:
+        """Publishes changes since the last poll
+
+        Returns: number of changed items
+        """
+        count = 0
+        with self.lock:
+            # a batch at a time, until the log has nothing newer
+            while True:
+                version, changes = self.db_manager.changes_since(self.version, self.BATCH_SIZE)
+                if version == self.version and not changes:
+                    return count
+                self.version = version
+                for change in changes:
+                    self.db_manager.changes.publish(change.kind, change.ids, replayed=True)
+                    count += len(change.ids)
+
+    def prune(self):
+        """Drops old log entries, at most once per PRUNE_INTERVAL"""
+        now = time.monotonic()
+        if self.pruned_at and now - self.pruned_at < self.PRUNE_INTERVAL:
+            return
+        self.pruned_at = now
+        self.db_manager.prune_change_log(self.keep)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.poll()
+                self.prune()
+            except Exception:
+                # e.g. the shared volume is briefly gone, try again later
+                self.error_logger.exception("Polling the change log failed")
+
+    def start(self):
+        """Polls on a daemon thread until stopped"""
+        if self.thread is not None:
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.run, name="change-feed", daemon=True)
+        self.thread.start()
+
+    def stop(self, wait: bool = True):
+        self.stopped.set()
+        if self.thread is not None and wait:
+            self.thread.join()
+        self.thread = None
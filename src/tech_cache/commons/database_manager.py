@@ -1,8 +1,32 @@
-from typing import List
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from sqlalchemy import (DateTime, Integer, String, and_, bindparam, func, insert, inspect, literal, or_,
+                        select, tuple_, update)
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
-from tech_cache.models.item import Base, Item
+from tech_cache.models.category_threshold import CategoryThreshold
+from tech_cache.models.change_log import ChangeLogEntry
+from tech_cache.models.item import Base, Item, utc_now
+from tech_cache.models.item_row import ItemRow
+from tech_cache.models.stock_movement import StockMovement, StockSnapshot
+from tech_cache.commons.backends import get_backend
+from tech_cache.commons.engine_profile import EngineProfile, TUNED, create_profiled_engine
+from tech_cache.commons.item_changes import ChangeKind, ChangeNotifier, ItemChange
+from tech_cache.commons.migrations import UNIQUE_SKU_INDEX, ensure_unique_sku, migrate
+
+class ItemNotFoundError(LookupError):
+    """No item with the given id or sku"""
+
+class StockMovementError(Exception):
+    """A quantity change was rejected and nothing was written"""
+
+class ConcurrentModificationError(StockMovementError):
+    """Item changed since the caller read it"""
+
+class InsufficientStockError(StockMovementError):
+    """Quantity would drop below zero"""
 
 class DatabaseManager:
     """Handles database connection and data persitance
@@ -10,58 +34,836 @@ class DatabaseManager:
     models, so that views can then interpret and draw
     data.
     """
-    def __init__(self, db_url="sqlite:///test.db"):
-        self.engine = create_engine(db_url, echo=True)
+    # ids per statement of bulk operations, below SQLite's bound parameter limit
+    CHUNK_SIZE = 1000
+    # columns bulk_update sets, the same value on every item
+    BULK_COLUMNS = ("name", "category", "specification", "reorder_threshold", "unit_price")
+    # columns update_item sets
+    EDITABLE_COLUMNS = ("sku",) + BULK_COLUMNS + ("quantity",)
+
+    def __init__(self,
+                 db_url="sqlite:///test.db",
+                 unique_sku: bool = False,
+                 profile: EngineProfile | str = TUNED,
+                 snapshot_interval: timedelta | None = timedelta(days=1)):
+        """
+        Args:
+            snapshot_interval: stock snapshots are taken on the first
+                movement after this much time, None only takes them
+                when take_snapshot is called
+        """
+        self.engine = create_profiled_engine(db_url, profile)
+        self.backend = get_backend(self.engine)
         Base.metadata.create_all(self.engine) 
+        migrate(self.engine)
+        if unique_sku:
+            ensure_unique_sku(self.engine)
+        # upserts resolve skus in the database when they are unique
+        self.unique_sku = unique_sku or any(index["name"] == UNIQUE_SKU_INDEX
+                                            for index in inspect(self.engine).get_indexes("items"))
         self.Session = sessionmaker(bind=self.engine)
+        self.changes = ChangeNotifier()
+        self.snapshot_interval = snapshot_interval
+        self.last_snapshot_at = None
 
     def get_session(self):
         return self.Session()
 
+    def subscribe(self, listener):
+        """Registers listener called with ItemChange after each mutation"""
+        self.changes.subscribe(listener)
+
+    def unsubscribe(self, listener):
+        self.changes.unsubscribe(listener)
+
     def get_item(self, item_id:int):
         with self.get_session() as session:
             return session.query(Item).filter(Item.id == item_id).one_or_none()
 
-    def add_item(self, item: Item):
+    def get_item_by_sku(self, sku: str):
+        """First item with given sku, None if there is none"""
+        with self.get_session() as session:
+            return session.query(Item).filter(Item.sku == sku).order_by(Item.id).first()
+
+    def add_item(self, item: Item) -> int:
+        """Stores a new item, returns its id"""
         with self.get_session() as session:
             try:
                 session.add(item)
+                session.flush()
+                item_id = item.id
+                if item.quantity:
+                    session.add(StockMovement(item_id=item_id, delta=item.quantity,
+                                              reason="created", created_at=self.now()))
                 session.commit()
             except SQLAlchemyError as e:
                 session.rollback()
                 raise e
+        self.changes.publish(ChangeKind.INSERTED, [item_id])
+        return item_id
 
-    def update_item(self, item_id: int):
+    def update_item(self,
+                    item_id: int,
+                    changes: Dict,
+                    expected_updated_at: datetime | None = None,
+                    reason: str | None = "edit") -> datetime | None:
+        """Writes changed fields of an item with a single UPDATE
 
-        with self.get_session() as session:
-            try:
-                item = session.query(Item).filter(Item.id == item_id).one_or_none()
-                
-                if item:
-                    session.delete(item)
-                    session.commit()
-                else:
-                    print(f"Item with ID {item_id} not found.")
-            except SQLAlchemyError as e:
-                session.rollback()
-                raise e
+        Only the columns in ``changes`` are set and nothing is read
+        first. With ``expected_updated_at`` the update only applies if
+        nobody changed the item since the caller read it, e.g. on another
+        station sharing the database. A quantity change is added to the
+        stock ledger in the same transaction.
+
+        Args:
+            changes: column name -> new value, of EDITABLE_COLUMNS
+
+        Returns: the item's new updated_at
+        Raises: ItemNotFoundError, ConcurrentModificationError,
+            ValueError for columns which can't be edited or can't be null
+        """
+        unknown = [name for name in changes if name not in self.EDITABLE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columns can't be edited: {', '.join(unknown)}")
+        if not changes:
+            return expected_updated_at
+
+        table = Item.__table__
+        missing = [name for name, value in changes.items() if value is None and not table.c[name].nullable]
+        if missing:
+            raise ValueError(f"Columns can't be null: {', '.join(missing)}")
+        updated_at = self.now()
+        condition = table.c.id == item_id
+        if expected_updated_at is not None:
+            condition = and_(condition, table.c.updated_at == expected_updated_at)
+
+        with self._begin() as connection:
+            if "quantity" in changes:
+                # the delta is taken from the row about to be updated,
+                # under the same condition
+                quantity = changes["quantity"]
+                delta = select(table.c.id,
+                               literal(quantity) - table.c.quantity,
+                               literal(reason, String()),
+                               literal(updated_at, DateTime())
+                               ).where(condition, table.c.quantity != quantity)
+                connection.execute(insert(StockMovement.__table__).from_select(
+                        ["item_id", "delta", "reason", "created_at"], delta))
+            result = connection.execute(update(table).where(condition).values(dict(changes, updated_at=updated_at)))
+            if result.rowcount == 0:
+                if connection.execute(select(table.c.id).where(table.c.id == item_id)).first() is None:
+                    raise ItemNotFoundError(f"No item with id {item_id}")
+                raise ConcurrentModificationError(f"Item {item_id} was changed since it was read")
+            if "quantity" in changes:
+                self._snapshot_if_due(connection, updated_at)
+
+        self.changes.publish(ChangeKind.UPDATED, [item_id])
+        return updated_at
     
-    def delete_item(self, item_id: int):
-        session = self.get_session()
+    def delete_item(self, item_id: int) -> bool:
+        """Deletes an item, its stock ledger stays
+
+        Returns: False if there was no such item
+        """
+        return self.bulk_delete([item_id]) == 1
+
+    def bulk_update(self, item_ids: Iterable[int], changes: Dict) -> int:
+        """Sets the same column values on many items in one transaction
+
+        Runs ``UPDATE items SET ... WHERE id IN (...)`` per chunk of ids,
+        no ORM objects are loaded and listeners hear of one change.
+        Quantities aren't set here, adjust_quantity and apply_movements
+        keep the stock ledger.
+
+        Args:
+            changes: column name -> new value, of BULK_COLUMNS
+
+        Returns: number of updated items
+        Raises: ValueError for columns which can't be bulk updated
+        """
+        unknown = [name for name in changes if name not in self.BULK_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columns can't be bulk updated: {', '.join(unknown)}")
+        item_ids = list(dict.fromkeys(item_ids))
+        if not item_ids or not changes:
+            return 0
+
+        table = Item.__table__
+        statement = update(table).values(dict(changes, updated_at=self.now())).returning(table.c.id)
+        updated_ids = []
+        with self.engine.begin() as connection:
+            for start in range(0, len(item_ids), self.CHUNK_SIZE):
+                chunk = item_ids[start:start + self.CHUNK_SIZE]
+                updated_ids.extend(connection.execute(statement.where(table.c.id.in_(chunk))).scalars())
+        if updated_ids:
+            self.changes.publish(ChangeKind.UPDATED, updated_ids)
+        return len(updated_ids)
+
+    def bulk_delete(self, item_ids: Iterable[int]) -> int:
+        """Deletes many items in one transaction, listeners hear of one change
+
+        Their stock ledger stays, as with delete_item.
+
+        Returns: number of deleted items
+        """
+        item_ids = list(dict.fromkeys(item_ids))
+        if not item_ids:
+            return 0
+
+        table = Item.__table__
+        deleted_ids = []
+        with self.engine.begin() as connection:
+            for start in range(0, len(item_ids), self.CHUNK_SIZE):
+                chunk = item_ids[start:start + self.CHUNK_SIZE]
+                deleted_ids.extend(connection.execute(
+                        table.delete().where(table.c.id.in_(chunk)).returning(table.c.id)).scalars())
+        if deleted_ids:
+            self.changes.publish(ChangeKind.DELETED, deleted_ids)
+        return len(deleted_ids)
+
+    @staticmethod
+    def sort_columns(order_by: str = "id"):
+        """Columns giving a total row order, ties are broken by id"""
+        table_columns = Item.__table__.c
+        if order_by not in table_columns:
+            raise ValueError(f"Unknown item column {order_by!r}")
+        if order_by == "id":
+            return [table_columns.id]
+        return [table_columns[order_by], table_columns.id]
+
+    @staticmethod
+    def item_key(value: str) -> int | str:
+        """Item id of an ``id:<number>`` key, anything else is a sku
+
+        Numeric skus, e.g. barcodes, stay skus.
+        """
+        if value.startswith("id:") and value[3:].isdigit():
+            return int(value[3:])
+        return value
+
+    @staticmethod
+    def sort_key(item: Item | ItemRow, order_by: str = "id") -> Tuple:
+        """Python side key of an item matching sort_columns"""
+        if order_by == "id":
+            return (item.id,)
+        return (getattr(item, order_by), item.id)
+
+    def _ordered(self, query, order_by: str, descending: bool):
+        columns = self.sort_columns(order_by)
+        if descending:
+            return query.order_by(*(column.desc() for column in columns))
+        return query.order_by(*columns)
+
+    def _keyset_filter(self, key: Tuple, order_by: str, descending: bool, after: bool = True):
+        """Rows sorting after (or before) ``key`` in the given order"""
+        columns = tuple_(*self.sort_columns(order_by))
+        if after != descending:
+            return columns > tuple_(*key)
+        return columns < tuple_(*key)
+
+    def get_all_items(self, order_by: str = "id", descending: bool = False) -> List[Item]:
         with self.get_session() as session:
-            try:
-                item = session.query(Item).filter(Item.id == item_id).one_or_none()
-                
-                if item:
-                    session.delete(item)
-                    session.commit()
-                else:
-                    print(f"Item with ID {item_id} not found.")
+            return list(self._ordered(session.query(Item), order_by, descending))
 
-            except SQLAlchemyError as e:
-                session.rollback()
-                raise e
-    
-    def get_all_items(self) -> List[Item]:
+    def get_items(self, item_ids) -> List[Item]:
+        """Items with given ids, missing ids are skipped"""
+        item_ids = list(item_ids)
+        items = []
         with self.get_session() as session:
-            return list(session.query(Item))
+            for start in range(0, len(item_ids), self.CHUNK_SIZE):
+                items.extend(session.query(Item).filter(Item.id.in_(item_ids[start:start + self.CHUNK_SIZE])))
+        return items
+
+    def count_items(self,
+                    before_key: Tuple | None = None,
+                    order_by: str = "id",
+                    descending: bool = False) -> int:
+        """Cheap row count, used for sizing views without loading rows
+
+        With ``before_key`` only items sorting before that key are counted,
+        which is the row position of that key in the given order.
+        """
+        with self.get_session() as session:
+            query = session.query(func.count(Item.id))
+            if before_key is not None:
+                query = query.filter(self._keyset_filter(before_key, order_by, descending, after=False))
+            return query.scalar()
+
+    def get_items_page(self,
+                       after_key: Tuple | None = None,
+                       limit: int = 500,
+                       order_by: str = "id",
+                       descending: bool = False,
+                       where=None) -> List[Item]:
+        """Keyset paging over the items table.
+
+        Returns at most ``limit`` items sorting after ``after_key``, a
+        sort_key tuple of the last item of the previous page. Seeking on
+        an index keeps every page equally cheap, no matter how deep into
+        the table it is. ``where`` optionally filters the items.
+        """
+        with self.get_session() as session:
+            query = session.query(Item)
+            if where is not None:
+                query = query.filter(where)
+            if after_key is not None:
+                query = query.filter(self._keyset_filter(after_key, order_by, descending))
+            return list(self._ordered(query, order_by, descending).limit(limit))
+
+    def get_sort_key_at(self,
+                        offset: int,
+                        order_by: str = "id",
+                        descending: bool = False) -> Tuple | None:
+        """Sort key of the item at row ``offset``, None if out of range.
+
+        Used to recover a page boundary whose keyset key was evicted.
+        """
+        with self.get_session() as session:
+            query = session.query(*self.sort_columns(order_by))
+            row = self._ordered(query, order_by, descending).offset(offset).limit(1).first()
+            return tuple(row) if row is not None else None
+
+    def bulk_add_items(self, rows: List[Dict], upsert: bool = False) -> Tuple[int, int]:
+        """Inserts many items in a single transaction.
+
+        ``rows`` are plain dicts keyed by column name. Rows go to the
+        database in bulk, as one executemany insert or PostgreSQL's COPY,
+        instead of one ORM flush and commit each. With ``upsert`` rows
+        whose sku already exists update that item instead, the last row
+        wins if a sku repeats. With unique skus that is a single
+        INSERT ... ON CONFLICT.
+
+        Returns: (inserted, updated) counts
+        """
+        if upsert:
+            by_sku = {}
+            for row in rows:
+                by_sku[row["sku"]] = row
+            rows = list(by_sku.values())
+
+        inserted_ids = []
+        updated_ids = []
+        now = self.now()
+        with self._begin() as connection:
+            movements = []
+            if upsert and rows and self.unique_sku:
+                for item_id, quantity, old_quantity in self.backend.upsert_items(connection, rows, now):
+                    if old_quantity is None:
+                        inserted_ids.append(item_id)
+                        old_quantity = 0
+                    else:
+                        updated_ids.append(item_id)
+                    if quantity != old_quantity:
+                        movements.append((item_id, quantity - old_quantity))
+                rows = []
+            elif upsert and rows:
+                existing = {sku: (item_id, quantity) for sku, item_id, quantity in connection.execute(
+                    select(Item.sku, Item.id, Item.quantity).where(Item.sku.in_(list(by_sku)))
+                    )}
+                updates = [dict(row, item_id=existing[row["sku"]][0], updated_at=now)
+                           for row in rows if row["sku"] in existing]
+                rows = [row for row in rows if row["sku"] not in existing]
+                if updates:
+                    connection.execute(
+                        update(Item.__table__).where(Item.id == bindparam("item_id")),
+                        updates)
+                    updated_ids = [row["item_id"] for row in updates]
+                    for row in updates:
+                        old_quantity = existing[row["sku"]][1]
+                        if row.get("quantity", old_quantity) != old_quantity:
+                            movements.append((row["item_id"], row["quantity"] - old_quantity))
+
+            if rows:
+                for item_id, quantity in self.backend.insert_items(connection, rows, now):
+                    inserted_ids.append(item_id)
+                    if quantity:
+                        movements.append((item_id, quantity))
+            self._record_movements(connection, movements, "import")
+
+        if inserted_ids:
+            self.changes.publish(ChangeKind.INSERTED, inserted_ids)
+        if updated_ids:
+            self.changes.publish(ChangeKind.UPDATED, updated_ids)
+        return len(inserted_ids), len(updated_ids)
+
+    def iter_item_rows(self,
+                       columns: Sequence[str],
+                       where=None,
+                       batch_size: int = 1000) -> Iterator[Tuple]:
+        """Streams plain column tuples of items in id order.
+
+        Rows are read with a streaming cursor ``batch_size`` at a time and
+        never hydrated into ORM objects, so memory stays flat however big
+        the table is.
+
+        Args:
+            columns: Item column names to read
+            where: optional SQLAlchemy filter clause, e.g.
+                ``Item.category == "Board"``
+        """
+        table_columns = Item.__table__.c
+        unknown = [name for name in columns if name not in table_columns]
+        if unknown:
+            raise ValueError(f"Unknown item columns: {', '.join(unknown)}")
+
+        statement = select(*(table_columns[name] for name in columns)).order_by(Item.id)
+        if where is not None:
+            statement = statement.where(where)
+
+        with self.engine.connect() as connection:
+            result = connection.execution_options(yield_per=batch_size).execute(statement)
+            for partition in result.partitions():
+                yield from partition
+
+    def get_rows(self,
+                 item_ids: Iterable[int] | None = None,
+                 after_key: Tuple | None = None,
+                 limit: int | None = None,
+                 order_by: str = "id",
+                 descending: bool = False) -> List[ItemRow]:
+        """Items as ItemRow tuples, for table models
+
+        All items, or those with given ids, or a keyset page like
+        get_items_page. Rows are built straight from the cursor, no ORM
+        objects are hydrated.
+        """
+        table_columns = Item.__table__.c
+        statement = select(*(table_columns[name] for name in ItemRow._fields))
+        if after_key is not None:
+            statement = statement.where(self._keyset_filter(after_key, order_by, descending))
+        statement = self._ordered(statement, order_by, descending)
+        if limit is not None:
+            statement = statement.limit(limit)
+
+        make = ItemRow._make
+        with self.engine.connect() as connection:
+            if item_ids is None:
+                # a server side cursor on PostgreSQL, psycopg would
+                # otherwise buffer the whole result next to the rows
+                result = connection.execution_options(yield_per=self.CHUNK_SIZE).execute(statement)
+                return [make(row) for partition in result.partitions() for row in partition]
+            item_ids = list(item_ids)
+            rows = []
+            for start in range(0, len(item_ids), self.CHUNK_SIZE):
+                chunk = item_ids[start:start + self.CHUNK_SIZE]
+                rows.extend(map(make, connection.execute(statement.where(table_columns.id.in_(chunk)))))
+            return rows
+
+    def get_item_rows(self,
+                      where=None,
+                      after_key: Tuple | None = None,
+                      limit: int | None = None,
+                      order_by: str = "id",
+                      descending: bool = False) -> List[Dict]:
+        """Items as plain column mappings, keyset paged like get_items_page
+
+        Skips ORM hydration, for callers which only serialize the items.
+        """
+        statement = select(Item.__table__)
+        if where is not None:
+            statement = statement.where(where)
+        if after_key is not None:
+            statement = statement.where(self._keyset_filter(after_key, order_by, descending))
+        statement = self._ordered(statement, order_by, descending)
+        if limit is not None:
+            statement = statement.limit(limit)
+        with self.engine.connect() as connection:
+            return list(connection.execute(statement).mappings())
+
+    def _resolve_ids(self, connection, keys) -> Dict:
+        """Maps ids and skus to (item id, quantity), a sku maps to its first item
+
+        Raises: ItemNotFoundError for unknown keys
+        """
+        table = Item.__table__
+        resolved = {}
+        ids = {key for key in keys if isinstance(key, int)}
+        skus = {key for key in keys if isinstance(key, str)}
+        if ids:
+            found = connection.execute(
+                    select(table.c.id, table.c.quantity).where(table.c.id.in_(ids)))
+            resolved.update((item_id, (item_id, quantity)) for item_id, quantity in found)
+        if skus:
+            first_ids = (select(func.min(table.c.id))
+                         .where(table.c.sku.in_(skus))
+                         .group_by(table.c.sku))
+            found = connection.execute(
+                    select(table.c.sku, table.c.id, table.c.quantity).where(table.c.id.in_(first_ids)))
+            resolved.update((sku, (item_id, quantity)) for sku, item_id, quantity in found)
+
+        missing = [key for key in keys if key not in resolved]
+        if missing:
+            raise ItemNotFoundError(f"No items for {', '.join(map(str, missing))}")
+        return resolved
+
+    @staticmethod
+    def _adjust_statement(allow_negative: bool):
+        """UPDATE adding :delta to item :item_id at :now, guarded by optional :expected"""
+        table = Item.__table__
+        statement = (update(table)
+                     .where(table.c.id == bindparam("item_id"))
+                     .where(or_(bindparam("expected", type_=Integer).is_(None),
+                                table.c.quantity == bindparam("expected")))
+                     .values(quantity=table.c.quantity + bindparam("delta", type_=Integer),
+                             updated_at=bindparam("now", type_=DateTime)))
+        if not allow_negative:
+            statement = statement.where(table.c.quantity + bindparam("delta") >= 0)
+        return statement
+
+    @staticmethod
+    def _rejection(params: List[Dict], quantities: Dict, allow_negative: bool) -> StockMovementError:
+        """Explains why guarded quantity updates didn't all apply
+
+        Replays the movements against the quantities read before them.
+        """
+        quantities = dict(quantities)
+        for param in params:
+            item_id, delta, expected = param["item_id"], param["delta"], param["expected"]
+            current = quantities[item_id]
+            if expected is not None and current != expected:
+                return ConcurrentModificationError(
+                        f"Item {item_id} quantity is {current}, expected {expected}")
+            if not allow_negative and current + delta < 0:
+                return InsufficientStockError(f"Item {item_id} has {current}, can't apply {delta}")
+            quantities[item_id] = current + delta
+        return ConcurrentModificationError("Stock changed while applying movements")
+
+    @staticmethod
+    def now() -> datetime:
+        """Naive UTC like the database's CURRENT_TIMESTAMP, with microseconds"""
+        return utc_now()
+
+    def _record_movements(self, connection, movements: List[Tuple], reason: str | None):
+        """Appends (item id, delta) rows to the ledger in the caller's transaction"""
+        movements = [(item_id, delta) for item_id, delta in movements if delta]
+        if not movements:
+            return
+        created_at = self.now()
+        connection.execute(insert(StockMovement.__table__),
+                           [{"item_id": item_id, "delta": delta, "reason": reason, "created_at": created_at}
+                            for item_id, delta in movements])
+        self._snapshot_if_due(connection, created_at)
+
+    @contextmanager
+    def _begin(self):
+        """engine.begin() of writes which may take a snapshot
+
+        A snapshot only counts as taken once its transaction committed,
+        a rolled back one is taken again on the next movement.
+        """
+        with self.engine.connect() as connection:
+            try:
+                with connection.begin():
+                    yield connection
+            finally:
+                # info belongs to the pooled DBAPI connection
+                taken_at = connection.info.pop("snapshot_taken_at", None)
+        if taken_at is not None:
+            self.last_snapshot_at = taken_at
+
+    def _snapshot_if_due(self, connection, now: datetime):
+        """Takes a snapshot once snapshot_interval passed since the last one"""
+        if self.snapshot_interval is not None:
+            if self.last_snapshot_at is None:
+                self.last_snapshot_at = connection.execute(
+                        select(func.max(StockSnapshot.taken_at))).scalar() or datetime.min
+            if now - self.last_snapshot_at >= self.snapshot_interval:
+                self._take_snapshot(connection, now, full=False)
+
+    def _take_snapshot(self, connection, taken_at: datetime, full: bool) -> int:
+        movements = StockMovement.__table__
+        snapshots = StockSnapshot.__table__
+        items = Item.__table__
+        # movements up to here are counted in the quantities read below,
+        # the surrounding write transaction keeps both consistent
+        last_id = connection.execute(select(func.max(movements.c.id))).scalar() or 0
+        statement = select(items.c.id, items.c.quantity, literal(last_id), literal(taken_at, StockSnapshot.taken_at.type))
+        if not full:
+            covered = connection.execute(select(func.max(snapshots.c.movement_id))).scalar() or 0
+            statement = statement.where(items.c.id.in_(
+                    select(movements.c.item_id).where(movements.c.id > covered).distinct()))
+        # SQLAlchemy only promises the rowcount of UPDATE and DELETE,
+        # psycopg's INSERT reports -1 without preserve_rowcount
+        count = connection.execute(insert(snapshots).from_select(
+                ["item_id", "quantity", "movement_id", "taken_at"], statement
+                ).execution_options(preserve_rowcount=True)).rowcount
+        # last_snapshot_at follows once _begin committed
+        connection.info["snapshot_taken_at"] = taken_at
+        return count
+
+    def take_snapshot(self, full: bool = False) -> int:
+        """Materializes current quantities, the base of quantity_at
+
+        Only items which moved since the previous snapshot get a new one,
+        their older snapshots stay valid for the others. ``full``
+        snapshots every item.
+
+        Returns: number of items snapshotted
+        """
+        with self._begin() as connection:
+            return self._take_snapshot(connection, self.now(), full)
+
+    def _ledger_item_id(self, sku_or_id: int | str) -> int:
+        """Ids are taken as they are, items may be deleted since"""
+        if isinstance(sku_or_id, int):
+            return sku_or_id
+        with self.engine.connect() as connection:
+            return self._resolve_ids(connection, [sku_or_id])[sku_or_id][0]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _quantity_at_statements():
+        """Built once, quantity_at is called for every item of a report"""
+        movements = StockMovement.__table__
+        snapshots = StockSnapshot.__table__
+        when = bindparam("when", type_=StockSnapshot.taken_at.type)
+        snapshot = (select(snapshots.c.quantity, snapshots.c.movement_id)
+                    .where(snapshots.c.item_id == bindparam("item_id"), snapshots.c.taken_at <= when)
+                    .order_by(snapshots.c.taken_at.desc(), snapshots.c.id.desc())
+                    .limit(1))
+        delta = (select(func.count(), func.coalesce(func.sum(movements.c.delta), 0))
+                 .where(movements.c.item_id == bindparam("item_id"),
+                        movements.c.id > bindparam("after_id"),
+                        movements.c.created_at <= when))
+        return snapshot, delta
+
+    def quantity_at(self, sku_or_id: int | str, when: datetime) -> int | None:
+        """Quantity of an item at a (naive UTC) point in time
+
+        The latest snapshot taken until then plus the movements after it,
+        so only movements since one snapshot are summed.
+
+        Returns: None if the ledger knows nothing of the item by then
+        Raises: ItemNotFoundError for unknown skus
+        """
+        snapshot_statement, delta_statement = self._quantity_at_statements()
+        params = {"item_id": self._ledger_item_id(sku_or_id), "when": when}
+        with self.engine.connect() as connection:
+            snapshot = connection.execute(snapshot_statement, params).first()
+            quantity, params["after_id"] = snapshot if snapshot else (None, 0)
+            count, delta = connection.execute(delta_statement, params).one()
+        if quantity is None:
+            return delta if count else None
+        return quantity + delta
+
+    def get_movements(self,
+                      sku_or_id: int | str,
+                      since: datetime | None = None,
+                      until: datetime | None = None) -> List[Dict]:
+        """Ledger rows of an item, oldest first
+
+        Raises: ItemNotFoundError for unknown skus
+        """
+        movements = StockMovement.__table__
+        statement = (select(movements)
+                     .where(movements.c.item_id == self._ledger_item_id(sku_or_id))
+                     .order_by(movements.c.id))
+        if since is not None:
+            statement = statement.where(movements.c.created_at >= since)
+        if until is not None:
+            statement = statement.where(movements.c.created_at <= until)
+        with self.engine.connect() as connection:
+            return list(connection.execute(statement).mappings())
+
+    def adjust_quantity(self,
+                        sku_or_id: int | str,
+                        delta: int,
+                        expected_quantity: int | None = None,
+                        allow_negative: bool = False,
+                        reason: str | None = None) -> int:
+        """Atomically adds ``delta`` to an item's quantity.
+
+        Runs as a single ``UPDATE items SET quantity = quantity + ?``, so
+        concurrent movements never overwrite each other and no ORM object
+        is loaded. Passing ``expected_quantity`` makes the update
+        optimistic, it only applies if nobody changed the quantity since
+        the caller read it. The movement is added to the stock ledger in
+        the same transaction.
+
+        Returns: new quantity
+        Raises: ItemNotFoundError, ConcurrentModificationError,
+            InsufficientStockError
+        """
+        with self._begin() as connection:
+            item_id, quantity = self._resolve_ids(connection, [sku_or_id])[sku_or_id]
+            param = {"item_id": item_id, "delta": delta, "expected": expected_quantity, "now": self.now()}
+            new_quantity = connection.execute(
+                    self._adjust_statement(allow_negative).returning(Item.quantity), param
+                    ).scalar()
+            if new_quantity is None:
+                raise self._rejection([param], {item_id: quantity}, allow_negative)
+            self._record_movements(connection, [(item_id, delta)], reason)
+
+        self.changes.publish(ChangeKind.UPDATED, [item_id])
+        return new_quantity
+
+    def apply_movements(self,
+                        movements: Iterable[Tuple],
+                        allow_negative: bool = False,
+                        reason: str | None = None) -> int:
+        """Applies many quantity changes in one transaction.
+
+        Args:
+            movements: ``(sku_or_id, delta)`` or
+                ``(sku_or_id, delta, expected_quantity)`` tuples
+
+        All movements run as one executemany of the atomic update and one
+        of the ledger insert. If any of them is rejected the whole batch
+        is rolled back.
+
+        Returns: number of applied movements
+        Raises: ItemNotFoundError, ConcurrentModificationError,
+            InsufficientStockError
+        """
+        movements = [tuple(movement) + (None,) * (3 - len(movement)) for movement in movements]
+        if not movements:
+            return 0
+
+        with self._begin() as connection:
+            resolved = self._resolve_ids(connection, [key for key, _, _ in movements])
+            now = self.now()
+            params = [{"item_id": resolved[key][0], "delta": delta, "expected": expected, "now": now}
+                      for key, delta, expected in movements]
+            result = connection.execute(self._adjust_statement(allow_negative), params)
+            if result.rowcount != len(params):
+                raise self._rejection(params, dict(resolved.values()), allow_negative)
+            self._record_movements(connection, [(param["item_id"], param["delta"]) for param in params],
+                                   reason)
+
+        self.changes.publish(ChangeKind.UPDATED, sorted({param["item_id"] for param in params}))
+        return len(params)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _stock_levels_statement(by_ids: bool, low_only: bool):
+        """Built once, the low stock monitor runs it after every change"""
+        items = Item.__table__
+        categories = CategoryThreshold.__table__
+        threshold = func.coalesce(items.c.reorder_threshold, categories.c.threshold)
+        statement = (select(items.c.id, items.c.sku, items.c.name, items.c.category, items.c.quantity,
+                            threshold.label("threshold"))
+                     .select_from(items.outerjoin(categories, categories.c.category == items.c.category))
+                     .order_by(items.c.id))
+        if by_ids:
+            statement = statement.where(items.c.id.in_(bindparam("item_ids", expanding=True)))
+        if low_only:
+            statement = statement.where(items.c.quantity <= threshold)
+        return statement
+
+    def get_stock_levels(self, item_ids: Sequence[int] | None = None, low_only: bool = False) -> List[Dict]:
+        """Quantities of items next to their reorder threshold
+
+        The threshold is the item's own, else its category's, else None.
+
+        Args:
+            item_ids: only these items
+            low_only: only items at or below their threshold
+        """
+        statement = self._stock_levels_statement(item_ids is not None, low_only)
+        params = {"item_ids": list(item_ids)} if item_ids is not None else {}
+        with self.engine.connect() as connection:
+            return list(connection.execute(statement, params).mappings())
+
+    def set_reorder_threshold(self, sku_or_id: int | str, threshold: int | None) -> int:
+        """Sets an item's own threshold, None falls back to its category's
+
+        Returns: id of the item
+        Raises: ItemNotFoundError
+        """
+        with self.engine.begin() as connection:
+            item_id = self._resolve_ids(connection, [sku_or_id])[sku_or_id][0]
+            connection.execute(update(Item.__table__)
+                               .where(Item.id == item_id)
+                               .values(reorder_threshold=threshold, updated_at=self.now()))
+        self.changes.publish(ChangeKind.UPDATED, [item_id])
+        return item_id
+
+    def set_category_threshold(self, category: str, threshold: int | None) -> int:
+        """Sets the threshold of a category's items, None removes it
+
+        Items with their own threshold keep it. Those using the category's
+        are published as updated, their threshold changed.
+
+        Returns: number of affected items
+        """
+        categories = CategoryThreshold.__table__
+        with self.engine.begin() as connection:
+            connection.execute(categories.delete().where(categories.c.category == category))
+            if threshold is not None:
+                connection.execute(insert(categories), {"category": category, "threshold": threshold})
+            affected = select(Item.id).where(Item.category == category, Item.reorder_threshold.is_(None))
+            item_ids = list(connection.execute(affected).scalars())
+            # the item rows don't change, their triggers don't log them
+            self.backend.lock_change_log(connection)
+            connection.execute(insert(ChangeLogEntry.__table__).from_select(
+                    ["item_id", "kind"], affected.add_columns(literal(ChangeKind.UPDATED.value))))
+        if item_ids:
+            self.changes.publish(ChangeKind.UPDATED, item_ids)
+        return len(item_ids)
+
+    def get_category_thresholds(self) -> Dict[str, int]:
+        with self.engine.connect() as connection:
+            return dict(connection.execute(select(CategoryThreshold.category, CategoryThreshold.threshold)).all())
+
+    def change_version(self) -> int:
+        """Version of the newest change log entry, 0 before the first change"""
+        with self.engine.connect() as connection:
+            return connection.execute(select(func.max(ChangeLogEntry.version))).scalar() or 0
+
+    def changes_since(self, version: int, limit: int = 10000) -> Tuple[int, List[ItemChange]]:
+        """Item changes logged after version, by any process
+
+        Entries of one item are merged into its latest state, an item
+        inserted and then updated is reported as inserted. Deletions come
+        first, then insertions, then updates. A version older than the
+        pruned log, or newer than the log, e.g. of a replaced database
+        file, gets a single RESET.
+
+        Args:
+            limit: entries read per call, call again while the returned
+                version moves on
+
+        Returns: version of the last entry read and the changes
+        """
+        log = ChangeLogEntry.__table__
+        with self.engine.connect() as connection:
+            # separate subqueries, SQLite only seeks the index for a lone min or max
+            oldest, newest = connection.execute(select(select(func.min(log.c.version)).scalar_subquery(),
+                                                       select(func.max(log.c.version)).scalar_subquery())).one()
+            if newest is None:
+                if version:
+                    return 0, [ItemChange(ChangeKind.RESET, replayed=True)]
+                return 0, []
+            if version > newest or version < oldest - 1:
+                return newest, [ItemChange(ChangeKind.RESET, replayed=True)]
+            rows = connection.execute(select(log.c.version, log.c.item_id, log.c.kind)
+                                      .where(log.c.version > version)
+                                      .order_by(log.c.version)
+                                      .limit(limit)).all()
+        if not rows:
+            return version, []
+
+        kinds: Dict[int, str] = {}
+        for _, item_id, kind in rows:
+            if kinds.get(item_id) != ChangeKind.INSERTED.value or kind == ChangeKind.DELETED.value:
+                kinds[item_id] = kind
+        changes = []
+        for kind in (ChangeKind.DELETED, ChangeKind.INSERTED, ChangeKind.UPDATED):
+            ids = [item_id for item_id, logged in kinds.items() if logged == kind.value]
+            if ids:
+                changes.append(ItemChange(kind, tuple(ids), replayed=True))
+        return rows[-1][0], changes
+
+    def prune_change_log(self, keep: int = 100000) -> int:
+        """Deletes all but the newest keep entries of the change log
+
+        Clients further behind than that reload everything.
+
+        Returns: number of deleted entries
+        """
+        log = ChangeLogEntry.__table__
+        with self.engine.begin() as connection:
+            newest = connection.execute(select(func.max(log.c.version))).scalar()
+            if newest is None:
+                return 0
+            return connection.execute(log.delete().where(log.c.version <= newest - keep)).rowcount
@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import StaticPool
+
+
+@dataclass(frozen=True)
+class EngineProfile:
+    """Engine settings for DatabaseManager
+
+    SQLite pragmas are applied to every new pooled connection. None
+    leaves SQLite's own default in place.
+    """
+    name: str
+    journal_mode: str | None = None
+    synchronous: str | None = None
+    # negative values are KiB, positive values pages
+    cache_size: int | None = None
+    mmap_size: int | None = None
+    temp_store: str | None = None
+    # milliseconds a writer waits for a lock before failing
+    busy_timeout: int | None = None
+    pool_size: int = 5
+    max_overflow: int = 10
+    # seconds before a server connection is replaced, -1 never
+    pool_recycle: int = -1
+    echo: bool = False
+
+    def pragmas(self):
+        values = {"journal_mode": self.journal_mode,
+                  "synchronous": self.synchronous,
+                  "cache_size": self.cache_size,
+                  "mmap_size": self.mmap_size,
+                  "temp_store": self.temp_store,
+                  "busy_timeout": self.busy_timeout,
+                  }
+        return {name: value for name, value in values.items() if value is not None}
+
+
+# plain SQLite, rollback journal and synchronous=FULL
+DEFAULT = EngineProfile("default")
+
+# WAL lets readers run next to a writer, synchronous=NORMAL only syncs
+# on checkpoints which is still durable against application crashes
+TUNED = EngineProfile("tuned",
+                      journal_mode="WAL",
+                      synchronous="NORMAL",
+                      cache_size=-64000,
+                      mmap_size=256 * 1024 * 1024,
+                      temp_store="MEMORY",
+                      busy_timeout=5000,
+                      pool_size=8,
+                      pool_recycle=1800,
+                      )
+
+PROFILES = {profile.name: profile for profile in (DEFAULT, TUNED)}
+
+
+def get_profile(profile: EngineProfile | str) -> EngineProfile:
+    if isinstance(profile, EngineProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown engine profile {profile!r}, pick one of {', '.join(PROFILES)}")
+
+
+def create_profiled_engine(db_url: str, profile: EngineProfile | str = TUNED) -> Engine:
+    """Creates an engine with the pool and connection pragmas of a profile"""
+    profile = get_profile(profile)
+    url = make_url(db_url)
+    if url.get_backend_name() != "sqlite":
+        # a database server drops idle connections, check them out fresh
+        # and store timestamps in UTC like SQLite does
+        connect_args = {"options": "-c timezone=utc"} if url.get_backend_name() == "postgresql" else {}
+        return create_engine(url,
+                             echo=profile.echo,
+                             pool_size=profile.pool_size,
+                             max_overflow=profile.max_overflow,
+                             pool_pre_ping=True,
+                             pool_recycle=profile.pool_recycle,
+                             connect_args=connect_args)
+
+    if url.database in (None, "", ":memory:"):
+        # an in-memory database lives in a single connection, share it
+        # between threads instead of giving each thread an empty database
+        engine = create_engine(url,
+                               echo=profile.echo,
+                               poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(url,
+                               echo=profile.echo,
+                               pool_size=profile.pool_size,
+                               max_overflow=profile.max_overflow)
+
+    pragmas = profile.pragmas()
+    if pragmas:
+        @event.listens_for(engine, "connect")
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for name, value in pragmas.items():
+                # pragma values can't be bound parameters
+                cursor.execute(f"PRAGMA {name} = {value}")
+            cursor.close()
+
+    return engine
@@ -1,9 +1,38 @@
 
 import csv
+import gzip
+import io
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence
+from sqlalchemy.exc import SQLAlchemyError
 from tech_cache.commons.database_manager import DatabaseManager
-from tech_cache.models.item import Item
+
+@dataclass
+class RowError:
+    """Import problem on a given csv line"""
+    line: int
+    message: str
+
+@dataclass
+class ImportReport:
+    """Running totals of a csv import"""
+    rows_read: int = 0
+    inserted: int = 0
+    updated: int = 0
+    errors: List[RowError] = field(default_factory=list)
 
 class ExportManager:
+    # header written for each exportable column, import lowercases them
+    # and joins words with underscores back into column names
+    COLUMN_HEADERS = {'sku': 'SKU',
+                      'name': 'Name',
+                      'category': 'Category',
+                      'quantity': 'Quantity',
+                      'specification': 'specification',
+                      'unit_price': 'Unit Price',
+                      }
+    COMPRESSIONS = (None, 'gzip', 'zstd')
+
     def __init__(self, db_manager: DatabaseManager) -> None:
         # parent type Any to remove annoying warnings, as parent can be any...
         self.db_manager = db_manager
@@ -13,31 +42,133 @@ class ExportManager:
             self.save_data_as_csv(file_name)
 
     def save_data_as_csv(self, file_name):
-        with open(f'{file_name}.csv', 'w', newline='', encoding='utf-8') as file:
+        self.export_csv(f'{file_name}.csv')
+
+    def export_csv(self,
+                   file_name,
+                   columns: Sequence[str] | None = None,
+                   where=None,
+                   compression: str | None = None,
+                   ) -> int:
+        """Streams items to a csv file
+
+        Rows are read as plain tuples with a streaming cursor and written
+        as they arrive, so exports of any size run in bounded memory.
+
+        Args:
+            columns: item columns to export, all display columns by default
+            where: optional SQLAlchemy filter clause on Item
+            compression: None, 'gzip' or 'zstd'
+
+        Returns: number of exported rows
+        """
+        columns = list(columns or self.COLUMN_HEADERS)
+        rows = 0
+        with self.open_output(file_name, compression) as file:
             writer = csv.writer(file, quoting=csv.QUOTE_ALL)
-            # write headers
-            writer.writerow(['SKU',
-                             'Name', 
-                             'Category',
-                             'Quantity',
-                             'specification',
-                             ])
-            # write row, from all fields
-            for item in self.db_manager.get_all_items():
-                writer.writerow(item.get_fields())
-
-    def import_as_csv(self, file_name):
+            writer.writerow([self.COLUMN_HEADERS.get(column, column) for column in columns])
+            for row in self.db_manager.iter_item_rows(columns, where=where):
+                writer.writerow(row)
+                rows += 1
+        return rows
+
+    def open_output(self, file_name, compression: str | None = None):
+        """Opens text stream for csv writing, compressing on the fly"""
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}")
+
+        if compression == 'gzip':
+            return gzip.open(file_name, 'wt', newline='', encoding='utf-8')
+
+        if compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("zstd export needs the zstandard package")
+            raw = open(file_name, 'wb')
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+            return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+        return open(file_name, 'w', newline='', encoding='utf-8')
+
+    @staticmethod
+    def parse_row(row: Dict) -> Dict:
+        """Converts a csv row to item column values
+
+        Raises: ValueError if quantity isn't a whole number or the
+            unit price isn't a number
+        """
+        quantity = (row.get('quantity') or '0').strip()
+        try:
+            quantity = int(quantity)
+        except ValueError:
+            raise ValueError(f"Quantity {quantity!r} is not a whole number")
+
+        values = {'sku': row.get('sku') or '',
+                  'name': row.get('name') or '',
+                  'category': row.get('category') or '',
+                  'quantity': quantity,
+                  'specification': row.get('specification'),
+                  }
+        # left out unless the file has the column, an upsert keeps the price
+        if 'unit_price' in row:
+            unit_price = (row['unit_price'] or '').strip()
+            try:
+                values['unit_price'] = float(unit_price) if unit_price else None
+            except ValueError:
+                raise ValueError(f"Unit price {unit_price!r} is not a number")
+        return values
+
+    def import_as_csv(self,
+                      file_name,
+                      chunk_size: int = 1000,
+                      upsert: bool = False,
+                      progress: Callable[[ImportReport], None] | None = None,
+                      ) -> ImportReport:
+        """Streams a csv file into the database in chunks
+
+        Each chunk is written with a single bulk insert, COPY on
+        PostgreSQL, in its own transaction. Rows which can't be parsed, or whole chunks which
+        the database rejects, end up in the report errors and the import
+        carries on. With ``upsert`` rows with a known sku update that item.
+
+        Args:
+            progress: called with the running report after each chunk
+        """
+        report = ImportReport()
         with open(file_name, 'r', encoding='utf-8') as file:
-            headers = [header.lower() for header in next(csv.reader(file))]
+            headers = [header.strip().lower().replace(' ', '_') for header in next(csv.reader(file))]
 
             reader = csv.DictReader(file, fieldnames=headers)
+            chunk = []
+            first_line = 2
             for row in reader:
-                new_item = Item(sku = row.get('sku'),
-                                name = row.get('name'),
-                                category = row.get('category'),
-                                quantity = row.get('quantity'),
-                                specification = row.get('specification')
-                                )
-                self.db_manager.add_item(new_item)
-
-        # raise NotImplementedError("Import doesn't yet work!")
+                report.rows_read += 1
+                try:
+                    chunk.append(self.parse_row(row))
+                except ValueError as e:
+                    # header line was read before the DictReader
+                    report.errors.append(RowError(reader.line_num + 1, str(e)))
+
+                if len(chunk) >= chunk_size:
+                    self._write_chunk(chunk, upsert, report, first_line, reader.line_num + 1)
+                    chunk = []
+                    first_line = reader.line_num + 2
+                    if progress:
+                        progress(report)
+
+            if chunk:
+                self._write_chunk(chunk, upsert, report, first_line, reader.line_num + 1)
+            if progress:
+                progress(report)
+
+        return report
+
+    def _write_chunk(self, chunk, upsert, report, first_line, last_line):
+        try:
+            inserted, updated = self.db_manager.bulk_add_items(chunk, upsert=upsert)
+            report.inserted += inserted
+            report.updated += updated
+        except SQLAlchemyError as e:
+            report.errors.append(RowError(first_line,
+                                          f"Lines {first_line}-{last_line} not imported: {e}"))
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, List, Tuple
+
+
+class ChangeKind(Enum):
+    INSERTED = "inserted"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    # too many or unknown rows changed, listeners should reload
+    RESET = "reset"
+
+
+@dataclass(frozen=True)
+class ItemChange:
+    """Describes which item rows a database mutation touched"""
+    kind: ChangeKind
+    ids: Tuple[int, ...] = ()
+    # read back from the change log, this process may have applied it
+    replayed: bool = False
+
+
+class ChangeNotifier:
+    """Minimal publish/subscribe hub for item changes
+
+    Listeners are called synchronously in the thread which did the
+    mutation, so GUI listeners have to hop over to their own thread.
+    """
+    def __init__(self) -> None:
+        self.listeners: List[Callable[[ItemChange], None]] = []
+
+    def subscribe(self, listener: Callable[[ItemChange], None]):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[ItemChange], None]):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def publish(self, kind: ChangeKind, ids=(), replayed: bool = False):
+        change = ItemChange(kind, tuple(ids), replayed)
+        for listener in list(self.listeners):
+            listener(change)
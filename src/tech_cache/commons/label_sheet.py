@@ -0,0 +1,320 @@
+import io
+import os
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Tuple
+from tech_cache.commons.label_manager import LabelManager, write_atomic
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """Label positions on a page, in millimetres
+
+    Defaults are A4 sheets of 65 labels, 5 columns by 13 rows of
+    38.1 x 21.2 mm (e.g. Avery L7651).
+    """
+    page_width: float = 210.0
+    page_height: float = 297.0
+    columns: int = 5
+    rows: int = 13
+    label_width: float = 38.1
+    label_height: float = 21.2
+    margin_left: float = 4.75
+    margin_top: float = 10.7
+    pitch_x: float = 40.6
+    pitch_y: float = 21.2
+    # space kept free inside each label
+    padding: float = 1.5
+    dpi: int = 300
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+    def px(self, millimetres: float) -> int:
+        return round(millimetres / 25.4 * self.dpi)
+
+    def key(self) -> str:
+        return f"{self.label_width}x{self.label_height};{self.padding};{self.dpi}"
+
+
+@dataclass
+class SheetReport:
+    pages: int = 0
+    labels: int = 0
+    # tiles read from the label cache instead of drawn
+    cached: int = 0
+    # (sku, message) of labels which couldn't be drawn, their place on
+    # the sheet shows the sku and the error instead
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+
+class PdfPageWriter:
+    """Writes black and white page images into a PDF as they come
+
+    Every page is written to the file right away, only object offsets are
+    kept, so memory doesn't grow with the page count. Pillow's own PDF
+    writer either holds every page or re-parses the file on each append.
+    """
+    def __init__(self, path: str, page_width: float, page_height: float):
+        self.file = open(path, "wb")
+        # page size in points
+        self.width = page_width / 25.4 * 72
+        self.height = page_height / 25.4 * 72
+        self.offsets = {}
+        self.pages = []
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # 1 is the catalog, 2 the page tree, written on close
+        self.next_id = 3
+
+    def write_object(self, object_id: int, body: bytes, stream: bytes | None = None):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(f"{object_id} 0 obj\n".encode() + body)
+        if stream is not None:
+            self.file.write(b"\nstream\n" + stream + b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def add_page(self, image):
+        """Adds a mode "1" image scaled to the whole page"""
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+
+        # mode "1" rows are packed bits, 1 is white like in DeviceGray
+        data = zlib.compress(image.tobytes(), 6)
+        self.write_object(image_id,
+                          f"<< /Type /XObject /Subtype /Image /Width {image.width} "
+                          f"/Height {image.height} /ColorSpace /DeviceGray /BitsPerComponent 1 "
+                          f"/Filter /FlateDecode /Length {len(data)} >>".encode(),
+                          data)
+        content = f"q {self.width:.2f} 0 0 {self.height:.2f} 0 0 cm /Im0 Do Q".encode()
+        self.write_object(content_id, f"<< /Length {len(content)} >>".encode(), content)
+        self.write_object(page_id,
+                          f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.width:.2f} "
+                          f"{self.height:.2f}] /Resources << /XObject << /Im0 {image_id} 0 R >> >> "
+                          f"/Contents {content_id} 0 R >>".encode())
+        self.pages.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.pages)
+        self.write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self.write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode())
+
+        xref = self.file.tell()
+        self.file.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode())
+        for object_id in range(1, self.next_id):
+            self.file.write(f"{self.offsets[object_id]:010d} 00000 n \n".encode())
+        self.file.write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\n"
+                        f"startxref\n{xref}\n%%EOF\n".encode())
+        self.file.close()
+
+
+class LabelSheetCompositor:
+    """Tiles item labels onto printable pages and streams them to disk
+
+    Each label shows the item's code, sku and name. Label tiles are
+    bitmaps kept in the LabelManager cache, keyed by sku, name, code kind
+    and label size, so reprinting only reads them. QR tiles reuse the
+    cached QR renders. Only one page is held in memory at a time.
+
+    Args:
+        code: "barcode" or "qr"
+    """
+    CODES = ("barcode", "qr")
+
+    def __init__(self, label_manager: LabelManager, layout: SheetLayout = SheetLayout(), code: str = "barcode"):
+        if code not in self.CODES:
+            raise ValueError(f"Unknown label code {code!r}")
+        self.label_manager = label_manager
+        self.layout = layout
+        self.code = code
+        self.fonts = None
+
+    def font(self, points: float):
+        from PIL import ImageFont
+
+        if self.fonts is None:
+            self.fonts = {}
+        if points not in self.fonts:
+            size = round(points / 72 * self.layout.dpi)
+            try:
+                self.fonts[points] = ImageFont.load_default(size)
+            except (TypeError, ImportError):
+                # Pillow without FreeType only has a fixed size font
+                self.fonts[points] = ImageFont.load_default()
+        return self.fonts[points]
+
+    @staticmethod
+    def fit_text(draw, text: str, font, width: int) -> str:
+        """Cuts text with an ellipsis so it fits width pixels"""
+        if draw.textlength(text, font=font) <= width:
+            return text
+        while text and draw.textlength(text + "…", font=font) > width:
+            text = text[:-1]
+        return text + "…"
+
+    def tile_path(self, sku: str, name: str) -> str:
+        variant = f"{name}\0{self.layout.key()}"
+        if self.code == "qr":
+            variant += "\0" + self.label_manager.settings.key("qr")
+        return self.label_manager.cache_path(f"tile-{self.code}", sku,
+                                             variant=variant,
+                                             extension=".png")
+
+    def render_tile(self, sku: str, name: str):
+        """Draws one label as a mode "1" image
+
+        Raises: ValueError if the sku's barcode is wider than the label
+            at one pixel per module, OSError if its QR render is missing
+        """
+        from PIL import Image, ImageDraw
+
+        layout = self.layout
+        width, height = layout.px(layout.label_width), layout.px(layout.label_height)
+        padding = layout.px(layout.padding)
+        tile = Image.new("1", (width, height), 1)
+        draw = ImageDraw.Draw(tile)
+        sku_font, name_font = self.font(8), self.font(6.5)
+        sku_height = sku_font.getbbox("Ag")[3]
+        name_height = name_font.getbbox("Ag")[3]
+
+        if self.code == "qr":
+            # the cached QR render, scaled to the label height
+            side = height - 2 * padding
+            with Image.open(self.label_manager.cache_path("qr", sku)) as qr:
+                tile.paste(qr.convert("1").resize((side, side), Image.Resampling.NEAREST),
+                           (padding, padding))
+            text_x = side + 2 * padding
+            text_width = width - text_x - padding
+            sku_y = padding
+        else:
+            from barcode import Code128
+
+            modules = Code128(sku).build()[0]
+            text_x = padding
+            text_width = width - 2 * padding
+            if len(modules) > text_width:
+                # narrower than a pixel a module, scanners can't read it
+                raise ValueError(f"barcode needs {len(modules)} px, the label has {text_width} px")
+            bars_height = height - 2 * padding - sku_height - name_height
+            module = text_width // len(modules)
+            left = padding + (text_width - module * len(modules)) // 2
+            for bar in re.finditer("1+", modules):
+                draw.rectangle((left + bar.start() * module, padding,
+                                left + bar.end() * module - 1, padding + bars_height), fill=0)
+            sku_y = padding + bars_height
+
+        draw.text((text_x, sku_y), self.fit_text(draw, sku, sku_font, text_width), font=sku_font, fill=0)
+        draw.text((text_x, sku_y + sku_height), self.fit_text(draw, name or "", name_font, text_width),
+                  font=name_font, fill=0)
+        return tile
+
+    def error_tile(self, sku: str, message: str):
+        """Stands in for a label which couldn't be drawn"""
+        from PIL import Image, ImageDraw
+
+        layout = self.layout
+        width, height = layout.px(layout.label_width), layout.px(layout.label_height)
+        padding = layout.px(layout.padding)
+        tile = Image.new("1", (width, height), 1)
+        draw = ImageDraw.Draw(tile)
+        draw.rectangle((padding, padding, width - padding - 1, height - padding - 1), outline=0)
+        sku_font, message_font = self.font(8), self.font(6.5)
+        text_width = width - 4 * padding
+        draw.text((2 * padding, 2 * padding), self.fit_text(draw, sku, sku_font, text_width),
+                  font=sku_font, fill=0)
+        draw.text((2 * padding, 2 * padding + sku_font.getbbox("Ag")[3]),
+                  self.fit_text(draw, message, message_font, text_width), font=message_font, fill=0)
+        return tile
+
+    def tiles(self, items: List[Tuple[str, str]], report: SheetReport):
+        """Label tiles of one page, from the cache where possible
+
+        A label which can't be drawn is recorded in the report's errors
+        and replaced by an error tile, the rest of the sheet is printed.
+        """
+        from PIL import Image
+
+        qr_errors = {}
+        if self.code == "qr":
+            qr_errors = dict(self.label_manager.generate([sku for sku, _ in items], ("qr",)).errors)
+        for sku, name in items:
+            if sku in qr_errors:
+                report.errors.append((sku, qr_errors[sku]))
+                yield self.error_tile(sku, qr_errors[sku])
+                continue
+            path = self.tile_path(sku, name)
+            try:
+                if os.path.exists(path):
+                    with Image.open(path) as tile:
+                        tile.load()
+                    report.cached += 1
+                else:
+                    tile = self.render_tile(sku, name)
+                    output = io.BytesIO()
+                    tile.save(output, "PNG")
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    write_atomic(path, output.getvalue())
+            except Exception as e:
+                message = f"{self.code}: {e}"
+                report.errors.append((sku, message))
+                yield self.error_tile(sku, message)
+                continue
+            report.labels += 1
+            yield tile
+
+    def pages(self, items: Iterable[Tuple[str, str]], report: SheetReport) -> Iterator:
+        """Composes pages of (sku, name) items one at a time"""
+        layout = self.layout
+        page_items = []
+        for item in items:
+            page_items.append(item)
+            if len(page_items) == layout.per_page:
+                yield self.compose(page_items, report)
+                page_items = []
+        if page_items:
+            yield self.compose(page_items, report)
+
+    def compose(self, items: List[Tuple[str, str]], report: SheetReport):
+        from PIL import Image
+
+        layout = self.layout
+        page = Image.new("1", (layout.px(layout.page_width), layout.px(layout.page_height)), 1)
+        for index, tile in enumerate(self.tiles(items, report)):
+            row, column = divmod(index, layout.columns)
+            page.paste(tile, (layout.px(layout.margin_left + column * layout.pitch_x),
+                              layout.px(layout.margin_top + row * layout.pitch_y)))
+        report.pages += 1
+        return page
+
+    def write(self,
+              items: Iterable[Tuple[str, str]],
+              output_path: str,
+              image_format: str = "pdf",
+              progress: Callable[[SheetReport], None] | None = None) -> SheetReport:
+        """Writes sheets of (sku, name) items, e.g. from
+        ``db_manager.iter_item_rows(["sku", "name"])``
+
+        Args:
+            output_path: the PDF file, or for "png" a path prefix
+                completed by the page number, ``sheet`` -> ``sheet_0001.png``
+        """
+        if image_format not in ("pdf", "png"):
+            raise ValueError(f"Unknown sheet format {image_format!r}")
+
+        report = SheetReport()
+        writer = None
+        if image_format == "pdf":
+            writer = PdfPageWriter(output_path, self.layout.page_width, self.layout.page_height)
+        try:
+            for page in self.pages(items, report):
+                if writer:
+                    writer.add_page(page)
+                else:
+                    page.save(f"{output_path}_{report.pages:04d}.png", dpi=(self.layout.dpi,) * 2)
+                if progress:
+                    progress(report)
+        finally:
+            if writer:
+                writer.close()
+        return report
@@ -0,0 +1,146 @@
+"""Schema migrations for existing databases
+
+``Base.metadata.create_all`` only creates missing tables, it never
+changes a table which already exists. Each step here brings an older
+database one version further, the reached version is stored in SQLite's
+``PRAGMA user_version`` or PostgreSQL's schema_version table. Steps are
+idempotent, on a fresh database they find everything in place already.
+Dialect specific SQL, triggers above all, comes from the backend.
+"""
+from sqlalchemy import Index, func, insert, inspect, literal, select
+from tech_cache.commons.backends import get_backend
+from tech_cache.models.category_threshold import CategoryThreshold
+from tech_cache.models.change_log import ChangeLogEntry
+from tech_cache.models.category_total import CategoryTotal, CategoryTurnover
+from tech_cache.models.item import Item
+from tech_cache.models.stock_movement import StockMovement, StockSnapshot
+
+UNIQUE_SKU_INDEX = "ux_items_sku"
+
+
+def add_item_indexes(connection):
+    """Version 1, indexes on sku, name, category and quantity"""
+    for index in Item.__table__.indexes:
+        # later versions add indexes on columns which don't exist yet
+        if index.name in ("ix_items_sku", "ix_items_name", "ix_items_category", "ix_items_quantity"):
+            index.create(connection, checkfirst=True)
+
+
+def add_stock_ledger(connection):
+    """Version 2, stock movement ledger and snapshots
+
+    Existing items get an opening snapshot, their quantity is known to be
+    unchanged since they were last updated.
+    """
+    for table in (StockMovement.__table__, StockSnapshot.__table__):
+        table.create(connection, checkfirst=True)
+    if connection.execute(select(func.count()).select_from(StockSnapshot.__table__)).scalar():
+        return
+    items = Item.__table__
+    connection.execute(insert(StockSnapshot.__table__).from_select(
+            ["item_id", "quantity", "movement_id", "taken_at"],
+            select(items.c.id, items.c.quantity, literal(0),
+                   func.coalesce(items.c.updated_at, items.c.created_at, func.now()))))
+
+
+def add_reorder_thresholds(connection):
+    """Version 3, reorder threshold of items and of categories"""
+    columns = {column["name"] for column in inspect(connection).get_columns("items")}
+    if "reorder_threshold" not in columns:
+        connection.exec_driver_sql("ALTER TABLE items ADD COLUMN reorder_threshold INTEGER")
+    CategoryThreshold.__table__.create(connection, checkfirst=True)
+
+
+def rebuild_category_totals(connection):
+    """Recounts category totals from the items, e.g. after rounding drift"""
+    get_backend(connection).rebuild_category_totals(connection)
+
+
+def rebuild_category_turnover(connection):
+    """Recounts hourly turnover from the stock ledger"""
+    get_backend(connection).rebuild_category_turnover(connection)
+
+
+def add_category_totals(connection):
+    """Version 4, unit price of items, trigger kept category totals and
+    hourly turnover
+    """
+    columns = {column["name"] for column in inspect(connection).get_columns("items")}
+    if "unit_price" not in columns:
+        connection.exec_driver_sql("ALTER TABLE items ADD COLUMN unit_price FLOAT")
+    for index in Item.__table__.indexes:
+        index.create(connection, checkfirst=True)
+    CategoryTotal.__table__.create(connection, checkfirst=True)
+    CategoryTurnover.__table__.create(connection, checkfirst=True)
+    for trigger in get_backend(connection).category_totals_triggers():
+        connection.exec_driver_sql(trigger)
+    rebuild_category_totals(connection)
+    rebuild_category_turnover(connection)
+
+
+def add_change_log(connection):
+    """Version 5, trigger written log of item changes
+
+    Items changed before the log existed are unknown to it, clients
+    start from its current version after reading all items.
+    """
+    ChangeLogEntry.__table__.create(connection, checkfirst=True)
+    for trigger in get_backend(connection).change_log_triggers():
+        connection.exec_driver_sql(trigger)
+
+
+def pad_item_timestamps(connection):
+    """Version 6, timestamps of items with microseconds
+
+    Items are now written with microsecond timestamps, so that
+    update_item's updated_at guard sees every write. Older rows written
+    in whole seconds get a zero fraction and compare equal to what was
+    read from them. Each padded item is logged as updated once.
+    """
+    get_backend(connection).pad_item_timestamps(connection)
+
+
+# (version, step) in order
+MIGRATIONS = [
+        (1, add_item_indexes),
+        (2, add_stock_ledger),
+        (3, add_reorder_thresholds),
+        (4, add_category_totals),
+        (5, add_change_log),
+        (6, pad_item_timestamps),
+        ]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection) -> int:
+    return get_backend(connection).get_schema_version(connection)
+
+
+def migrate(engine):
+    """Runs all steps newer than the database's schema version"""
+    with engine.begin() as connection:
+        version = get_schema_version(connection)
+        if version >= SCHEMA_VERSION:
+            return
+        for step_version, step in MIGRATIONS:
+            if step_version > version:
+                step(connection)
+                version = step_version
+        get_backend(connection).set_schema_version(connection, version)
+
+
+def ensure_unique_sku(engine):
+    """Adds a unique index on sku, making duplicate skus impossible
+
+    Raises: ValueError if the table already holds duplicate skus
+    """
+    with engine.begin() as connection:
+        duplicates = connection.exec_driver_sql(
+                "SELECT COUNT(*) FROM (SELECT sku FROM items GROUP BY sku HAVING COUNT(*) > 1) AS duplicated"
+                ).scalar()
+        if duplicates:
+            raise ValueError(f"Can't make sku unique, {duplicates} skus are used more than once")
+        # not an Index on Item.__table__, that would make create_all add
+        # it to every database opened later in the process
+        connection.exec_driver_sql(f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_SKU_INDEX} ON items (sku)")
@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+from sqlalchemy import func, select
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.item_changes import ItemChange
+from tech_cache.models.category_total import CategoryTotal, CategoryTurnover
+from tech_cache.models.item import Item
+
+
+def local_midnight(days_ago: int = 0) -> datetime:
+    """Start of a local day as naive UTC, the time zone of stored timestamps"""
+    midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+    midnight -= timedelta(days=days_ago)
+    return midnight.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class CategoryReport:
+    category: str
+    items: int = 0
+    quantity: int = 0
+    value: float = 0.0
+    # ledger movements in the turnover window
+    units_out: int = 0
+    units_in: int = 0
+
+    @property
+    def turnover(self) -> float | None:
+        """Units taken out per unit in stock, None when nothing is in stock"""
+        return self.units_out / self.quantity if self.quantity > 0 else None
+
+
+@dataclass(frozen=True)
+class StockReport:
+    categories: List[CategoryReport] = field(default_factory=list)
+    # items updated in [since, until), None for all items
+    since: datetime | None = None
+    until: datetime | None = None
+    # ledger window of units_out and units_in
+    turnover_since: datetime | None = None
+
+    @property
+    def total(self) -> CategoryReport:
+        return CategoryReport("Total",
+                              sum(category.items for category in self.categories),
+                              sum(category.quantity for category in self.categories),
+                              sum(category.value for category in self.categories),
+                              sum(category.units_out for category in self.categories),
+                              sum(category.units_in for category in self.categories))
+
+
+class ReportEngine:
+    """Category totals, stock value and turnover computed in SQL
+
+    Totals of all items come from the category_totals table, which
+    triggers keep up to date, so they cost a read of one row per category
+    at any table size. Totals of items updated in a date window use the
+    covering index on updated_at. Turnover sums the hourly per category
+    counts which a trigger on the stock ledger keeps. Results are cached
+    until the database reports a change.
+
+    Args:
+        turnover_days: ledger window of reports over all items
+    """
+    CACHE_SIZE = 32
+
+    def __init__(self, db_manager: DatabaseManager, turnover_days: int = 30):
+        self.db_manager = db_manager
+        self.turnover_days = turnover_days
+        self.lock = threading.Lock()
+        self.cache: OrderedDict = OrderedDict()
+        # bumped on changes, results computed meanwhile aren't cached
+        self.generation = 0
+        self.db_manager.subscribe(self.on_item_change)
+
+    def on_item_change(self, change: ItemChange):
+        self.invalidate()
+
+    def invalidate(self):
+        with self.lock:
+            self.cache.clear()
+            self.generation += 1
+
+    def cached(self, key: Tuple, compute):
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            generation = self.generation
+        result = compute()
+        with self.lock:
+            if generation == self.generation:
+                self.cache[key] = result
+                if len(self.cache) > self.CACHE_SIZE:
+                    self.cache.popitem(last=False)
+        return result
+
+    def category_totals(self,
+                        since: datetime | None = None,
+                        until: datetime | None = None) -> List[CategoryReport]:
+        """Item count, quantity and value per category
+
+        Args:
+            since, until: only items last updated in [since, until),
+                naive UTC like the stored timestamps
+        """
+        return self.cached(("totals", since, until), lambda: self._category_totals(since, until))
+
+    def _category_totals(self, since, until) -> List[CategoryReport]:
+        if since is None and until is None:
+            totals = CategoryTotal.__table__
+            # c.items would be the column collection's method
+            statement = (select(totals.c.category, totals.c["items"], totals.c.quantity, totals.c.value)
+                         .where(totals.c["items"] > 0)
+                         .order_by(totals.c.category))
+        else:
+            items = Item.__table__
+            # grouping by an expression keeps SQLite from walking the whole
+            # category index, it searches the updated_at index instead
+            category = func.coalesce(items.c.category, "")
+            statement = (select(category,
+                                func.count(),
+                                func.sum(items.c.quantity),
+                                func.sum(items.c.quantity * func.coalesce(items.c.unit_price, 0)))
+                         .group_by(category)
+                         .order_by(category))
+            if since is not None:
+                statement = statement.where(items.c.updated_at >= since)
+            if until is not None:
+                statement = statement.where(items.c.updated_at < until)
+        with self.db_manager.engine.connect() as connection:
+            return [CategoryReport(category, count, quantity or 0, value or 0.0)
+                    for category, count, quantity, value in connection.execute(statement)]
+
+    def turnover(self, since: datetime, until: datetime | None = None) -> Dict[str, Tuple[int, int]]:
+        """Units taken out and put in per category, from the stock ledger
+
+        Movements are counted per hour, the window is rounded to hours.
+        """
+        return self.cached(("turnover", since, until), lambda: self._turnover(since, until))
+
+    def _turnover(self, since, until) -> Dict[str, Tuple[int, int]]:
+        turnover = CategoryTurnover.__table__
+        statement = (select(turnover.c.category, func.sum(turnover.c.units_out), func.sum(turnover.c.units_in))
+                     .where(turnover.c.hour >= since)
+                     .group_by(turnover.c.category))
+        if until is not None:
+            statement = statement.where(turnover.c.hour < until)
+        with self.db_manager.engine.connect() as connection:
+            return {category: (units_out, units_in)
+                    for category, units_out, units_in in connection.execute(statement)}
+
+    def report(self,
+               since: datetime | None = None,
+               until: datetime | None = None,
+               with_turnover: bool = True) -> StockReport:
+        """Category totals with their turnover over the same window
+
+        Reports over all items take turnover of the last turnover_days.
+        """
+        categories = self.category_totals(since, until)
+        if not with_turnover:
+            return StockReport(categories, since, until)
+
+        turnover_since = since if since is not None else local_midnight(self.turnover_days)
+        # a copy, the cached result stays whole
+        turnover = dict(self.turnover(turnover_since, until))
+        reports = []
+        for category in categories:
+            units_out, units_in = turnover.pop(category.category, (0, 0))
+            reports.append(CategoryReport(category.category, category.items, category.quantity,
+                                          category.value, units_out, units_in))
+        # categories without items left, e.g. deleted items
+        for name, (units_out, units_in) in sorted(turnover.items()):
+            reports.append(CategoryReport(name, units_out=units_out, units_in=units_in))
+        return StockReport(reports, since, until, turnover_since)
+
+    def rebuild(self):
+        """Recounts the trigger kept totals from the items and the ledger"""
+        from tech_cache.commons.migrations import rebuild_category_totals, rebuild_category_turnover
+        with self.db_manager.engine.begin() as connection:
+            rebuild_category_totals(connection)
+            rebuild_category_turnover(connection)
+        self.invalidate()
@@ -0,0 +1,138 @@
+import re
+import threading
+from typing import Callable, FrozenSet, List
+from tech_cache.commons.backends import SearchCancelled, get_backend
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.item_changes import ChangeKind, ItemChange
+
+
+class SearchEngine:
+    """Ranked item search backed by the database's full-text index
+
+    The index covers sku, name, category and specification of the items
+    table, an SQLite FTS5 external content table or a PostgreSQL GIN
+    index, neither stores a copy of the text. It follows every write,
+    including writes from other processes or bulk statements.
+
+    Modes:
+        fts: prefix matching of every typed word, ranked by relevance
+        fuzzy: typed words are matched against the indexed vocabulary
+            with rapidfuzz, so typos still find the intended terms
+        auto: fts, falling back to fuzzy when nothing matched
+    """
+    MODES = ("fts", "fuzzy", "auto")
+
+    # ranking scores every match, so queries matching more than
+    # limit * RANK_FACTOR rows (one or two typed letters) are listed in
+    # index order instead
+    RANK_FACTOR = 10
+
+    # words considered for typo correction, digits are never guessed
+    WORD = re.compile(r"[^\W\d_]{3,}")
+
+    def __init__(self, db_manager: DatabaseManager, limit: int = 500):
+        self.db_manager = db_manager
+        self.backend = get_backend(db_manager.engine)
+        self.limit = limit
+        # indexed words for fuzzy matching, loaded on first use. Never
+        # changed in place, searches on other threads iterate it, new
+        # words swap in a new set under the lock
+        self.vocabulary: FrozenSet[str] | None = None
+        self.vocabulary_lock = threading.Lock()
+        self.ensure_index()
+        self.db_manager.subscribe(self.on_item_change)
+
+    def ensure_index(self):
+        """Creates the full-text index once, indexing existing rows"""
+        with self.db_manager.engine.begin() as connection:
+            self.backend.ensure_search_index(connection)
+
+    def fts_query(self, search_text: str) -> str:
+        """Turns typed text into a full-text query matching word prefixes"""
+        return self.backend.search_query([[(word, True)] for word in search_text.split()])
+
+    def search(self,
+               search_text: str,
+               mode: str = "auto",
+               limit: int | None = None,
+               cancelled: Callable[[], bool] | None = None) -> List[int]:
+        """Returns ids of matching items, best match first
+
+        Args:
+            cancelled: polled while SQLite runs the query, returning True
+                aborts the search with SearchCancelled
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown search mode {mode!r}")
+        if not search_text.strip():
+            return []
+
+        limit = limit or self.limit
+        if mode == "fuzzy":
+            return self.fuzzy_search(search_text, limit, cancelled)
+
+        ids = self.match(self.fts_query(search_text), limit, cancelled)
+        if not ids and mode == "auto":
+            ids = self.fuzzy_search(search_text, limit, cancelled)
+        return ids
+
+    def match(self, query: str, limit: int, cancelled: Callable[[], bool] | None = None) -> List[int]:
+        """Runs a full-text query, ranking it when the match set is small"""
+        cap = limit * self.RANK_FACTOR
+        with self.db_manager.engine.connect() as connection:
+            if cancelled is None:
+                return self._match(connection, query, limit, cap)
+            with self.backend.interruptible(connection, cancelled):
+                return self._match(connection, query, limit, cap)
+
+    def _match(self, connection, query, limit, cap) -> List[int]:
+        unranked, ranked = self.backend.search_statements()
+        ids = list(connection.execute(unranked, {"query": query, "limit": cap}).scalars())
+        if len(ids) >= cap:
+            return ids[:limit]
+        return list(connection.execute(ranked, {"query": query, "limit": limit}).scalars())
+
+    def fuzzy_search(self,
+                     search_text: str,
+                     limit: int,
+                     cancelled: Callable[[], bool] | None = None) -> List[int]:
+        """Finds items despite typos
+
+        Each typed word is replaced by the closest indexed words, so the
+        cost depends on the vocabulary size and not on the table size.
+        """
+        from rapidfuzz import fuzz, process
+
+        vocabulary = self.vocabulary
+        if vocabulary is None:
+            with self.db_manager.engine.connect() as connection:
+                terms = self.backend.search_terms(connection)
+                vocabulary = frozenset(term for term in terms if self.WORD.fullmatch(term))
+            self.vocabulary = vocabulary
+
+        groups = []
+        for word in search_text.lower().split():
+            matches = process.extract(word, vocabulary,
+                                      scorer=fuzz.ratio, limit=5, score_cutoff=70)
+            groups.append([(term, False) for term, _, _ in matches] + [(word, True)])
+        return self.match(self.backend.search_query(groups), limit, cancelled)
+
+    def on_item_change(self, change: ItemChange):
+        """Adds new words to the fuzzy vocabulary, the FTS index syncs via triggers
+
+        Words of deleted items are kept, they only cost a miss.
+        """
+        if self.vocabulary is None or change.kind == ChangeKind.DELETED:
+            return
+        if change.kind == ChangeKind.RESET:
+            with self.vocabulary_lock:
+                self.vocabulary = None
+            return
+
+        words = set()
+        for item in self.db_manager.get_rows(change.ids):
+            fields = (item.sku, item.name, item.category, item.specification or "")
+            words.update(self.WORD.findall(" ".join(fields).lower()))
+        with self.vocabulary_lock:
+            if self.vocabulary is not None and not words <= self.vocabulary:
+                self.vocabulary = self.vocabulary | words
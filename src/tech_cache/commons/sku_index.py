@@ -0,0 +1,82 @@
+import threading
+from typing import Dict
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.item_changes import ChangeKind, ItemChange
+from tech_cache.models.item import Item
+
+
+class SkuIndex:
+    """In memory sku -> item id lookup for scanning
+
+    Built with one pass over the items table and kept warm by the
+    database's change notifications, so a lookup is a dict access.
+    Duplicate skus resolve to the lowest id, like
+    ``DatabaseManager.get_item_by_sku``. Skus written by other processes
+    are found through the database on their first miss.
+    """
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.lock = threading.Lock()
+        self.ids: Dict[str, int] | None = None
+        # reverse map, finds the old sku of a changed or deleted item
+        self.skus: Dict[int, str] = {}
+        self.db_manager.subscribe(self.on_item_change)
+
+    def load(self):
+        """Reads every sku, called on first lookup unless called earlier"""
+        ids, skus = {}, {}
+        for item_id, sku in self.db_manager.iter_item_rows(["id", "sku"], batch_size=10000):
+            skus[item_id] = sku
+            # rows come in id order, the first id of a sku wins
+            ids.setdefault(sku, item_id)
+        with self.lock:
+            self.ids, self.skus = ids, skus
+
+    def lookup(self, sku: str) -> int | None:
+        """Id of the item with given sku, None if there is none"""
+        if self.ids is None:
+            self.load()
+        item_id = self.ids.get(sku)
+        if item_id is None:
+            item = self.db_manager.get_item_by_sku(sku)
+            if item is None:
+                return None
+            with self.lock:
+                self._add(item.id, item.sku)
+            item_id = item.id
+        return item_id
+
+    def _add(self, item_id: int, sku: str):
+        self.skus[item_id] = sku
+        current = self.ids.get(sku)
+        if current is None or item_id < current:
+            self.ids[sku] = item_id
+
+    def _remove(self, item_id: int, sku: str | None):
+        self.skus.pop(item_id, None)
+        if sku is not None and self.ids.get(sku) == item_id:
+            del self.ids[sku]
+            # another item may share the sku, the database knows
+            other = self.db_manager.get_item_by_sku(sku)
+            if other is not None and other.id != item_id:
+                self.ids[sku] = other.id
+
+    def on_item_change(self, change: ItemChange):
+        if self.ids is None:
+            return
+        if change.kind == ChangeKind.RESET:
+            self.load()
+            return
+
+        with self.lock:
+            if change.kind == ChangeKind.DELETED:
+                for item_id in change.ids:
+                    self._remove(item_id, self.skus.get(item_id))
+                return
+
+            rows = self.db_manager.iter_item_rows(["id", "sku"], where=Item.id.in_(list(change.ids)))
+            for item_id, sku in rows:
+                old_sku = self.skus.get(item_id)
+                if old_sku != sku:
+                    self._remove(item_id, old_sku)
+                    self._add(item_id, sku)
@@ -0,0 +1,125 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Mapping
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.item_changes import ChangeKind, ItemChange
+
+
+@dataclass(frozen=True)
+class LowStockItem:
+    id: int
+    sku: str
+    name: str
+    category: str
+    quantity: int
+    threshold: int
+
+    @classmethod
+    def from_row(cls, row: Mapping) -> "LowStockItem":
+        return cls(row["id"], row["sku"], row["name"], row["category"], row["quantity"], row["threshold"])
+
+
+# called with items which dropped to their threshold and ids of items
+# which are no longer low
+LowStockListener = Callable[[List[LowStockItem], List[int]], None]
+
+
+class StockAlertMonitor:
+    """Keeps the set of items at or below their reorder threshold
+
+    The set is read once, after that only items named by the database's
+    change notifications are checked again, one indexed lookup per
+    changed item however big the table is. Listeners hear about items
+    entering or leaving the set, not about every movement of an item
+    which is already low.
+    """
+    # ids per lookup, stays below SQLite's bound parameter limit
+    CHUNK_SIZE = 1000
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.lock = threading.Lock()
+        self.low: Dict[int, LowStockItem] | None = None
+        # low_stock() result until the set changes
+        self.sorted: List[LowStockItem] | None = None
+        self.listeners: List[LowStockListener] = []
+        self.db_manager.subscribe(self.on_item_change)
+
+    def subscribe(self, listener: LowStockListener):
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener: LowStockListener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def load(self):
+        """Reads every low item, called on first use unless called earlier"""
+        low = {row["id"]: LowStockItem.from_row(row)
+               for row in self.db_manager.get_stock_levels(low_only=True)}
+        with self.lock:
+            old, self.low = self.low, low
+            self.sorted = None
+        if old is not None:
+            self.notify([item for item_id, item in low.items() if item_id not in old],
+                        [item_id for item_id in old if item_id not in low])
+
+    def low_stock(self) -> List[LowStockItem]:
+        """Items at or below their threshold, emptiest first"""
+        if self.low is None:
+            self.load()
+        with self.lock:
+            if self.sorted is None:
+                self.sorted = sorted(self.low.values(), key=lambda item: (item.quantity - item.threshold, item.sku))
+            return list(self.sorted)
+
+    def count(self) -> int:
+        if self.low is None:
+            self.load()
+        return len(self.low)
+
+    def is_low(self, item_id: int) -> bool:
+        if self.low is None:
+            self.load()
+        return item_id in self.low
+
+    def notify(self, entered: List[LowStockItem], cleared: List[int]):
+        if not entered and not cleared:
+            return
+        for listener in list(self.listeners):
+            listener(entered, cleared)
+
+    def on_item_change(self, change: ItemChange):
+        if self.low is None:
+            return
+        if change.kind == ChangeKind.RESET:
+            self.load()
+            return
+
+        entered, cleared = [], []
+        if change.kind == ChangeKind.DELETED:
+            with self.lock:
+                cleared = [item_id for item_id in change.ids if self.low.pop(item_id, None)]
+                if cleared:
+                    self.sorted = None
+            self.notify(entered, cleared)
+            return
+
+        ids = list(change.ids)
+        for start in range(0, len(ids), self.CHUNK_SIZE):
+            chunk = ids[start:start + self.CHUNK_SIZE]
+            rows = {row["id"]: row for row in self.db_manager.get_stock_levels(chunk)}
+            with self.lock:
+                for item_id in chunk:
+                    row = rows.get(item_id)
+                    if row is not None and row["threshold"] is not None and row["quantity"] <= row["threshold"]:
+                        item = LowStockItem.from_row(row)
+                        if item_id not in self.low:
+                            entered.append(item)
+                        if self.low.get(item_id) != item:
+                            self.low[item_id] = item
+                            self.sorted = None
+                    elif self.low.pop(item_id, None):
+                        cleared.append(item_id)
+                        self.sorted = None
+        self.notify(entered, cleared)
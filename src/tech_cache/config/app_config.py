@@ -4,3 +4,29 @@ from typing import Tuple
 @dataclass
 class AppConfig:
     table_headers: Tuple = ("SKU", "Name", "Category", "Quantity", "Specification")
+    # item column shown under each header
+    table_fields: Tuple = ("sku", "name", "category", "quantity", "specification")
+
+    # lazy loading, rows are fetched from the database in pages
+    # and only a bounded number of pages is kept in memory
+    lazy_loading: bool = False
+    page_size: int = 500
+    max_cached_pages: int = 20
+
+    # search, "fts", "fuzzy" or "auto" (fts falling back to fuzzy)
+    search_mode: str = "auto"
+    search_limit: int = 500
+    # typing pause before a search starts
+    search_delay_ms: int = 150
+
+    # database, an SQLite file or a server, see commons.backends
+    db_url: str = "sqlite:///test.db"
+    # database engine profile, see commons.engine_profile
+    engine_profile: str = "tuned"
+
+    # summary panel refreshes once writes pause this long
+    summary_refresh_ms: int = 1000
+
+    # polling of changes other workbenches make to a shared database,
+    # 0 turns it off
+    change_poll_ms: int = 1000
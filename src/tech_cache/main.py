@@ -1,22 +1,44 @@
 # def on_light_theme_selected():
 #     messagebox.showwarning("Warning", "Light theme attracts bugs! Proceed with caution.")
 
+import time
+STARTED = time.perf_counter()
+
+import argparse
 import sys
 import os
-from PyQt6 import QtWidgets
-from tech_cache.views.main_window import MainWindow
 from tech_cache.utils.logger_conf import LoggerConfig
+from tech_cache.utils.startup_profiler import StartupProfiler
+
+def parse_args(argv):
+    """Splits our options from the ones handed to Qt"""
+    parser = argparse.ArgumentParser(prog="tech_cache", add_help=False)
+    parser.add_argument("--profile-startup",
+                        action="store_true",
+                        help="print time spent in each startup phase to stderr")
+    return parser.parse_known_args(argv[1:])
 
 def main():
     os.environ['DEBUG_MODE'] = '1' # on
     # os.environ['DEBUG_MODE'] = '0' # off
-    LoggerConfig.setup_logging()
-    app = QtWidgets.QApplication(sys.argv)
-    mainWin = MainWindow()
-    mainWin.show()
+    args, qt_args = parse_args(sys.argv)
+    profiler = StartupProfiler(STARTED, enabled=args.profile_startup)
+
+    with profiler.phase("logging"):
+        LoggerConfig.setup_logging()
+    with profiler.phase("import Qt"):
+        from PyQt6 import QtCore, QtWidgets
+    with profiler.phase("QApplication"):
+        app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    with profiler.phase("import main window"):
+        from tech_cache.views.main_window import MainWindow
+    with profiler.phase("window shell"):
+        mainWin = MainWindow(profiler)
+    with profiler.phase("show"):
+        mainWin.showFullScreen()
+    QtCore.QTimer.singleShot(0, lambda: profiler.mark("first paint"))
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,14 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from tech_cache.models.item import Base
+
+class CategoryThreshold(Base):
+    """Reorder threshold of items in a category without their own"""
+    __tablename__ = "category_thresholds"
+
+    category: Mapped[str] = mapped_column(String(30), primary_key=True)
+    threshold: Mapped[int]
+
+    def __repr__(self) -> str:
+        return f"CategoryThreshold(category={self.category!r}, threshold={self.threshold!r})"
@@ -0,0 +1,39 @@
+from datetime import datetime
+from sqlalchemy import DateTime
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from tech_cache.models.item import Base
+
+class CategoryTotal(Base):
+    """Running totals of a category's items
+
+    Kept up to date by triggers on the items table, see
+    ``commons.migrations.add_category_totals``, so reports never scan
+    the items.
+    """
+    __tablename__ = "category_totals"
+
+    category: Mapped[str] = mapped_column(String(30), primary_key=True)
+    items: Mapped[int] = mapped_column(default=0)
+    quantity: Mapped[int] = mapped_column(default=0)
+    value: Mapped[float] = mapped_column(default=0.0)
+
+    def __repr__(self) -> str:
+        return f"CategoryTotal(category={self.category!r}, items={self.items!r}, quantity={self.quantity!r})"
+
+class CategoryTurnover(Base):
+    """Units moved out of and into a category's stock in one hour
+
+    Filled by a trigger on the stock ledger, so turnover reports sum a
+    few rows per day instead of reading every movement.
+    """
+    __tablename__ = "category_turnover"
+
+    hour: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    category: Mapped[str] = mapped_column(String(30), primary_key=True)
+    units_out: Mapped[int] = mapped_column(default=0)
+    units_in: Mapped[int] = mapped_column(default=0)
+
+    def __repr__(self) -> str:
+        return f"CategoryTurnover(hour={self.hour!r}, category={self.category!r}, units_out={self.units_out!r})"
@@ -0,0 +1,26 @@
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from tech_cache.models.item import Base
+
+class ChangeLogEntry(Base):
+    """One inserted, updated or deleted item, in commit order
+
+    Written by triggers on the items table, see
+    ``commons.migrations.add_change_log``, whichever process or tool
+    changes an item. ``version`` only ever grows, also across pruning,
+    so clients sharing the database ask for the changes after the
+    last version they saw.
+    """
+    __tablename__ = "change_log"
+
+    version: Mapped[int] = mapped_column(primary_key=True)
+    item_id: Mapped[int]
+    # an ItemChange kind, "inserted", "updated" or "deleted"
+    kind: Mapped[str] = mapped_column(String(10))
+
+    # AUTOINCREMENT, versions of pruned rows are never handed out again
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    def __repr__(self) -> str:
+        return f"ChangeLogEntry(version={self.version!r}, item_id={self.item_id!r}, kind={self.kind!r})"
@@ -1,28 +1,303 @@
+import heapq
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Tuple
 from PyQt6 import QtCore
 from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.item_changes import ChangeKind, ItemChange
 from tech_cache.config.app_config import AppConfig
+from tech_cache.models.item_row import ItemRow
 
 class InventoryTableModel(QtCore.QAbstractTableModel):
-    def __init__(self, db_manager: DatabaseManager, config: AppConfig):
+    """Items table model holding ItemRow tuples
+
+    Cells are read by tuple position, looked up once per column, so
+    data() stays cheap however often the view repaints.
+    """
+    # raw value of a cell, e.g. for a QSortFilterProxyModel's sortRole
+    SortRole = QtCore.Qt.ItemDataRole.UserRole + 1
+    # roles answered with the cell's value, Qt asks for many more. Qt
+    # passes roles as plain ints, which hash faster than the enum
+    VALUE_ROLES = frozenset((QtCore.Qt.ItemDataRole.DisplayRole.value,
+                             QtCore.Qt.ItemDataRole.EditRole.value,
+                             SortRole))
+
+    # database changes may be published from any thread, this signal
+    # delivers them, with the changed rows, on the thread which owns the
+    # model
+    item_changed = QtCore.pyqtSignal(object, object)
+    # changed rows are read by the thread which wrote them, so a
+    # background writer doesn't leave the reads to the GUI thread
+    PREFETCH_ROWS = True
+    # changes moving more rows than this rebuild the row list in one
+    # pass, instead of shifting it once per row
+    BULK_ROWS = 100
+
+    def __init__(self, db_manager: DatabaseManager, config: AppConfig, items=None):
+        """
+        Args:
+            items: ItemRows already read in the default order, e.g. by
+                a background loader, skips the initial load
+        """
         super(InventoryTableModel, self).__init__()
         self.db_manager = db_manager
         self.config = config
-        self.items = self.db_manager.get_all_items()
+        # tuple position of each column's field
+        self.column_fields = tuple(ItemRow._fields.index(field) for field in config.table_fields)
         self.sortable_columns = {0, 1, 2, 3}
+        # rows are ordered by the database, ties broken by id
+        self.sort_field = "id"
+        self.sort_descending = False
+        # ranked ids of a search, None when all items are shown
+        self.search_ids = None
+        if items is None:
+            self.load_items()
+        else:
+            self.items = items
+            self.row_ids = None
 
-    def refresh_view(self):
-        """gets latest database entries, notifies view and redraws tables fields"""
-        self.items = self.db_manager.get_all_items()
+        self.item_changed.connect(self.apply_change)
+        self.db_manager.subscribe(self.on_item_change)
+
+    def load_items(self):
+        """Loads rows backing the model from the database"""
+        if self.search_ids is None:
+            self.items = self.db_manager.get_rows(order_by=self.sort_field, descending=self.sort_descending)
+        else:
+            found = {item.id: item for item in self.db_manager.get_rows(self.search_ids)}
+            self.items = [found[item_id] for item_id in self.search_ids if item_id in found]
+        # id -> row lookup, rebuilt lazily after rows move
+        self.row_ids = None
+
+    def row_of(self, item_id: int) -> int | None:
+        """Returns row showing item with given id"""
+        if self.row_ids is None:
+            self.row_ids = {item.id: row for row, item in enumerate(self.items)}
+        return self.row_ids.get(item_id)
+
+    def locate_row(self, item_id: int) -> int | None:
+        """Row of an item, for selecting it in the view"""
+        return self.row_of(item_id)
+
+    def row_finder(self, item_id: int):
+        """Function finding an item's row with database queries, to run
+        off the GUI thread, None if locate_row needs none
+
+        The function returns arguments of show_row.
+        """
+        return None
+
+    def sort_key(self, item):
+        return self.db_manager.sort_key(item, self.sort_field)
+
+    def insert_position(self, key) -> int:
+        """Row where an item with given sort key belongs, binary search"""
+        low, high = 0, len(self.items)
+        while low < high:
+            middle = (low + high) // 2
+            middle_key = self.sort_key(self.items[middle])
+            if (middle_key > key) if self.sort_descending else (middle_key < key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def on_item_change(self, change: ItemChange):
+        """Called in the thread which wrote, hands the change to the model's thread"""
+        self.item_changed.emit(change, self.prefetch(change))
+
+    def prefetch(self, change: ItemChange):
+        """Reads what applying a change needs, off the GUI thread
+
+        Returns: ItemRows of the changed items, or None
+        """
+        if self.PREFETCH_ROWS and change.kind in (ChangeKind.INSERTED, ChangeKind.UPDATED):
+            return self.db_manager.get_rows(change.ids)
+        return None
+
+    def apply_change(self, change: ItemChange, rows=None):
+        """Updates only the rows touched by a database change
+
+        Args:
+            rows: ItemRows of the changed items when already read
+        """
+        if change.kind == ChangeKind.RESET:
+            self.refresh_view()
+        elif change.kind == ChangeKind.DELETED:
+            self.remove_rows(change.ids)
+        else:
+            self.upsert_rows(change.ids, rows)
+
+    def upsert_rows(self, item_ids, rows=None):
+        """Re-reads given items, redraws shown rows and inserts new ones
+
+        New items, and items whose sort value changed, are placed at
+        their sorted position.
+        """
+        last_column = self.columnCount() - 1
+        new_items = []
+        moved = []
+        found = set()
+        for item in rows if rows is not None else self.db_manager.get_rows(item_ids):
+            found.add(item.id)
+            row = self.row_of(item.id)
+            if row is None:
+                # search results only follow items already shown
+                if self.search_ids is None:
+                    new_items.append(item)
+            elif self.search_ids is None and self.sort_key(item) != self.sort_key(self.items[row]):
+                moved.append(item)
+            else:
+                self.items[row] = item
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+
+        # items which vanished from the database
+        missing = [item_id for item_id in item_ids if item_id not in found]
+        if len(moved) > self.BULK_ROWS:
+            self.move_items(moved)
+            moved = []
+        if missing or moved:
+            self.remove_rows(missing + [item.id for item in moved])
+        self.insert_items(new_items + moved)
+
+    def after_last_row(self, key) -> bool:
+        """An item with this sort key goes after all rows"""
+        if not self.items:
+            return True
+        last_key = self.sort_key(self.items[-1])
+        return key < last_key if self.sort_descending else key > last_key
+
+    def insert_items(self, items):
+        """Inserts rows at their sorted positions, adjacent ones at once
 
-        
-        # TODO: use and row specifier and update only that item
-        # instead of all of them!
+        An import adds its rows in chunks, in id order they all go to
+        the end in one insert.
+        """
+        if len(items) <= self.BULK_ROWS:
+            for item in items:
+                self.insert_item(item)
+            return
+
+        items = sorted(items, key=self.sort_key, reverse=self.sort_descending)
+        if self.after_last_row(self.sort_key(items[0])):
+            row = len(self.items)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row + len(items) - 1)
+            self.items.extend(items)
+            if self.row_ids is not None:
+                self.row_ids.update((item.id, row + offset) for offset, item in enumerate(items))
+            self.endInsertRows()
+            return
+
+        # (row among the current rows, items going there)
+        runs = []
+        for item in items:
+            row = self.insert_position(self.sort_key(item))
+            if runs and runs[-1][0] == row:
+                runs[-1][1].append(item)
+            else:
+                runs.append((row, [item]))
+        if len(runs) > self.BULK_ROWS:
+            self.beginResetModel()
+            self.items = list(heapq.merge(self.items, items, key=self.sort_key, reverse=self.sort_descending))
+            self.row_ids = None
+            self.endResetModel()
+            return
+
+        # bottom up, so rows above stay valid while inserting
+        for row, run in reversed(runs):
+            self.beginInsertRows(QtCore.QModelIndex(), row, row + len(run) - 1)
+            self.items[row:row] = run
+            self.endInsertRows()
+        self.row_ids = None
+
+    def move_items(self, items):
+        """Puts items whose sort value changed at their new rows
+
+        Merges them, sorted, into the other rows in one pass. Selected
+        rows follow their items.
+        """
+        moved = {item.id: item for item in items}
         self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        persistent_ids = [self.items[index.row()].id for index in persistent]
+        kept = [item for item in self.items if item.id not in moved]
+        moved_items = sorted(moved.values(), key=self.sort_key, reverse=self.sort_descending)
+        self.items = list(heapq.merge(kept, moved_items, key=self.sort_key, reverse=self.sort_descending))
+        self.row_ids = None
+        self.changePersistentIndexList(persistent, [self.index(self.row_of(item_id), index.column())
+                                                    for index, item_id in zip(persistent, persistent_ids)])
         self.layoutChanged.emit()
 
+    def insert_item(self, item):
+        """Inserts one row at the item's sorted position"""
+        row = self.insert_position(self.sort_key(item))
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.items.insert(row, item)
+        if row == len(self.items) - 1 and self.row_ids is not None:
+            self.row_ids[item.id] = row
+        else:
+            self.row_ids = None
+        self.endInsertRows()
+
+    def remove_rows(self, item_ids):
+        """Removes rows of given items from the model"""
+        rows = {self.row_of(item_id) for item_id in item_ids}
+        rows.discard(None)
+        if not rows:
+            return
+
+        # runs of adjacent rows, e.g. a shift selection, go at once
+        runs = []
+        for row in sorted(rows):
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        if len(runs) > self.BULK_ROWS:
+            self.beginResetModel()
+            self.items = [item for row, item in enumerate(self.items) if row not in rows]
+            self.row_ids = None
+            self.endResetModel()
+            return
+
+        # bottom up, so rows above stay valid while removing
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.items[first:last + 1]
+            self.endRemoveRows()
+        self.row_ids = None
+
+    def item_at(self, row: int):
+        """Returns item shown at given row"""
+        return self.items[row]
+
+    def refresh_view(self):
+        """gets latest database entries, notifies view and redraws tables fields
+
+        Full reload, single item changes arrive through apply_change.
+        """
+        self.beginResetModel()
+        self.load_items()
+        self.endResetModel()
+
+    def show_search_results(self, item_ids, items=None):
+        """Shows only given items, in given order
+
+        Args:
+            item_ids: ranked item ids, None shows all items again
+            items: already read items of item_ids, in the same order
+        """
+        self.beginResetModel()
+        self.search_ids = None if item_ids is None else list(item_ids)
+        if self.search_ids is not None and items is not None:
+            self.items = list(items)
+            self.row_ids = None
+        else:
+            self.load_items()
+        self.endResetModel()
+
     def get_item(self, index):
         if index.isValid():
-            return self.items[index.row()]
+            return self.item_at(index.row())
         else:
             return None
 
@@ -38,29 +313,41 @@ class InventoryTableModel(QtCore.QAbstractTableModel):
         """
         return len(self.config.table_headers)
 
-    def data(self, index, role):
-        """populates each row and column with coresponding data field"""
-        if not index.isValid():
-            return None
-        if role != QtCore.Qt.ItemDataRole.DisplayRole:
-            return None
+    def data(self, index, role=QtCore.Qt.ItemDataRole.DisplayRole):
+        """populates each row and column with coresponding data field
 
-        item = self.items[index.row()]
-        column = index.column()
-        try:
-            return item[column]
-        except ValueError:
+        Display, edit and sort roles all get the field's value.
+        """
+        if role not in self.VALUE_ROLES or not index.isValid():
             return None
+        item = self.item_at(index.row())
+        if item is None:
+            return None
+        return item[self.column_fields[index.column()]]
 
     def sort(self, column: int, order) -> None:
-        """column sorting functionility"""
-        if column in self.sortable_columns:
-            self.layoutAboutToBeChanged.emit()
+        """column sorting functionility
 
-            self.items.sort(key=lambda item: item[column], 
-                        reverse=(order == QtCore.Qt.SortOrder.DescendingOrder))
+        Sorting is done by the database with ORDER BY on the indexed
+        column and kept across refreshes. Search results are few and are
+        sorted in memory.
+        """
+        if column not in self.sortable_columns:
+            return
+        sort_field = self.config.table_fields[column]
+        sort_descending = order == QtCore.Qt.SortOrder.DescendingOrder
+        if (sort_field, sort_descending) == (self.sort_field, self.sort_descending):
+            return
+        self.sort_field = sort_field
+        self.sort_descending = sort_descending
 
+        if self.search_ids is not None:
+            self.layoutAboutToBeChanged.emit()
+            self.items.sort(key=self.sort_key, reverse=self.sort_descending)
+            self.row_ids = None
             self.layoutChanged.emit()
+        else:
+            self.refresh_view()
 
     def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int):
         """Sets header names for each column in the table view"""
@@ -74,3 +361,350 @@ class InventoryTableModel(QtCore.QAbstractTableModel):
 
         return None
 
+
+
+class PageChange(NamedTuple):
+    """What the paged model needs to apply a change, read off the GUI thread"""
+    # (sort field, descending) the positions were counted in
+    sort: Tuple[str, bool]
+    # changed items, inserted ones in view order
+    rows: List[ItemRow] | None = None
+    # item id -> rows before the item, of inserted or deleted items
+    positions: Dict[int, int] | None = None
+    # table size, of changes replayed from the change log
+    total_rows: int | None = None
+
+
+class PagedInventoryTableModel(InventoryTableModel):
+    """Inventory model which never holds the whole items table in memory.
+
+    Rows are read in pages of ``config.page_size`` using keyset paging on
+    the current sort column, ties broken by ``Item.id``. Only
+    ``config.max_cached_pages`` pages are kept, least recently used pages
+    are evicted and transparently re-read when the view scrolls back to
+    them. The view grows through Qt's ``canFetchMore``/``fetchMore``
+    protocol, while the total is taken from a ``COUNT(*)``.
+    """
+    def __init__(self, db_manager: DatabaseManager, config: AppConfig):
+        self.page_size = config.page_size
+        self.max_cached_pages = config.max_cached_pages
+        super(PagedInventoryTableModel, self).__init__(db_manager, config)
+
+    def load_items(self):
+        """Resets page cache and re-reads table size
+
+        Search results are bounded, they are held like the eager model does.
+        """
+        if self.search_ids is not None:
+            super(PagedInventoryTableModel, self).load_items()
+            return
+
+        self.total_rows = self.db_manager.count_items()
+        self.fetched_rows = min(self.page_size, self.total_rows)
+        self.pages = OrderedDict()
+        # first row of each page is found by seeking past the sort key
+        # of the last row of the previous page, page 0 starts from the
+        # beginning
+        self.page_keys = {0: None}
+
+    def load_page(self, page: int):
+        """Returns items of a page, reading it from database if not cached"""
+        if page in self.pages:
+            self.pages.move_to_end(page)
+            return self.pages[page]
+
+        if page in self.page_keys:
+            after_key = self.page_keys[page]
+        else:
+            after_key = self.db_manager.get_sort_key_at(page * self.page_size - 1,
+                                                        self.sort_field,
+                                                        self.sort_descending)
+
+        items = self.db_manager.get_rows(after_key=after_key,
+                                         limit=self.page_size,
+                                         order_by=self.sort_field,
+                                         descending=self.sort_descending)
+        if items:
+            self.page_keys[page + 1] = self.sort_key(items[-1])
+
+        self.pages[page] = items
+        while len(self.pages) > self.max_cached_pages:
+            self.pages.popitem(last=False)
+        return items
+
+    def item_at(self, row: int):
+        if self.search_ids is not None:
+            return super(PagedInventoryTableModel, self).item_at(row)
+        page, offset = divmod(row, self.page_size)
+        items = self.load_page(page)
+        if offset < len(items):
+            return items[offset]
+        return None
+
+    def locate_row(self, item_id: int) -> int | None:
+        """Row of an item, fetching rows up to it so the view can show it
+
+        Queries the database, the window uses row_finder instead.
+        """
+        if self.search_ids is not None:
+            return super(PagedInventoryTableModel, self).locate_row(item_id)
+        return self.show_row(self.find_row(item_id, self.sort_field, self.sort_descending))
+
+    def find_row(self, item_id: int, sort_field: str, descending: bool) -> int | None:
+        """Row of an item in the given order, safe on any thread"""
+        rows = self.db_manager.get_rows([item_id])
+        if not rows:
+            return None
+        return self.db_manager.count_items(self.db_manager.sort_key(rows[0], sort_field), sort_field, descending)
+
+    def row_finder(self, item_id: int):
+        if self.search_ids is not None:
+            return None
+        sort = (self.sort_field, self.sort_descending)
+        return lambda: (self.find_row(item_id, *sort), sort)
+
+    def show_row(self, row: int | None, sort: Tuple | None = None) -> int | None:
+        """Fetches rows up to a row found in the given order
+
+        Returns: the row, None if it's gone or the view changed since
+        """
+        if self.search_ids is not None:
+            return None
+        if row is None or row >= self.total_rows or sort not in (None, (self.sort_field, self.sort_descending)):
+            return None
+        if row >= self.fetched_rows:
+            new_count = min((row // self.page_size + 1) * self.page_size, self.total_rows)
+            self.beginInsertRows(QtCore.QModelIndex(), self.fetched_rows, new_count - 1)
+            self.fetched_rows = new_count
+            self.endInsertRows()
+        return row
+
+    def cached_position(self, item_id: int):
+        """(page, offset) of an item in the page cache, None if not cached"""
+        for page, items in self.pages.items():
+            for offset, item in enumerate(items):
+                if item.id == item_id:
+                    return page, offset
+        return None
+
+    def drop_pages_from(self, page: int):
+        """Forgets cached pages whose rows shifted, from given page onward"""
+        for cached in [p for p in self.pages if p >= page]:
+            del self.pages[cached]
+        # start key of the page itself is still valid, rows before it
+        # didn't move
+        for key in [p for p in self.page_keys if p > page]:
+            del self.page_keys[key]
+
+    def reload_pages(self):
+        """Re-reads rows after some of them moved to unknown positions
+
+        Row count is unchanged, so the view only repaints what it shows
+        instead of being reset.
+        """
+        self.drop_pages_from(0)
+        if self.fetched_rows:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(self.fetched_rows - 1, self.columnCount() - 1))
+
+    def prefetch(self, change: ItemChange):
+        """Counts the rows' positions, so the GUI thread runs no queries
+
+        Returns: a PageChange, ItemRows while showing search results or
+            None when the view is reset anyway
+        """
+        if self.search_ids is not None:
+            if change.kind in (ChangeKind.INSERTED, ChangeKind.UPDATED):
+                return self.db_manager.get_rows(change.ids)
+            return None
+        if change.kind == ChangeKind.RESET or len(change.ids) > self.page_size:
+            return None
+
+        sort_field, descending = sort = (self.sort_field, self.sort_descending)
+        database = self.db_manager
+        if change.replayed and change.kind in (ChangeKind.INSERTED, ChangeKind.DELETED):
+            return PageChange(sort, total_rows=database.count_items())
+        if change.kind == ChangeKind.DELETED:
+            # rows before a deleted id are known in id order only
+            positions = None
+            if sort_field == "id":
+                positions = {item_id: database.count_items((item_id,), "id", descending)
+                             for item_id in change.ids}
+            return PageChange(sort, positions=positions, total_rows=database.count_items())
+        rows = database.get_rows(change.ids)
+        if change.kind == ChangeKind.UPDATED:
+            return PageChange(sort, rows)
+        # in view order, each one's count includes the new rows above it
+        rows.sort(key=lambda row: database.sort_key(row, sort_field), reverse=descending)
+        return PageChange(sort, rows, {row.id: database.count_items(database.sort_key(row, sort_field),
+                                                                    sort_field, descending)
+                                       for row in rows})
+
+    def apply_change(self, change: ItemChange, rows=None):
+        """Updates only the rows touched by a database change
+
+        Positions come counted on the sort index by prefetch, so changes
+        to rows that were never read cost no page loads. Insertions and
+        deletions replayed from the change log may have been counted
+        already, the row count is taken from the table and the cached
+        pages are read again.
+
+        Args:
+            rows: the change's prefetch result
+        """
+        if self.search_ids is not None:
+            super(PagedInventoryTableModel, self).apply_change(change, rows if isinstance(rows, list) else None)
+        elif change.kind == ChangeKind.RESET or len(change.ids) > self.page_size:
+            self.refresh_view()
+        elif not isinstance(rows, PageChange) or rows.sort != (self.sort_field, self.sort_descending):
+            # counted for another order, or while searching
+            if change.kind == ChangeKind.UPDATED:
+                self.reload_pages()
+            else:
+                self.refresh_view()
+        elif change.replayed and change.kind in (ChangeKind.INSERTED, ChangeKind.DELETED):
+            self.resize(rows.total_rows)
+            self.reload_pages()
+        elif change.kind == ChangeKind.INSERTED:
+            for item in rows.rows:
+                self.insert_page_row(rows.positions[item.id])
+        elif change.kind == ChangeKind.DELETED:
+            self.remove_page_rows(change.ids, rows.positions, rows.total_rows)
+        else:
+            self.update_page_rows(change.ids, rows.rows)
+
+    def resize(self, total_rows: int):
+        """Grows or shrinks the table to total_rows, rows at the end change"""
+        if total_rows > self.total_rows:
+            all_fetched = self.fetched_rows == self.total_rows
+            self.total_rows = total_rows
+            if all_fetched:
+                self.beginInsertRows(QtCore.QModelIndex(), self.fetched_rows, total_rows - 1)
+                self.fetched_rows = total_rows
+                self.endInsertRows()
+        elif total_rows < self.total_rows:
+            self.total_rows = total_rows
+            if self.fetched_rows > total_rows:
+                self.beginRemoveRows(QtCore.QModelIndex(), total_rows, self.fetched_rows - 1)
+                self.fetched_rows = total_rows
+                self.endRemoveRows()
+
+    def insert_page_row(self, row: int):
+        """Inserts a new item's row, counted in the current order"""
+        all_fetched = self.fetched_rows == self.total_rows
+        self.total_rows += 1
+        self.drop_pages_from(row // self.page_size)
+        if row < self.fetched_rows or all_fetched:
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            self.fetched_rows += 1
+            self.endInsertRows()
+
+    def remove_page_rows(self,
+                         item_ids,
+                         counts: Dict[int, int] | None = None,
+                         total_rows: int | None = None):
+        """Removes rows of deleted items
+
+        Cached rows tell their position. Others are only known in id
+        order, from ``counts`` of the rows before each id once they were
+        deleted. Otherwise the table shrinks to ``total_rows`` and its
+        pages are read again, or without it the model is reset.
+        """
+        # in id order, deleted ids before an id still take rows
+        ranks = {item_id: rank for rank, item_id in enumerate(sorted(item_ids, reverse=self.sort_descending))}
+        rows = set()
+        for item_id in item_ids:
+            position = self.cached_position(item_id)
+            if position is not None:
+                page, offset = position
+                rows.add(page * self.page_size + offset)
+            elif self.sort_field == "id" and counts is not None and item_id in counts:
+                rows.add(counts[item_id] + ranks[item_id])
+            elif total_rows is not None:
+                self.resize(total_rows)
+                self.reload_pages()
+                return
+            else:
+                self.refresh_view()
+                return
+
+        # bottom up, so rows above stay valid while removing
+        for row in sorted(rows, reverse=True):
+            self.total_rows -= 1
+            self.drop_pages_from(row // self.page_size)
+            if row < self.fetched_rows:
+                self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+                self.fetched_rows -= 1
+                self.endRemoveRows()
+
+    def update_page_rows(self, item_ids, rows: List[ItemRow]):
+        """Redraws given items if they sit in a cached page
+
+        An item whose sort value changed moves, and an uncached item
+        might have, then the pages are read again.
+
+        Args:
+            rows: ItemRows of the items, read after the change
+        """
+        located = {}
+        for item_id in item_ids:
+            position = self.cached_position(item_id)
+            if position is None:
+                if self.sort_field != "id":
+                    self.reload_pages()
+                    return
+                continue
+            located[item_id] = position
+        if not located:
+            return
+
+        last_column = self.columnCount() - 1
+        fresh = {item.id: item for item in rows}
+        vanished = [item_id for item_id in located if item_id not in fresh]
+        if vanished:
+            self.remove_page_rows(vanished)
+            return
+
+        for item_id, (page, offset) in located.items():
+            if self.sort_key(fresh[item_id]) != self.sort_key(self.pages[page][offset]):
+                self.reload_pages()
+                return
+        for item_id, (page, offset) in located.items():
+            self.pages[page][offset] = fresh[item_id]
+            row = page * self.page_size + offset
+            self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+
+    def refresh_view(self):
+        """Drops cached pages and lets view read them again"""
+        self.beginResetModel()
+        self.load_items()
+        self.endResetModel()
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        """Builtin method
+        Rows fetched so far, grows as view asks for more.
+        """
+        if parent.isValid():
+            return 0
+        if self.search_ids is not None:
+            return len(self.items)
+        return self.fetched_rows
+
+    def canFetchMore(self, parent=QtCore.QModelIndex()):
+        """Builtin method"""
+        if parent.isValid() or self.search_ids is not None:
+            return False
+        return self.fetched_rows < self.total_rows
+
+    def fetchMore(self, parent=QtCore.QModelIndex()):
+        """Builtin method
+        Exposes next page of rows to the view.
+        """
+        if parent.isValid():
+            return
+        new_count = min(self.fetched_rows + self.page_size, self.total_rows)
+        if new_count <= self.fetched_rows:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self.fetched_rows, new_count - 1)
+        self.fetched_rows = new_count
+        self.endInsertRows()
@@ -1,10 +1,11 @@
 from typing import Any
 from typing import List
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlalchemy import String
 from sqlalchemy import DateTime
 from sqlalchemy import func
+from sqlalchemy import Index
 from sqlalchemy import String
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
@@ -13,17 +14,34 @@ from sqlalchemy.orm import mapped_column
 class Base(DeclarativeBase):
     pass
 
+def utc_now() -> datetime:
+    """Naive UTC with microseconds, so every write moves updated_at"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class Item(Base):
     __tablename__ = "items"
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    sku: Mapped[str] = mapped_column(String(30))
-    name: Mapped[str] = mapped_column(String(30))
-    category: Mapped[str] = mapped_column(String(30))
-    quantity: Mapped[int] = mapped_column()
+    # indexed columns are the sortable ones plus sku lookups
+    sku: Mapped[str] = mapped_column(String(30), index=True)
+    name: Mapped[str] = mapped_column(String(30), index=True)
+    category: Mapped[str] = mapped_column(String(30), index=True)
+    quantity: Mapped[int] = mapped_column(index=True)
     specification: Mapped[Optional[str]] = mapped_column(String(255))
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+    # reorder when quantity is at or below, None uses the category's
+    reorder_threshold: Mapped[Optional[int]]
+    unit_price: Mapped[Optional[float]]
+    # set in Python, SQLite's CURRENT_TIMESTAMP has whole seconds only
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, onupdate=utc_now)
+
+    # fields of the display columns, by column index
+    DISPLAY_FIELDS = ("sku", "name", "category", "quantity", "specification")
+
+    __table_args__ = (
+        # covers reports over items updated in a date window
+        Index("ix_items_updated_report", "updated_at", "category", "quantity", "unit_price"),
+    )
 
     def __init__(self, 
                  name:str = "",
@@ -31,6 +49,8 @@ class Item(Base):
                  category:str = "",
                  quantity:int = 0,
                  specification:str = "",
+                 reorder_threshold:int|None = None,
+                 unit_price:float|None = None,
                  ):
 
         self.name = name
@@ -38,30 +58,17 @@ class Item(Base):
         self.category = category
         self.quantity = quantity
         self.specification = specification
+        self.reorder_threshold = reorder_threshold
+        self.unit_price = unit_price
 
     def __repr__(self) -> str:
         return f"Item(name={self.name!r}, category={self.category!r}, quantity={self.quantity!r})"
 
     def __getitem__(self, column_index):
-        if column_index == 0:
-            return self.sku
-        elif column_index == 1:
-            return self.name
-        elif column_index == 2:
-            return self.category
-        elif column_index == 3:
-            return self.quantity
-        elif column_index == 4:
-            return self.specification
-        else:
+        if not 0 <= column_index < len(self.DISPLAY_FIELDS):
             raise IndexError("Invalid column index")
+        return getattr(self, self.DISPLAY_FIELDS[column_index])
 
     def get_fields(self) -> List[Any]:
         """Item fields to display"""
-        fields = []
-        fields.append(self.sku)
-        fields.append(self.name)
-        fields.append(self.category)
-        fields.append(self.quantity)
-        fields.append(self.specification)
-        return fields
+        return [getattr(self, field) for field in self.DISPLAY_FIELDS]
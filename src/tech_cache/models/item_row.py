@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+
+class ItemRow(NamedTuple):
+    """Item values as a plain tuple, detached from the ORM
+
+    What table models hold, a fraction of an Item's memory. Fields are
+    read by position or by name, both without SQLAlchemy's attribute
+    instrumentation, and rows can't be changed behind the database's
+    back.
+    """
+    id: int
+    sku: str
+    name: str
+    category: str
+    quantity: int
+    specification: Optional[str] = None
+    reorder_threshold: Optional[int] = None
+    unit_price: Optional[float] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
@@ -0,0 +1,49 @@
+from typing import Optional
+from datetime import datetime
+from sqlalchemy import DateTime
+from sqlalchemy import Index
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from tech_cache.models.item import Base
+
+class StockMovement(Base):
+    """One quantity change of an item, rows are only ever appended
+
+    No foreign key to items, the history of a deleted item stays.
+    """
+    __tablename__ = "stock_movements"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    item_id: Mapped[int]
+    delta: Mapped[int]
+    reason: Mapped[Optional[str]] = mapped_column(String(30))
+    created_at: Mapped[datetime] = mapped_column(DateTime)
+
+    __table_args__ = (
+        Index("ix_stock_movements_item", "item_id", "created_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"StockMovement(item_id={self.item_id!r}, delta={self.delta!r}, reason={self.reason!r})"
+
+class StockSnapshot(Base):
+    """Quantity of an item when the snapshot was taken
+
+    ``movement_id`` is the newest ledger row already counted in
+    ``quantity``, later movements are added on top of it.
+    """
+    __tablename__ = "stock_snapshots"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    item_id: Mapped[int]
+    quantity: Mapped[int]
+    movement_id: Mapped[int]
+    taken_at: Mapped[datetime] = mapped_column(DateTime)
+
+    __table_args__ = (
+        Index("ix_stock_snapshots_item", "item_id", "taken_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"StockSnapshot(item_id={self.item_id!r}, quantity={self.quantity!r}, taken_at={self.taken_at!r})"
@@ -0,0 +1,640 @@
+"""Local REST/JSON service for Tech Cache
+
+Exposes DatabaseManager to scanners and dashboards over HTTP, using
+only asyncio from the standard library. Requests are parsed on the event
+loop, database calls run on a thread pool sharing the engine's
+connection pool, so a slow query doesn't hold up other clients.
+
+Endpoints:
+    GET  /items                  list, ?limit=&sort=&desc=1&category=&cursor=
+                                 or ranked search with ?q=&mode=
+    GET  /items/<id>             one item
+    GET  /items/sku/<sku>        first item with a sku
+    POST /items                  add an item from a json object
+    PATCH /items/<id>            json object of the fields to change, with an
+                                 optional "expected_updated_at" from a read
+    POST /items/<sku|id:id>/adjust     {"delta": -1, "expected": 5, "allow_negative": false}
+    POST /items/import           json list of items, ?upsert=1 updates known skus
+    POST /items/<sku|id:id>/threshold  {"threshold": 5}, null uses the category's
+    POST /categories/<name>/threshold  {"threshold": 5}, null removes it
+
+Path segments are percent-encoded, e.g. a category "A/B" is "A%2FB".
+    GET  /alerts/low-stock       items at or below their reorder threshold
+    GET  /reports/categories     totals and turnover per category, ?since=&until=
+                                 limit it to items updated in that UTC window
+
+List responses carry an ETag, a hash of the body. A matching
+If-None-Match is answered with 304 Not Modified, without touching the
+items table as long as nothing was committed since the ETag was sent.
+
+Usage:
+    py -m tech_cache.rest_service --port 8080
+    py -m tech_cache.cli serve --port 8080
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+from http import HTTPStatus
+from typing import Dict
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from tech_cache.commons.database_manager import (DatabaseManager,
+                                                 ConcurrentModificationError,
+                                                 InsufficientStockError,
+                                                 ItemNotFoundError,
+                                                 StockMovementError)
+from tech_cache.config.app_config import AppConfig
+from tech_cache.models.item import Item
+from tech_cache.utils.logger_conf import LoggerConfig
+
+ITEM_COLUMNS = ("id", "sku", "name", "category", "quantity", "specification",
+                "reorder_threshold", "unit_price", "created_at", "updated_at")
+# request bodies above this are refused, imports should be chunked
+MAX_BODY = 16 * 1024 * 1024
+
+
+class HttpError(Exception):
+    """Ends a request with an error status and a json message"""
+    def __init__(self, status: HTTPStatus, message: str):
+        super(HttpError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        self.method = method
+        self.target = target
+        parts = urlsplit(target)
+        # still percent-encoded, dispatch decodes each captured segment
+        # once, so a sku or category may contain an encoded "/"
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Invalid json: {e}")
+
+    def int_param(self, name: str, default: int | None = None) -> int | None:
+        value = self.query.get(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} must be a whole number")
+
+    def flag(self, name: str) -> bool:
+        return self.query.get(name, "").lower() in ("1", "true", "yes")
+
+
+class Response:
+    def __init__(self, status: HTTPStatus = HTTPStatus.OK, body=None, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        if body is None:
+            self.body = b""
+        elif isinstance(body, bytes):
+            self.body = body
+        else:
+            self.body = json.dumps(body, separators=(",", ":")).encode()
+
+    def encode(self, keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {self.status.value} {self.status.phrase}",
+                 f"Content-Length: {len(self.body)}",
+                 "Connection: keep-alive" if keep_alive else "Connection: close"]
+        if self.body:
+            lines.append("Content-Type: application/json")
+        lines.extend(f"{name}: {value}" for name, value in self.headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+def item_to_dict(row) -> Dict:
+    """Json ready values of an item row mapping"""
+    values = {}
+    for column in ITEM_COLUMNS:
+        value = row[column]
+        values[column] = value.isoformat() if isinstance(value, datetime) else value
+    return values
+
+
+def item_values(data, line: int | None = None) -> Dict:
+    """Validates a json object as new item column values
+
+    Raises: HttpError for missing fields or wrong types
+    """
+    where = f"item {line}: " if line is not None else ""
+    if not isinstance(data, dict):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{where}expected a json object")
+    for field in ("sku", "name"):
+        if not isinstance(data.get(field), str) or not data[field]:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"{where}{field} is required")
+    quantity = data.get("quantity", 0)
+    if not isinstance(quantity, int) or isinstance(quantity, bool):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{where}quantity must be a whole number")
+    values = {"sku": data["sku"],
+              "name": data["name"],
+              "category": data.get("category") or "",
+              "quantity": quantity,
+              "specification": data.get("specification"),
+              }
+    # left out unless given, an upsert keeps the item's threshold
+    if "reorder_threshold" in data:
+        values["reorder_threshold"] = threshold_value(data, where)
+    if "unit_price" in data:
+        unit_price = data["unit_price"]
+        if unit_price is not None and (not isinstance(unit_price, (int, float)) or isinstance(unit_price, bool)):
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"{where}unit_price must be a number or null")
+        values["unit_price"] = unit_price
+    return values
+
+
+def item_changes(data) -> Dict:
+    """Validates a json object as changed item column values
+
+    Raises: HttpError for unknown fields or wrong types
+    """
+    changes = {}
+    for field, value in data.items():
+        if field == "expected_updated_at":
+            continue
+        if field not in DatabaseManager.EDITABLE_COLUMNS:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"{field} can't be changed")
+        if field in ("sku", "name"):
+            if not isinstance(value, str) or not value:
+                raise HttpError(HTTPStatus.BAD_REQUEST, f"{field} must be a non empty string")
+        elif field == "category":
+            if not isinstance(value, str):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "category must be a string")
+        elif field == "specification":
+            if value is not None and not isinstance(value, str):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "specification must be a string or null")
+        elif field == "quantity":
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "quantity must be a whole number")
+        elif field == "reorder_threshold":
+            value = threshold_value(data)
+        elif value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool)):
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"{field} must be a number or null")
+        changes[field] = value
+    return changes
+
+
+def threshold_value(data, where: str = "") -> int | None:
+    """Validates the threshold of a json object, None if it is null"""
+    threshold = data.get("reorder_threshold", data.get("threshold"))
+    if threshold is not None and (not isinstance(threshold, int) or isinstance(threshold, bool) or threshold < 0):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{where}threshold must be a whole number or null")
+    return threshold
+
+
+class InventoryService:
+    """Routes HTTP requests to DatabaseManager calls
+
+    Args:
+        workers: threads running database calls, defaults to the size of
+            the engine's connection pool so no worker waits for a
+            connection
+        shared: other processes write to the database too, their
+            changes aren't notified to this one
+    """
+    SORTABLE = ("id", "sku", "name", "category", "quantity")
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 1000
+    # list urls whose last ETag is remembered
+    ETAG_CACHE_SIZE = 1024
+
+    def __init__(self, database: DatabaseManager, workers: int | None = None, shared: bool = False):
+        self.database = database
+        self.shared = shared
+        self.search_engine = None
+        self.stock_alerts = None
+        self.stock_alerts_lock = threading.Lock()
+        self.stock_alerts_version = None
+        self.reports = None
+        self.reports_lock = threading.Lock()
+        self.reports_version = None
+        self.error_logger = logging.getLogger(LoggerConfig.ERROR_LOGGER)
+        pool_size = getattr(database.engine.pool, "size", None)
+        self.executor = ThreadPoolExecutor(workers or (pool_size() if pool_size else 4),
+                                           thread_name_prefix="rest")
+        self.version_connection = None
+        # list url -> (data version, ETag) of its last response
+        self.etags = OrderedDict()
+        self.routes = [
+            ("GET", re.compile(r"/items"), self.list_items),
+            ("GET", re.compile(r"/items/(\d+)"), self.get_item),
+            ("GET", re.compile(r"/items/sku/(.+)"), self.get_item_by_sku),
+            ("POST", re.compile(r"/items"), self.add_item),
+            ("PATCH", re.compile(r"/items/(\d+)"), self.update_item),
+            ("POST", re.compile(r"/items/import"), self.import_items),
+            ("POST", re.compile(r"/items/([^/]+)/adjust"), self.adjust_item),
+            ("POST", re.compile(r"/items/([^/]+)/threshold"), self.set_item_threshold),
+            ("POST", re.compile(r"/categories/([^/]+)/threshold"), self.set_category_threshold),
+            ("GET", re.compile(r"/alerts/low-stock"), self.low_stock),
+            ("GET", re.compile(r"/reports/categories"), self.category_report),
+        ]
+
+    async def call(self, function, *args, **kwargs):
+        """Runs a blocking database call on the worker threads"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, lambda: function(*args, **kwargs))
+
+    def data_version(self) -> int | None:
+        """Changes whenever any connection, in any process, commits
+
+        SQLite's data_version is per connection and ignores the
+        connection's own writes, so a connection which only ever reads
+        it is dedicated to this. Database servers use the change log's
+        version instead, one primary key lookup. None if the database
+        can't tell.
+        """
+        engine = self.database.engine
+        if engine.dialect.name != "sqlite":
+            return self.database.change_version()
+        if engine.url.database in (None, "", ":memory:"):
+            return None
+        if self.version_connection is None:
+            self.version_connection = engine.raw_connection()
+        return self.version_connection.driver_connection.execute("PRAGMA data_version").fetchone()[0]
+
+    async def dispatch(self, request: Request) -> Response:
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = pattern.fullmatch(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            try:
+                return await handler(request, *(unquote(group) for group in match.groups()))
+            except HttpError as e:
+                return Response(e.status, {"error": e.message})
+            except ItemNotFoundError as e:
+                return Response(HTTPStatus.NOT_FOUND, {"error": str(e)})
+            except (ConcurrentModificationError, InsufficientStockError, StockMovementError) as e:
+                return Response(HTTPStatus.CONFLICT, {"error": str(e)})
+            except Exception:
+                self.error_logger.exception(f"{request.method} {request.target} failed")
+                return Response(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal error"})
+        if allowed:
+            return Response(HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"})
+        return Response(HTTPStatus.NOT_FOUND, {"error": f"No route {request.path}"})
+
+    @staticmethod
+    def encode_cursor(key) -> str:
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str, sort: str = "id"):
+        """Keyset key of a cursor, (id,) or (sort value, id)
+
+        Raises: HttpError if the cursor doesn't fit the sort
+        """
+        try:
+            key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+        if not isinstance(key, list) or len(key) != (1 if sort == "id" else 2):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+        value_type = int if sort == "quantity" else str
+        values_ok = all(isinstance(value, value_type) for value in key[:-1])
+        if not values_ok or not isinstance(key[-1], int) or any(isinstance(value, bool) for value in key):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid cursor")
+        return tuple(key)
+
+    async def list_items(self, request: Request) -> Response:
+        """One page of items, or search results when ``q`` is given
+
+        Pages are keyset paged, ``next`` is the cursor of the page after
+        this one or null on the last page.
+        """
+        limit = min(max(request.int_param("limit", self.DEFAULT_LIMIT), 1), self.MAX_LIMIT)
+        sort = request.query.get("sort", "id")
+        if sort not in self.SORTABLE:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"sort must be one of {', '.join(self.SORTABLE)}")
+
+        # the version is read before the items, a write in between only
+        # makes the next request miss the cache. On SQLite reading it is
+        # a memory lookup, it stays on the event loop
+        version = self.data_version()
+        if_none_match = request.headers.get("if-none-match")
+        cached = self.etags.get(request.target)
+        if version is not None and cached == (version, if_none_match):
+            self.etags.move_to_end(request.target)
+            return Response(HTTPStatus.NOT_MODIFIED, headers={"ETag": if_none_match})
+
+        if "q" in request.query:
+            body = await self.call(self.search_page, request.query["q"],
+                                   request.query.get("mode", "auto"), limit)
+        else:
+            cursor = request.query.get("cursor")
+            body = await self.call(self.items_page,
+                                   self.decode_cursor(cursor, sort) if cursor else None,
+                                   limit,
+                                   sort,
+                                   request.flag("desc"),
+                                   request.query.get("category"))
+        response = Response(HTTPStatus.OK, body)
+        etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+        if version is not None:
+            self.etags[request.target] = (version, etag)
+            self.etags.move_to_end(request.target)
+            if len(self.etags) > self.ETAG_CACHE_SIZE:
+                self.etags.popitem(last=False)
+        if if_none_match == etag:
+            # other items changed, this page didn't
+            return Response(HTTPStatus.NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        return response
+
+    def items_page(self, after_key, limit, sort, descending, category) -> Dict:
+        where = Item.category == category if category else None
+        rows = self.database.get_item_rows(where, after_key, limit, sort, descending)
+        next_cursor = None
+        if len(rows) == limit:
+            last = rows[-1]
+            key = [last["id"]] if sort == "id" else [last[sort], last["id"]]
+            next_cursor = self.encode_cursor(key)
+        return {"items": [item_to_dict(row) for row in rows], "next": next_cursor}
+
+    def search_page(self, text: str, mode: str, limit: int) -> Dict:
+        if self.search_engine is None:
+            from tech_cache.commons.search_engine import SearchEngine
+            self.search_engine = SearchEngine(self.database)
+        try:
+            ids = self.search_engine.search(text, mode, limit)
+        except ValueError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e))
+        found = {row["id"]: row for row in self.database.get_item_rows(Item.id.in_(ids))}
+        return {"items": [item_to_dict(found[item_id]) for item_id in ids if item_id in found],
+                "next": None}
+
+    @staticmethod
+    def json_object(request: Request) -> Dict:
+        data = request.json()
+        if not isinstance(data, dict):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "expected a json object")
+        return data
+
+    async def get_row(self, where, missing: str) -> Response:
+        rows = await self.call(self.database.get_item_rows, where, limit=1)
+        if not rows:
+            raise ItemNotFoundError(missing)
+        return Response(HTTPStatus.OK, item_to_dict(rows[0]))
+
+    async def get_item(self, request: Request, item_id: str) -> Response:
+        return await self.get_row(Item.id == int(item_id), f"No item with id {item_id}")
+
+    async def get_item_by_sku(self, request: Request, sku: str) -> Response:
+        return await self.get_row(Item.sku == sku, f"No item with sku {sku!r}")
+
+    async def add_item(self, request: Request) -> Response:
+        values = item_values(request.json())
+        item_id = await self.call(self.database.add_item, Item(**values))
+        response = await self.get_row(Item.id == item_id, f"No item with id {item_id}")
+        response.status = HTTPStatus.CREATED
+        response.headers["Location"] = f"/items/{item_id}"
+        return response
+
+    async def update_item(self, request: Request, item_id: str) -> Response:
+        """Writes only the given fields, 409 if the item changed since expected_updated_at"""
+        data = self.json_object(request)
+        changes = item_changes(data)
+        expected = data.get("expected_updated_at")
+        if expected is not None:
+            try:
+                expected = datetime.fromisoformat(expected)
+            except (TypeError, ValueError):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "expected_updated_at must be an ISO date and time")
+        await self.call(self.database.update_item, int(item_id), changes, expected_updated_at=expected)
+        return await self.get_row(Item.id == int(item_id), f"No item with id {item_id}")
+
+    async def adjust_item(self, request: Request, key: str) -> Response:
+        data = self.json_object(request)
+        delta, expected = data.get("delta"), data.get("expected")
+        if not isinstance(delta, int) or (expected is not None and not isinstance(expected, int)):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "delta and expected must be whole numbers")
+        reason = data.get("reason")
+        if reason is not None and not isinstance(reason, str):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "reason must be a string")
+        quantity = await self.call(self.database.adjust_quantity,
+                                   DatabaseManager.item_key(key),
+                                   delta,
+                                   expected_quantity=expected,
+                                   allow_negative=bool(data.get("allow_negative")),
+                                   reason=reason)
+        return Response(HTTPStatus.OK, {"item": key, "quantity": quantity})
+
+    async def set_item_threshold(self, request: Request, key: str) -> Response:
+        threshold = threshold_value(self.json_object(request))
+        item_id = await self.call(self.database.set_reorder_threshold,
+                                  DatabaseManager.item_key(key), threshold)
+        return await self.get_row(Item.id == item_id, f"No item with id {item_id}")
+
+    async def set_category_threshold(self, request: Request, category: str) -> Response:
+        threshold = threshold_value(self.json_object(request))
+        count = await self.call(self.database.set_category_threshold, category, threshold)
+        return Response(HTTPStatus.OK, {"category": category, "threshold": threshold, "items": count})
+
+    async def low_stock(self, request: Request) -> Response:
+        items = await self.call(self.low_stock_items, self.data_version())
+        return Response(HTTPStatus.OK, {"items": [asdict(item) for item in items]})
+
+    def low_stock_items(self, version: int | None):
+        """Low items from the monitor, it follows this process' writes
+
+        Writes of other processes aren't notified, a shared database
+        reloads the monitor once it changed.
+        """
+        with self.stock_alerts_lock:
+            if self.stock_alerts is None:
+                from tech_cache.commons.stock_alerts import StockAlertMonitor
+                self.stock_alerts = StockAlertMonitor(self.database)
+                self.stock_alerts.load()
+            elif self.shared and (version is None or version != self.stock_alerts_version):
+                self.stock_alerts.load()
+            self.stock_alerts_version = version
+            return self.stock_alerts.low_stock()
+
+    async def category_report(self, request: Request) -> Response:
+        try:
+            since, until = (datetime.fromisoformat(request.query[name]) if request.query.get(name) else None
+                            for name in ("since", "until"))
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "since and until must be ISO dates")
+        report = await self.call(self.category_report_data, since, until, self.data_version())
+        return Response(HTTPStatus.OK, {
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+            "turnover_since": report.turnover_since.isoformat(),
+            "categories": [dict(asdict(category), turnover=category.turnover) for category in report.categories],
+            "total": dict(asdict(report.total), turnover=report.total.turnover),
+        })
+
+    def category_report_data(self, since: datetime | None, until: datetime | None, version: int | None):
+        """Report from the cached engine, a shared database drops the cache once it changed"""
+        with self.reports_lock:
+            if self.reports is None:
+                from tech_cache.commons.reports import ReportEngine
+                self.reports = ReportEngine(self.database)
+            elif self.shared and (version is None or version != self.reports_version):
+                self.reports.invalidate()
+            self.reports_version = version
+            reports = self.reports
+        return reports.report(since, until)
+
+    async def import_items(self, request: Request) -> Response:
+        """Adds all items in one transaction, nothing is written on errors"""
+        data = request.json()
+        if not isinstance(data, list):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "expected a json list of items")
+        rows = [item_values(row, line) for line, row in enumerate(data, start=1)]
+        inserted, updated = await self.call(self.database.bulk_add_items, rows,
+                                            upsert=request.flag("upsert"))
+        return Response(HTTPStatus.OK, {"inserted": inserted, "updated": updated})
+
+    async def read_request(self, reader: asyncio.StreamReader) -> Request | None:
+        """Reads one request, None when the client closed the connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length < 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method, target, headers, body)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves requests of one keep-alive connection in order"""
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HttpError as e:
+                    writer.write(Response(e.status, {"error": e.message}).encode(False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                response = await self.dispatch(request)
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080, reuse_port: bool = False):
+        server = await asyncio.start_server(self.handle_connection, host, port,
+                                            backlog=1024, reuse_port=reuse_port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.version_connection is not None:
+            self.version_connection.close()
+            self.version_connection = None
+
+
+def serve_process(db_url: str, host: str, port: int, reuse_port: bool):
+    service = InventoryService(DatabaseManager(db_url), shared=reuse_port)
+    try:
+        asyncio.run(service.serve(host, port, reuse_port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+def run(db_url: str = AppConfig.db_url,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        processes: int = 1):
+    """Serves the database at db_url until interrupted
+
+    One process is bound by the GIL to a core, with ``processes`` above
+    one every process listens on the same port (SO_REUSEPORT, not on
+    Windows) and the kernel spreads connections between them. SQLite in
+    WAL mode lets them all read at once.
+    """
+    print(f"Serving {db_url} on http://{host}:{port} with {processes} process(es)")
+    if processes == 1:
+        serve_process(db_url, host, port, False)
+        return
+
+    import multiprocessing
+    import signal
+    import sys
+
+    workers = [multiprocessing.Process(target=serve_process, args=(db_url, host, port, True))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    # stopping the parent stops the workers
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for worker in workers:
+            worker.join()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="tech_cache.rest_service",
+                                     description="Tech Cache REST/JSON service")
+    parser.add_argument("--db",
+                        default=os.environ.get("TECH_CACHE_DB_URL", AppConfig.db_url),
+                        help="database url, defaults to $TECH_CACHE_DB_URL or %(default)s")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--processes", type=int, default=1, help="server processes sharing the port")
+    args = parser.parse_args(argv)
+    run(args.db, args.host, args.port, args.processes)
+
+
+if __name__ == "__main__":
+    main()
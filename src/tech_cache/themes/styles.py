@@ -65,6 +65,16 @@ QSpinBox {{
     color: {text};
 }}
 
+QWidget#notification, QWidget#notification QLabel {{
+    background-color: {surface0};
+    color: {peach};
+}}
+
+QWidget#notification {{
+    border: 1px solid {peach};
+    border-radius: 6px;
+}}
+
 
 """
 
@@ -0,0 +1,186 @@
+import logging
+import queue
+import threading
+from typing import Callable, Dict, List, Tuple
+from PyQt6 import QtCore
+from tech_cache.commons.database_manager import DatabaseManager, ItemNotFoundError, StockMovementError
+from tech_cache.utils.logger_conf import LoggerConfig
+
+
+class WorkerSignals(QtCore.QObject):
+    # job id and the call's return value or exception
+    finished = QtCore.pyqtSignal(int, object)
+    failed = QtCore.pyqtSignal(int, object)
+    # job id and whatever the call passed to its progress callback
+    progress = QtCore.pyqtSignal(int, object)
+
+
+class Job:
+    def __init__(self, job_id: int, function: Callable, args: Tuple, kwargs: Dict,
+                 on_done: Callable | None, on_error: Callable | None, on_progress: Callable | None):
+        self.id = job_id
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+
+
+class DatabaseWorker(QtCore.QThread):
+    """Runs database calls on one background thread, in submission order
+
+    The GUI thread only queues calls, results, errors and progress come
+    back through signals and are handed to the callbacks given on submit,
+    on the GUI thread. One thread keeps writes in the order they were
+    made. Quantity changes queued while the thread is busy are
+    coalesced and applied in one transaction.
+    """
+    def __init__(self, database: DatabaseManager, parent=None):
+        super(DatabaseWorker, self).__init__(parent)
+        self.database = database
+        self.error_logger = logging.getLogger(LoggerConfig.ERROR_LOGGER)
+        self.jobs = queue.Queue()
+        self.next_id = 0
+        # job id -> job, until its result is delivered
+        self.pending: Dict[int, Job] = {}
+        # (item id, delta, reason, job id) waiting for the next flush
+        self.movements: List[Tuple] = []
+        self.movements_lock = threading.Lock()
+
+        self.signals = WorkerSignals()
+        self.signals.finished.connect(self.on_finished)
+        self.signals.failed.connect(self.on_failed)
+        self.signals.progress.connect(self.on_progress)
+        self.start()
+
+    def submit(self,
+               function: Callable,
+               *args,
+               on_done: Callable | None = None,
+               on_error: Callable | None = None,
+               on_progress: Callable | None = None,
+               **kwargs) -> int:
+        """Queues ``function(*args, **kwargs)``
+
+        Args:
+            on_done: called with the return value
+            on_error: called with the exception, errors are logged
+                without it
+            on_progress: passed as the function's ``progress`` keyword,
+                called with what the function reports
+
+        Returns: job id
+        """
+        job = Job(self.next_id, function, args, kwargs, on_done, on_error, on_progress)
+        self.next_id += 1
+        self.pending[job.id] = job
+        self.jobs.put(job)
+        return job.id
+
+    def adjust(self,
+               item_id: int,
+               delta: int,
+               reason: str | None = None,
+               on_done: Callable | None = None,
+               on_error: Callable | None = None) -> int:
+        """Queues a quantity change, coalesced with others queued meanwhile
+
+        Args:
+            on_done: called with the item's quantity after the batch
+            on_error: called with the exception of a rejected change
+
+        Returns: job id
+        """
+        job = Job(self.next_id, None, (), {}, on_done, on_error, None)
+        self.next_id += 1
+        self.pending[job.id] = job
+        with self.movements_lock:
+            self.movements.append((item_id, delta, reason, job.id))
+            first = len(self.movements) == 1
+        if first:
+            self.jobs.put(self.flush_movements)
+        return job.id
+
+    def flush_movements(self):
+        """Applies queued movements, one transaction per reason"""
+        with self.movements_lock:
+            movements, self.movements = self.movements, []
+        by_reason: Dict[str | None, List[Tuple]] = {}
+        for movement in movements:
+            by_reason.setdefault(movement[2], []).append(movement)
+
+        for reason, batch in by_reason.items():
+            try:
+                self.database.apply_movements([(item_id, delta) for item_id, delta, _, _ in batch],
+                                              reason=reason)
+            except (StockMovementError, ItemNotFoundError):
+                # one rejected change or unknown item fails the batch,
+                # find it by applying them one by one
+                for item_id, delta, _, job_id in batch:
+                    try:
+                        quantity = self.database.adjust_quantity(item_id, delta, reason=reason)
+                    except Exception as e:
+                        self.signals.failed.emit(job_id, e)
+                    else:
+                        self.signals.finished.emit(job_id, quantity)
+                continue
+            except Exception as e:
+                for _, _, _, job_id in batch:
+                    self.signals.failed.emit(job_id, e)
+                continue
+
+            quantities = {row["id"]: row["quantity"]
+                          for row in self.database.get_stock_levels({item_id for item_id, _, _, _ in batch})}
+            for item_id, _, _, job_id in batch:
+                self.signals.finished.emit(job_id, quantities.get(item_id))
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            if not isinstance(job, Job):
+                try:
+                    job()
+                except Exception:
+                    self.error_logger.exception("Database worker task failed")
+                continue
+
+            kwargs = job.kwargs
+            if job.on_progress is not None:
+                job_id = job.id
+                kwargs = dict(kwargs, progress=lambda value: self.signals.progress.emit(job_id, value))
+            try:
+                result = job.function(*job.args, **kwargs)
+            except Exception as e:
+                self.signals.failed.emit(job.id, e)
+            else:
+                self.signals.finished.emit(job.id, result)
+
+    def shutdown(self, wait: bool = True):
+        """Stops the thread after the queued jobs ran"""
+        self.jobs.put(None)
+        if wait:
+            self.wait()
+
+    def on_finished(self, job_id: int, result):
+        job = self.pending.pop(job_id, None)
+        if job is not None and job.on_done is not None:
+            job.on_done(result)
+
+    def on_failed(self, job_id: int, error):
+        job = self.pending.pop(job_id, None)
+        if job is not None and job.on_error is not None:
+            job.on_error(error)
+        else:
+            self.error_logger.error("Database job failed", exc_info=error)
+
+    def on_progress(self, job_id: int, value):
+        job = self.pending.get(job_id)
+        if job is not None and job.on_progress is not None:
+            job.on_progress(value)
+
+    def busy(self) -> bool:
+        """Jobs are queued or their results not delivered yet"""
+        return bool(self.pending)
@@ -1,3 +1,17 @@
 def generate_sku(category, size, material):
     return f"{category}-{size}-{material}"
 
+
+def generate_barcode(sku, output_path, settings=None):
+    """Writes a Code128 barcode of sku to output_path.svg"""
+    from tech_cache.commons.label_manager import LabelSettings, render_barcode_svg
+
+    with open(f'{output_path}.svg', "wb") as f:
+        f.write(render_barcode_svg(sku, settings or LabelSettings()))
+
+def generate_qr_code(data, output_path, settings=None):
+    """Writes a QR code of data to output_path.png"""
+    from tech_cache.commons.label_manager import LabelSettings, render_qr_png
+
+    with open(f'{output_path}.png', "wb") as f:
+        f.write(render_qr_png(data, settings or LabelSettings()))
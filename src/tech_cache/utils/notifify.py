@@ -1,6 +1,6 @@
 from PyQt6 import QtWidgets
 from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
-from PyQt6.QtCore import QTimer
+from PyQt6.QtCore import QTimer, Qt
 
 def show_yes_no_dialog(parent, 
                        title:str, 
@@ -14,18 +14,31 @@ def show_yes_no_dialog(parent,
             return reply == QtWidgets.QMessageBox.StandardButton.Yes
 
 class NotificationWidget(QWidget):
-    def __init__(self, message, duration=2000):
-        super().__init__()
+    """Message which hides itself after duration milliseconds
+
+    With a parent it floats over the parent's top right corner.
+    """
+    def __init__(self, message, duration=2000, parent=None):
+        super().__init__(parent)
         self.initUI(message, duration)
 
     def initUI(self, message, duration):
+        self.setObjectName("notification")
+        self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
         self.label = QLabel(message)
+        self.label.setWordWrap(True)
         layout = QVBoxLayout()
         layout.addWidget(self.label)
         self.setLayout(layout)
 
         # Set the position and size
-        self.setGeometry(700, 30, 200, 50)  # Adjust these values as needed
+        if self.parent() is None:
+            self.setGeometry(700, 30, 200, 50)  # Adjust these values as needed
+        else:
+            width = 300
+            self.setFixedWidth(width)
+            self.adjustSize()
+            self.move(self.parent().width() - width - 20, 30)
 
         # Set a QTimer to hide the notification after 'duration' milliseconds
         QTimer.singleShot(duration, self.hide)
@@ -0,0 +1,102 @@
+import logging
+import threading
+from PyQt6 import QtCore
+from tech_cache.commons.search_engine import SearchCancelled, SearchEngine
+from tech_cache.utils.logger_conf import LoggerConfig
+
+
+class SearchSignals(QtCore.QObject):
+    # generation, ranked ids, items in ranked order
+    finished = QtCore.pyqtSignal(int, object, object)
+
+
+class SearchTask(QtCore.QRunnable):
+    """Runs one search on a pool thread
+
+    Matching items are read on the pool thread as well, so the GUI
+    thread only swaps them into the model.
+    """
+    def __init__(self, engine: SearchEngine, text: str, mode: str, generation: int,
+                 cancel_event: threading.Event, signals: SearchSignals):
+        super(SearchTask, self).__init__()
+        self.engine = engine
+        self.text = text
+        self.mode = mode
+        self.generation = generation
+        self.cancel_event = cancel_event
+        self.signals = signals
+
+    def run(self):
+        if self.cancel_event.is_set():
+            return
+        try:
+            ids = self.engine.search(self.text, self.mode, cancelled=self.cancel_event.is_set)
+            found = {item.id: item for item in self.engine.db_manager.get_rows(ids)}
+        except SearchCancelled:
+            return
+        except Exception:
+            logging.getLogger(LoggerConfig.ERROR_LOGGER).exception(
+                    f"Search for {self.text!r} failed")
+            return
+
+        if not self.cancel_event.is_set():
+            items = [found[item_id] for item_id in ids if item_id in found]
+            self.signals.finished.emit(self.generation, ids, items)
+
+
+class SearchController(QtCore.QObject):
+    """Debounces typed search text and searches off the GUI thread
+
+    Every new text cancels the search in flight, and results of anything
+    but the latest text are dropped, so only the newest result set
+    reaches the model.
+    """
+    # ranked ids and their items, None when search was cleared
+    results_ready = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, engine: SearchEngine, mode: str = "auto", delay_ms: int = 150, parent=None):
+        super(SearchController, self).__init__(parent)
+        self.engine = engine
+        self.mode = mode
+        self.text = ""
+        self.generation = 0
+        self.cancel_event = threading.Event()
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.start_search)
+
+        # one worker, a cancelled search finishes before the next starts
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.signals = SearchSignals(self)
+        self.signals.finished.connect(self.on_search_finished)
+
+    def set_text(self, text: str):
+        """Slot for search input, restarts debounce timer"""
+        self.text = text
+        self.generation += 1
+        self.cancel_event.set()
+
+        if text.strip():
+            self.timer.start()
+        else:
+            self.timer.stop()
+            self.results_ready.emit(None, None)
+
+    def start_search(self):
+        self.cancel_event = threading.Event()
+        self.pool.start(SearchTask(self.engine, self.text, self.mode, self.generation,
+                                   self.cancel_event, self.signals))
+
+    def on_search_finished(self, generation: int, ids, items):
+        if generation == self.generation:
+            self.results_ready.emit(ids, items)
+
+    def shutdown(self):
+        """Cancels pending work and waits for the worker to finish"""
+        self.timer.stop()
+        self.cancel_event.set()
+        self.pool.waitForDone()
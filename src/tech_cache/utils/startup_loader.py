@@ -0,0 +1,73 @@
+import logging
+from PyQt6 import QtCore
+from tech_cache.config.app_config import AppConfig
+from tech_cache.utils.logger_conf import LoggerConfig
+from tech_cache.utils.startup_profiler import StartupProfiler
+
+
+class StartupData:
+    """What the main window needs before it can show items"""
+    def __init__(self, database, search_engine, sku_index, stock_alerts, items, change_feed=None):
+        self.database = database
+        self.search_engine = search_engine
+        self.sku_index = sku_index
+        self.stock_alerts = stock_alerts
+        # preloaded rows for the eager model, None for the paged one
+        self.items = items
+        # follows other processes' changes from before the rows were read
+        self.change_feed = change_feed
+
+
+class LoaderSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+
+class StartupLoader(QtCore.QRunnable):
+    """Connects to the database and reads initial rows off the GUI thread
+
+    Database modules, and with them SQLAlchemy, are first imported here,
+    so the window shell doesn't wait for them.
+    """
+    def __init__(self, config: AppConfig, profiler: StartupProfiler):
+        super(StartupLoader, self).__init__()
+        self.config = config
+        self.profiler = profiler
+        self.signals = LoaderSignals()
+
+    def run(self):
+        try:
+            with self.profiler.phase("import database layer"):
+                from tech_cache.commons.change_feed import ChangeFeed
+                from tech_cache.commons.database_manager import DatabaseManager
+                from tech_cache.commons.search_engine import SearchEngine
+                from tech_cache.commons.sku_index import SkuIndex
+                from tech_cache.commons.stock_alerts import StockAlertMonitor
+
+            with self.profiler.phase("open database"):
+                database = DatabaseManager(self.config.db_url, profile=self.config.engine_profile)
+                change_feed = None
+                if self.config.change_poll_ms > 0:
+                    change_feed = ChangeFeed(database, self.config.change_poll_ms / 1000)
+
+            with self.profiler.phase("search index"):
+                search_engine = SearchEngine(database, self.config.search_limit)
+
+            with self.profiler.phase("sku index"):
+                sku_index = SkuIndex(database)
+                sku_index.load()
+
+            with self.profiler.phase("low stock"):
+                stock_alerts = StockAlertMonitor(database)
+                stock_alerts.load()
+
+            items = None
+            if not self.config.lazy_loading:
+                with self.profiler.phase("read items"):
+                    items = database.get_rows()
+        except Exception as e:
+            logging.getLogger(LoggerConfig.ERROR_LOGGER).exception("Startup loading failed")
+            self.signals.failed.emit(str(e))
+            return
+
+        self.signals.finished.emit(StartupData(database, search_engine, sku_index, stock_alerts, items, change_feed))
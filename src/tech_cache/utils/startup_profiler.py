@@ -0,0 +1,46 @@
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """Collects timings of startup phases
+
+    Phases may run on different threads, so each one records its own
+    duration and the time it finished, counted from ``started``.
+    """
+    def __init__(self, started: float | None = None, enabled: bool = True):
+        self.started = started if started is not None else time.perf_counter()
+        self.enabled = enabled
+        self.phases = []
+        self.lock = threading.Lock()
+
+    def record(self, name: str, duration: float):
+        finished = time.perf_counter() - self.started
+        with self.lock:
+            self.phases.append((name, threading.current_thread().name, duration, finished))
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def mark(self, name: str):
+        """Records a point in time, e.g. first event loop iteration"""
+        self.record(name, 0.0)
+
+    def report(self, stream=None):
+        """Prints a per phase breakdown if profiling is enabled"""
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        print(f"{'phase':<32}{'thread':<16}{'took ms':>10}{'done at ms':>12}", file=stream)
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[3])
+        for name, thread, duration, finished in phases:
+            print(f"{name:<32}{thread[:15]:<16}{duration * 1000:>10.1f}{finished * 1000:>12.1f}",
+                  file=stream)
@@ -7,6 +7,9 @@ from tech_cache.utils.notifify import show_yes_no_dialog
 
 
 class BaseItemDialog(QtWidgets.QDialog, Ui_edit_item_dialog):
+    # item fields the dialog edits
+    FIELDS = ("name", "sku", "category", "quantity", "specification")
+
     def __init__(self, item: Item | None = None, parent=None):
         super().__init__(parent)
         self.error_logger = logging.getLogger(LoggerConfig.ERROR_LOGGER)
@@ -18,6 +21,8 @@ class BaseItemDialog(QtWidgets.QDialog, Ui_edit_item_dialog):
         self.setup_listeners()
         self.button_signals()
         self.item = item if item else Item()
+        # field values when the dialog opened, to tell what was edited
+        self.original = {field: getattr(self.item, field) for field in self.FIELDS}
 
         # state variables
         self.unsaved_changes = False # state variable
@@ -133,6 +138,12 @@ class BaseItemDialog(QtWidgets.QDialog, Ui_edit_item_dialog):
         # Change to saved
         self.unsaved_changes = False
 
+    @property
+    def changes(self) -> dict:
+        """Fields whose applied value differs from the one the dialog opened with"""
+        return {field: getattr(self.item, field) for field in self.FIELDS
+                if getattr(self.item, field) != self.original[field]}
+
     def reset_fields(self):
         self.nameInput.clear()
         self.skuInput.clear()
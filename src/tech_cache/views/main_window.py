@@ -2,54 +2,55 @@ import logging
 from PyQt6 import QtWidgets, QtCore, QtGui
 
 from tech_cache.config.app_config import AppConfig
-from tech_cache.models.inventory_table_model import InventoryTableModel
-from tech_cache.commons.database_manager import DatabaseManager
-from tech_cache.commons.export_manager import ExportManager
 from tech_cache.ui.ui_main_window import Ui_MainWindow
 from tech_cache.utils.logger_conf import LoggerConfig
-from tech_cache.views.edit_item_dialog import AddItemDialog, EditItemDialog
+from tech_cache.utils.notifify import NotificationWidget
+from tech_cache.utils.startup_loader import StartupData, StartupLoader
+from tech_cache.utils.startup_profiler import StartupProfiler
 from tech_cache.themes.styles import stylesheet_template, colors
 
+# database, model and dialog modules pull in SQLAlchemy, they are imported
+# once the startup loader has the database ready
+
 class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
     """Entry point of the application
 
     Initilises all componenets and listens to signals
     Executes user signals.
     """
-    def __init__(self) -> None:
+    # items which dropped to their reorder threshold, ids of restocked
+    # ones. Carries the stock alert monitor's calls over to the GUI thread
+    low_stock_changed = QtCore.pyqtSignal(list, list)
+
+    def __init__(self, profiler: StartupProfiler | None = None) -> None:
         super(MainWindow, self).__init__()
         # setup loggers
         self.error_logger = logging.getLogger(LoggerConfig.ERROR_LOGGER)
         self.action_logger = logging.getLogger(LoggerConfig.ACTION_LOGGER)
+        self.profiler = profiler or StartupProfiler(enabled=False)
 
         # setup
         self.init_add_item_button()         
         self.setupUi(self)                  
         self.setWindowTitle('Tech Cache')   
-        self.showFullScreen()
         self.apply_stylesheet()
 
         # init componenents, config, db etc
         self.init_components()
 
-        # setup filtering proxy for tableview
-        self.filter_proxy_model = QtCore.QSortFilterProxyModel()
-        self.filter_proxy_model.setSourceModel(self.model)
-        self.filter_proxy_model.setFilterCaseSensitivity(QtCore.Qt.CaseSensitivity.CaseInsensitive)
-        self.filter_proxy_model.setFilterKeyColumn(-1) # search all columns
-
-        # set views
         self.tableView.horizontalHeader().setStretchLastSection(True)
-        # self.tableView.setModel(self.model)
-        self.tableView.setModel(self.filter_proxy_model)
-        self.tableView.setSortingEnabled(True)
+        # ctrl and shift pick many rows for bulk edits
+        self.tableView.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.tableView.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
 
         # set signals and slots
         self.action_export_as.triggered.connect(self.handle_export_action)
         self.action_import.triggered.connect(self.handle_import_action)
-        self.tableView.doubleClicked.connect(self.onRowDoubleClicked)
         self.add_item_button.clicked.connect(self.on_add_button_clicked)
-        self.search_input.textChanged.connect(self.filter_proxy_model.setFilterRegularExpression)
+        self.init_stock_menu()
+
+        # until the database is loaded
+        self.set_data_actions_enabled(False)
         
         # update positons
         self.update_button_position()
@@ -57,14 +58,300 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
     def init_components(self):
         """
         Creates config
-        Connects to database
-        creates model for item table view
-        creates export managaer
+        Starts connecting to database in the background, the rest of the
+        components is created in on_data_loaded
         """
         self.config = AppConfig()
-        self.database = DatabaseManager()
-        self.model = InventoryTableModel(self.database, self.config)
-        self.export_manager = ExportManager(self.database)
+        self.database = None
+        self.model = None
+        self.search_engine = None
+        self.search_controller = None
+        self.sku_index = None
+        self.scan_widget = None
+        self.stock_alerts = None
+        self.notification = None
+        self.summary_panel = None
+        self.db_worker = None
+        self.change_feed = None
+        self._export_manager = None
+
+        self.loader = StartupLoader(self.config, self.profiler)
+        self.loader.signals.finished.connect(self.on_data_loaded)
+        self.loader.signals.failed.connect(self.on_data_load_failed)
+        QtCore.QThreadPool.globalInstance().start(self.loader)
+
+    def on_data_loaded(self, data: StartupData):
+        """
+        Creates model for item table view from preloaded rows
+        creates search controller
+        enables actions which need the database
+        """
+        with self.profiler.phase("build model"):
+            from tech_cache.models.inventory_table_model import (InventoryTableModel,
+                                                                 PagedInventoryTableModel)
+            from tech_cache.utils.search_controller import SearchController
+            from tech_cache.views.scan_widget import ScanWidget
+            from tech_cache.views.summary_panel import SummaryPanel
+            from tech_cache.commons.reports import ReportEngine
+            from tech_cache.utils.database_worker import DatabaseWorker
+
+            self.database = data.database
+            self.search_engine = data.search_engine
+            self.sku_index = data.sku_index
+            self.stock_alerts = data.stock_alerts
+            # the window's reads and writes run on this thread
+            self.db_worker = DatabaseWorker(self.database, parent=self)
+            if self.config.lazy_loading:
+                self.model = PagedInventoryTableModel(self.database, self.config)
+            else:
+                self.model = InventoryTableModel(self.database, self.config, items=data.items)
+            self.search_controller = SearchController(self.search_engine,
+                                                      self.config.search_mode,
+                                                      self.config.search_delay_ms,
+                                                      parent=self)
+
+            # set views, filtering is done by the search engine
+            self.tableView.setModel(self.model)
+            # no initial sort indicator, rows start in the database's id order
+            self.tableView.horizontalHeader().setSortIndicator(-1, QtCore.Qt.SortOrder.AscendingOrder)
+            self.tableView.setSortingEnabled(True)
+
+            self.tableView.doubleClicked.connect(self.onRowDoubleClicked)
+            self.search_input.textChanged.connect(self.search_controller.set_text)
+            self.search_controller.results_ready.connect(self.model.show_search_results)
+
+            # scan bar sits between search input and table, shown in scan mode
+            self.scan_widget = ScanWidget(self.database, self.sku_index, self.db_worker,
+                                          parent=self.centralwidget)
+            self.scan_widget.item_scanned.connect(self.select_item)
+            self.scan_widget.setVisible(self.action_scan_mode.isChecked())
+            self.gridLayout.addWidget(self.scan_widget, 1, 0, 1, 3)
+
+            self.low_stock_changed.connect(self.on_low_stock_changed)
+            self.stock_alerts.subscribe(self.low_stock_changed.emit)
+            low_count = self.stock_alerts.count()
+            self.update_low_stock_action(low_count)
+            if low_count:
+                self.show_notification(f"{low_count} items are low on stock")
+
+            self.summary_panel = SummaryPanel(ReportEngine(self.database),
+                                              self.config.summary_refresh_ms,
+                                              parent=self)
+            self.addDockWidget(QtCore.Qt.DockWidgetArea.RightDockWidgetArea, self.summary_panel)
+            self.summary_panel.setVisible(self.action_summary.isChecked())
+            self.summary_panel.visibilityChanged.connect(self.on_summary_visibility_changed)
+            self.set_data_actions_enabled(True)
+
+            # listeners are in place, other workbenches' changes can come in
+            self.change_feed = data.change_feed
+            if self.change_feed is not None:
+                self.change_feed.start()
+            # text typed while loading
+            if self.search_input.text():
+                self.search_controller.set_text(self.search_input.text())
+
+        self.profiler.mark("data shown")
+        self.profiler.report()
+
+    def on_data_load_failed(self, message: str):
+        QtWidgets.QMessageBox.critical(self,
+                                       "Database",
+                                       f"Could not open the database: {message}")
+
+    def set_data_actions_enabled(self, enabled: bool):
+        """Toggles widgets which need the database"""
+        self.add_item_button.setEnabled(enabled)
+        self.action_import.setEnabled(enabled)
+        self.action_export_as.setEnabled(enabled)
+        self.action_scan_mode.setEnabled(enabled)
+        self.action_low_stock.setEnabled(enabled)
+        self.action_reorder_threshold.setEnabled(enabled)
+        self.action_summary.setEnabled(enabled)
+        self.action_recategorize.setEnabled(enabled)
+        self.action_delete.setEnabled(enabled)
+
+    def init_stock_menu(self):
+        """Creates Stock menu, its actions need the database"""
+        self.menuStock = self.menubar.addMenu("Stock")
+        self.action_scan_mode = QtGui.QAction("Scan mode", self)
+        self.action_scan_mode.setCheckable(True)
+        self.action_scan_mode.setShortcut(QtGui.QKeySequence("F2"))
+        self.action_scan_mode.toggled.connect(self.toggle_scan_mode)
+        self.menuStock.addAction(self.action_scan_mode)
+
+        self.action_low_stock = QtGui.QAction("Low stock...", self)
+        self.action_low_stock.triggered.connect(self.show_low_stock)
+        self.menuStock.addAction(self.action_low_stock)
+
+        self.action_reorder_threshold = QtGui.QAction("Set reorder threshold...", self)
+        self.action_reorder_threshold.triggered.connect(self.edit_reorder_threshold)
+        self.menuStock.addAction(self.action_reorder_threshold)
+
+        self.action_summary = QtGui.QAction("Summary", self)
+        self.action_summary.setCheckable(True)
+        self.action_summary.setShortcut(QtGui.QKeySequence("F3"))
+        self.action_summary.toggled.connect(self.toggle_summary)
+        self.menuStock.addAction(self.action_summary)
+        self.menuStock.addSeparator()
+
+        self.action_recategorize = QtGui.QAction("Change category...", self)
+        self.action_recategorize.triggered.connect(self.recategorize_selected)
+        self.menuStock.addAction(self.action_recategorize)
+
+        self.action_delete = QtGui.QAction("Delete selected", self)
+        self.action_delete.setShortcut(QtGui.QKeySequence(QtGui.QKeySequence.StandardKey.Delete))
+        # only while the table has focus, inputs keep their Delete key
+        self.action_delete.setShortcutContext(QtCore.Qt.ShortcutContext.WidgetShortcut)
+        self.action_delete.triggered.connect(self.delete_selected)
+        self.tableView.addAction(self.action_delete)
+        self.menuStock.addAction(self.action_delete)
+
+    def toggle_scan_mode(self, enabled: bool):
+        """Shows scan bar and keeps scanner input focused on it"""
+        if self.scan_widget is None:
+            return
+        self.scan_widget.setVisible(enabled)
+        if enabled:
+            self.scan_widget.focus()
+
+    def toggle_summary(self, enabled: bool):
+        if self.summary_panel is not None:
+            self.summary_panel.setVisible(enabled)
+
+    def on_summary_visibility_changed(self, visible: bool):
+        # closing the dock unchecks its action, minimizing doesn't
+        if not visible and not self.isMinimized():
+            self.action_summary.setChecked(self.summary_panel.isVisible())
+        elif visible:
+            self.action_summary.setChecked(True)
+
+    def show_notification(self, message: str, duration: int = 5000):
+        if self.notification is not None:
+            self.notification.deleteLater()
+        self.notification = NotificationWidget(message, duration, parent=self)
+        self.notification.show()
+        self.notification.raise_()
+
+    def update_low_stock_action(self, count: int):
+        self.action_low_stock.setText(f"Low stock ({count})..." if count else "Low stock...")
+
+    def on_low_stock_changed(self, entered: list, cleared: list):
+        """Tells about items which just dropped to their reorder threshold"""
+        self.update_low_stock_action(self.stock_alerts.count())
+        if len(entered) == 1:
+            item = entered[0]
+            self.show_notification(f"Low stock: {item.sku} has {item.quantity}, "
+                                   f"reorder at {item.threshold}")
+        elif entered:
+            self.show_notification(f"{len(entered)} items dropped to their reorder threshold")
+
+    def show_low_stock(self):
+        """Lists items at or below their reorder threshold"""
+        items = self.stock_alerts.low_stock()
+        if not items:
+            QtWidgets.QMessageBox.information(self, "Low stock", "No items are low on stock")
+            return
+        shown = 30
+        lines = [f"{item.sku}  {item.name}: {item.quantity} (reorder at {item.threshold})"
+                 for item in items[:shown]]
+        if len(items) > shown:
+            lines.append(f"... and {len(items) - shown} more")
+        QtWidgets.QMessageBox.information(self, "Low stock", "\n".join(lines))
+
+    def edit_reorder_threshold(self):
+        """Sets the reorder threshold of the selected item"""
+        item = self.model.get_item(self.tableView.currentIndex())
+        if item is None:
+            QtWidgets.QMessageBox.information(self, "Reorder threshold", "Select an item first")
+            return
+        current = item.reorder_threshold if item.reorder_threshold is not None else -1
+        threshold, accepted = QtWidgets.QInputDialog.getInt(
+                self,
+                "Reorder threshold",
+                f"Reorder {item.sku} at or below (-1 uses its category's)",
+                current, -1, 1000000)
+        if accepted:
+            self.db_worker.submit(self.database.set_reorder_threshold,
+                                  item.id,
+                                  threshold if threshold >= 0 else None,
+                                  on_done=lambda _: self.action_logger.info(
+                                          f"Reorder threshold of {item.sku} set to {threshold}"),
+                                  on_error=lambda error: self.show_database_error("Reorder threshold", error))
+
+    def selected_items(self) -> list:
+        """Items of the selected rows, in row order"""
+        if self.model is None:
+            return []
+        rows = sorted(index.row() for index in self.tableView.selectionModel().selectedRows())
+        items = (self.model.item_at(row) for row in rows)
+        # a paged model's rows may have shifted past the end meanwhile
+        return [item for item in items if item is not None]
+
+    def recategorize_selected(self):
+        """Moves all selected items to one category"""
+        items = self.selected_items()
+        if not items:
+            QtWidgets.QMessageBox.information(self, "Change category", "Select items first")
+            return
+        category, accepted = QtWidgets.QInputDialog.getText(
+                self,
+                "Change category",
+                f"Category of {len(items)} items",
+                text=items[0].category)
+        category = category.strip()
+        if accepted and category:
+            self.db_worker.submit(self.database.bulk_update,
+                                  [item.id for item in items],
+                                  {"category": category},
+                                  on_done=lambda count: self.action_logger.info(
+                                          f"Moved {count} items to category {category}"),
+                                  on_error=lambda error: self.show_database_error("Change category", error))
+
+    def delete_selected(self):
+        """Deletes all selected items after asking"""
+        items = self.selected_items()
+        if not items:
+            return
+        question = (f"Delete {items[0].sku}?" if len(items) == 1
+                    else f"Delete {len(items)} items?")
+        answer = QtWidgets.QMessageBox.question(self, "Delete", question)
+        if answer == QtWidgets.QMessageBox.StandardButton.Yes:
+            self.db_worker.submit(self.database.bulk_delete,
+                                  [item.id for item in items],
+                                  on_done=lambda count: self.action_logger.info(f"Deleted {count} items"),
+                                  on_error=lambda error: self.show_database_error("Delete", error))
+
+    def show_database_error(self, title: str, error: Exception):
+        """Reports a failed database job, called on the GUI thread"""
+        self.error_logger.error(f"{title} failed", exc_info=error)
+        QtWidgets.QMessageBox.warning(self, title, str(error))
+
+    def select_item(self, item_id: int):
+        """Selects and scrolls to an item's row, if the view shows it
+
+        A paged model counts the row on the database worker.
+        """
+        finder = self.model.row_finder(item_id)
+        if finder is None:
+            self.select_row(self.model.locate_row(item_id))
+        else:
+            self.db_worker.submit(finder, on_done=lambda found: self.select_row(self.model.show_row(*found)))
+
+    def select_row(self, row: int | None):
+        if row is None:
+            return
+        self.tableView.selectRow(row)
+        self.tableView.scrollTo(self.model.index(row, 0))
+        if self.scan_widget is not None and self.scan_widget.isVisible():
+            self.scan_widget.focus()
+
+    @property
+    def export_manager(self):
+        """Export manager, created on first import or export"""
+        if self._export_manager is None:
+            from tech_cache.commons.export_manager import ExportManager
+            self._export_manager = ExportManager(self.database)
+        return self._export_manager
 
     def apply_stylesheet(self):
         """Retrieves stylesheet and populates entries with current colors"""
@@ -116,12 +403,17 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         Else changes are aborted
         """
+        from tech_cache.views.edit_item_dialog import AddItemDialog
+
         add_dialog = AddItemDialog(parent=self)
         if add_dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             new_item = add_dialog.get_new_item()
             if new_item:
-                self.database.add_item(new_item)
-                self.model.refresh_view()
+                self.db_worker.submit(self.database.add_item,
+                                      new_item,
+                                      on_done=lambda item_id: self.action_logger.info(
+                                              f"Added item with id: {item_id}"),
+                                      on_error=lambda error: self.show_database_error("Add item", error))
 
     def resizeEvent(self, event):
         """Builtin method
@@ -137,23 +429,47 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         """
         Signal to open an Edit item dialog.
 
-        Retrieves index of row item that was double clicked. Item is
-        then retrieved from model by it's index to populate fields
-        within edit item dialog.
+        Retrieves index of row item that was double clicked and populates
+        the edit item dialog from the model's row, without a database
+        read. Only the edited fields are written, guarded by the row's
+        updated_at so edits made meanwhile elsewhere aren't overwritten.
         """
+        from tech_cache.models.item import Item
+        from tech_cache.views.edit_item_dialog import EditItemDialog
 
-        proxy_index = self.filter_proxy_model.mapToSource(index)
-        item = self.model.get_item(proxy_index)
-        if item:
-            edit_dialog = EditItemDialog(item, self)
-            edit_dialog.setModal(True)
-            if edit_dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
-                self.database.update_item(item)
-                self.model.refresh_view()
-                self.action_logger.info(f"Edited item with id: {item.id}")
-        else:
-            # TODO: THROW an error which shouldnt even happen lol
+        row = self.model.get_item(index)
+        if row is None:
             self.error_logger.error("Can't find clicked item")
+            return
+        item = Item(name=row.name,
+                    sku=row.sku,
+                    category=row.category or "",
+                    quantity=row.quantity,
+                    specification=row.specification or "")
+        edit_dialog = EditItemDialog(item, self)
+        edit_dialog.setModal(True)
+        if edit_dialog.exec() != QtWidgets.QDialog.DialogCode.Accepted:
+            return
+        changes = edit_dialog.changes
+        if not changes:
+            return
+        self.db_worker.submit(self.database.update_item,
+                              row.id,
+                              changes,
+                              expected_updated_at=row.updated_at,
+                              on_done=lambda _: self.action_logger.info(f"Edited item with id: {row.id}"),
+                              on_error=lambda error: self.on_edit_failed(row.id, error))
+
+    def on_edit_failed(self, item_id: int, error: Exception):
+        from tech_cache.commons.database_manager import ConcurrentModificationError
+        from tech_cache.commons.item_changes import ChangeKind, ItemChange
+
+        self.show_database_error("Edit item", error)
+        if isinstance(error, ConcurrentModificationError):
+            # the shown row is stale, e.g. changed by another process
+            change = ItemChange(ChangeKind.UPDATED, (item_id,))
+            self.db_worker.submit(self.model.prefetch, change,
+                                  on_done=lambda rows: self.model.apply_change(change, rows))
 
     def closeEvent(self, event):
         """Builtin method 
@@ -174,6 +490,13 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
 
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
             # TODO: clean up
+            if self.search_controller is not None:
+                self.search_controller.shutdown()
+            if self.change_feed is not None:
+                self.change_feed.stop(wait=False)
+            if self.db_worker is not None:
+                # queued writes still go to the database
+                self.db_worker.shutdown()
             event.accept()
         else:
             event.ignore()
@@ -187,11 +510,15 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         """
         file_name = self.export_as_view()
         if file_name:
-            try:
-                self.export_manager.save_data_as_csv(file_name)
-                self.action_logger.info(f"Exported db with filename{file_name}")
-            except Exception as e:
-                self.error_logger.error(f"Error exporting {e}") 
+            self.statusbar.showMessage("Exporting...")
+            self.db_worker.submit(self.export_manager.save_data_as_csv,
+                                  file_name,
+                                  on_done=lambda _: self.on_exported(file_name),
+                                  on_error=lambda error: self.show_database_error("Export", error))
+
+    def on_exported(self, file_name: str):
+        self.statusbar.showMessage(f"Exported to {file_name}.csv", 5000)
+        self.action_logger.info(f"Exported db with filename{file_name}")
 
     def export_as_view(self) -> str|None:
         """Opens export as dialog
@@ -208,21 +535,40 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         return file_name
 
     def handle_import_action(self):
+        """Imports a csv file on the database worker, progress goes to the status bar"""
         file_name = self.import_view()
         if file_name:
-            try:
-
-                self.model.layoutAboutToBeChanged.emit()
-                self.action_logger.info("Importing items")
-                self.export_manager.import_as_csv(file_name)
-                self.model.layoutChanged.emit()
-                self.model.refresh_view()
-            
-            except Exception as e:
-                self.error_logger.error("Failed importing items")
-                QtWidgets.QMessageBox.critical(self,
-                                              "Mandatory Field", 
-                                              str(e))
+            self.action_logger.info("Importing items")
+            # one import at a time
+            self.action_import.setEnabled(False)
+            self.statusbar.showMessage("Importing...")
+            self.db_worker.submit(self.export_manager.import_as_csv,
+                                  file_name,
+                                  on_progress=lambda report: self.statusbar.showMessage(
+                                          f"Importing... {report.rows_read:,} rows read"),
+                                  on_done=lambda report: self.on_imported(file_name, report),
+                                  on_error=self.on_import_failed)
+
+    def on_imported(self, file_name: str, report):
+        self.action_import.setEnabled(True)
+        self.statusbar.showMessage(f"Imported {report.inserted:,} items", 5000)
+        self.action_logger.info(f"Imported {report.inserted} items from {file_name}")
+        if report.errors:
+            for error in report.errors:
+                self.error_logger.error(f"Import line {error.line}: {error.message}")
+            QtWidgets.QMessageBox.warning(self,
+                                          "Import",
+                                          f"{len(report.errors)} rows were not imported, "
+                                          f"first on line {report.errors[0].line}: "
+                                          f"{report.errors[0].message}")
+
+    def on_import_failed(self, error: Exception):
+        self.action_import.setEnabled(True)
+        self.statusbar.clearMessage()
+        self.error_logger.error("Failed importing items", exc_info=error)
+        QtWidgets.QMessageBox.critical(self,
+                                      "Mandatory Field", 
+                                      str(error))
 
     def import_view(self) -> str|None:
         file_name, _ = QtWidgets.QFileDialog.getOpenFileName(self,
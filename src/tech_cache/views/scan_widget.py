@@ -0,0 +1,106 @@
+import logging
+from PyQt6 import QtWidgets, QtCore
+from tech_cache.commons.database_manager import DatabaseManager
+from tech_cache.commons.sku_index import SkuIndex
+from tech_cache.utils.database_worker import DatabaseWorker
+from tech_cache.utils.logger_conf import LoggerConfig
+
+
+class ScanWidget(QtWidgets.QWidget):
+    """Scan mode bar for keyboard wedge barcode scanners
+
+    A scanner types the sku followed by Enter. The sku is resolved
+    through the SkuIndex and the item's quantity changed by the selected
+    step right away, so operators can keep scanning. +1 and -1 buttons
+    correct the last scanned item. Changes go through the database
+    worker, scans arriving faster than it writes are coalesced.
+    """
+    # id of the scanned item, lets the window select its row
+    item_scanned = QtCore.pyqtSignal(int)
+
+    def __init__(self, database: DatabaseManager, sku_index: SkuIndex, worker: DatabaseWorker, parent=None):
+        super(ScanWidget, self).__init__(parent)
+        self.action_logger = logging.getLogger(LoggerConfig.ACTION_LOGGER)
+        self.database = database
+        self.sku_index = sku_index
+        self.worker = worker
+        self.last_item_id = None
+        self.last_sku = None
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QtWidgets.QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.scan_input = QtWidgets.QLineEdit(self)
+        self.scan_input.setObjectName("scan_input")
+        self.scan_input.setPlaceholderText("Scan SKU...")
+        self.scan_input.returnPressed.connect(self.on_scan)
+
+        # quantity change of every scan
+        self.step_input = QtWidgets.QComboBox(self)
+        self.step_input.addItem("Take out (-1)", -1)
+        self.step_input.addItem("Put in (+1)", 1)
+        self.step_input.addItem("Look up only", 0)
+
+        self.minus_button = QtWidgets.QPushButton("-1", self)
+        self.plus_button = QtWidgets.QPushButton("+1", self)
+        self.minus_button.clicked.connect(lambda: self.adjust_last(-1))
+        self.plus_button.clicked.connect(lambda: self.adjust_last(1))
+        self.set_last_enabled(False)
+
+        self.result_label = QtWidgets.QLabel(self)
+        self.result_label.setObjectName("scan_result")
+
+        layout.addWidget(self.scan_input, 2)
+        layout.addWidget(self.step_input)
+        layout.addWidget(self.minus_button)
+        layout.addWidget(self.plus_button)
+        layout.addWidget(self.result_label, 3)
+
+    def set_last_enabled(self, enabled: bool):
+        self.minus_button.setEnabled(enabled)
+        self.plus_button.setEnabled(enabled)
+
+    def focus(self):
+        self.scan_input.setFocus()
+        self.scan_input.selectAll()
+
+    def on_scan(self):
+        sku = self.scan_input.text().strip()
+        self.scan_input.clear()
+        if not sku:
+            return
+
+        item_id = self.sku_index.lookup(sku)
+        if item_id is None:
+            self.result_label.setText(f"Unknown SKU {sku}")
+            self.set_last_enabled(False)
+            self.last_item_id = None
+            return
+
+        self.last_item_id, self.last_sku = item_id, sku
+        self.set_last_enabled(True)
+        step = self.step_input.currentData()
+        if step:
+            self.adjust_last(step)
+        else:
+            self.worker.submit(self.database.get_item, item_id,
+                               on_done=lambda item: self.result_label.setText(
+                                       f"{sku}: {item.quantity}" if item else f"Unknown SKU {sku}"))
+        # after the change, its row may have moved
+        self.item_scanned.emit(item_id)
+
+    def adjust_last(self, delta: int):
+        """Changes quantity of the last scanned item"""
+        if self.last_item_id is None:
+            return
+        sku = self.last_sku
+        self.worker.adjust(self.last_item_id, delta, reason="scan",
+                           on_done=lambda quantity: self.on_adjusted(sku, delta, quantity),
+                           on_error=lambda error: self.result_label.setText(f"{sku}: {error}"))
+        self.focus()
+
+    def on_adjusted(self, sku: str, delta: int, quantity: int | None):
+        self.result_label.setText(f"{sku}: {delta:+d} → {quantity}")
+        self.action_logger.info(f"Scanned {sku}, quantity changed by {delta}")
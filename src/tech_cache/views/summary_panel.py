@@ -0,0 +1,142 @@
+import logging
+from datetime import timezone
+from PyQt6 import QtWidgets, QtCore
+from tech_cache.commons.item_changes import ItemChange
+from tech_cache.commons.reports import ReportEngine, StockReport, local_midnight
+from tech_cache.utils.logger_conf import LoggerConfig
+
+
+class ReportSignals(QtCore.QObject):
+    finished = QtCore.pyqtSignal(object)
+
+
+class ReportTask(QtCore.QRunnable):
+    """Computes one report on a pool thread"""
+    def __init__(self, reports: ReportEngine, days: int | None, signals: ReportSignals):
+        super(ReportTask, self).__init__()
+        self.reports = reports
+        self.days = days
+        self.signals = signals
+
+    def run(self):
+        try:
+            since = local_midnight(self.days) if self.days is not None else None
+            report = self.reports.report(since)
+        except Exception:
+            logging.getLogger(LoggerConfig.ERROR_LOGGER).exception("Summary report failed")
+            report = None
+        self.signals.finished.emit(report)
+
+
+class SummaryPanel(QtWidgets.QDockWidget):
+    """Dock with item count, quantity, value and turnover per category
+
+    Reports come from the ReportEngine on a pool thread. After database
+    changes the panel refreshes once writes pause for refresh_ms, and
+    only while it is visible.
+    """
+    # label, days back from today's midnight, None for all items
+    PERIODS = (("All items", None),
+               ("Updated today", 0),
+               ("Updated in 7 days", 6),
+               ("Updated in 30 days", 29))
+    HEADERS = ("Category", "Items", "Quantity", "Value", "Out", "Turnover")
+
+    # carries change notifications over to the GUI thread
+    data_changed = QtCore.pyqtSignal()
+
+    def __init__(self, reports: ReportEngine, refresh_ms: int = 1000, parent=None):
+        super(SummaryPanel, self).__init__("Summary", parent)
+        self.setObjectName("summary_panel")
+        self.reports = reports
+        self.running = False
+        self.stale = True
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(refresh_ms)
+        self.timer.timeout.connect(self.refresh)
+
+        self.signals = ReportSignals(self)
+        self.signals.finished.connect(self.on_report)
+        self.data_changed.connect(self.on_data_changed)
+        self.visibilityChanged.connect(self.on_visibility_changed)
+        self.reports.db_manager.subscribe(self.on_item_change)
+        self.init_ui()
+
+    def init_ui(self):
+        widget = QtWidgets.QWidget(self)
+        layout = QtWidgets.QVBoxLayout(widget)
+
+        self.period_input = QtWidgets.QComboBox(widget)
+        for label, days in self.PERIODS:
+            self.period_input.addItem(label, days)
+        self.period_input.currentIndexChanged.connect(self.refresh)
+
+        self.table = QtWidgets.QTableWidget(0, len(self.HEADERS), widget)
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
+
+        self.total_label = QtWidgets.QLabel(widget)
+        self.total_label.setWordWrap(True)
+
+        layout.addWidget(self.period_input)
+        layout.addWidget(self.table)
+        layout.addWidget(self.total_label)
+        self.setWidget(widget)
+
+    def on_item_change(self, change: ItemChange):
+        # called in the thread which wrote
+        self.data_changed.emit()
+
+    def on_data_changed(self):
+        self.stale = True
+        if self.isVisible():
+            self.timer.start()
+
+    def on_visibility_changed(self, visible: bool):
+        if visible and self.stale:
+            self.refresh()
+
+    def refresh(self):
+        if self.running:
+            # the running report may predate the change, refresh after it
+            self.stale = True
+            return
+        self.running = True
+        self.stale = False
+        task = ReportTask(self.reports, self.period_input.currentData(), self.signals)
+        QtCore.QThreadPool.globalInstance().start(task)
+
+    def on_report(self, report: StockReport | None):
+        self.running = False
+        if report is not None:
+            self.show_report(report)
+        if self.stale and self.isVisible():
+            self.timer.start()
+
+    @staticmethod
+    def cell(value, align_right: bool = True) -> QtWidgets.QTableWidgetItem:
+        item = QtWidgets.QTableWidgetItem(value)
+        if align_right:
+            item.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignRight | QtCore.Qt.AlignmentFlag.AlignVCenter)
+        return item
+
+    def show_report(self, report: StockReport):
+        rows = report.categories
+        self.table.setRowCount(len(rows))
+        for row, category in enumerate(rows):
+            turnover = category.turnover
+            values = (f"{category.items:,}", f"{category.quantity:,}", f"{category.value:,.2f}",
+                      f"{category.units_out:,}", f"{turnover:.2f}" if turnover is not None else "-")
+            self.table.setItem(row, 0, self.cell(category.category, align_right=False))
+            for column, value in enumerate(values, start=1):
+                self.table.setItem(row, column, self.cell(value))
+
+        total = report.total
+        # stored times are UTC
+        since = report.turnover_since.replace(tzinfo=timezone.utc).astimezone().strftime("%Y-%m-%d")
+        self.total_label.setText(f"{total.items:,} items, {total.quantity:,} in stock "
+                                 f"worth {total.value:,.2f}, {total.units_out:,} taken out since {since}")